@@ -1,22 +1,167 @@
 """
 PythonProjectMngr - Главный файл приложения
+
+Приложение работает в одном экземпляре. Повторный запуск не создаёт
+второй значок в трее, а передаёт команду уже запущенному экземпляру
+и сразу завершается:
+    python app.py                      окно быстрого открытия
+    python app.py open proj1           открыть папку проекта
+    python app.py create proj1 proj2 --template package
+    python app.py delete proj1
+    python app.py batch operations.jsonl   (формат - как у cli.py batch)
+
+Параметр --profile-startup печатает время этапов запуска и сохраняет
+его в startup.json в папке приложения.
 """
+# Отсчёт этапов запуска начинается с импорта профилировщика
+from core.startup import profiler
 import sys
-from PyQt6.QtWidgets import QApplication
-from core.manager import ProjectManager
-from ui.tray import TrayIcon
+import json
+import time
+import argparse
+import multiprocessing
+from pathlib import Path
+from core import ipc
+from core.paths import default_app_folder
 
+# Сколько ждать сервер экземпляра, который запущен одновременно с этим (с)
+STARTUP_WAIT = 10
 
-def main():
-    app = QApplication(sys.argv)
-    app.setQuitOnLastWindowClosed(False)
-    
-    manager = ProjectManager()
-    tray = TrayIcon(manager)
-    tray.show()
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="app.py", description="PythonProjectMngr")
+    parser.add_argument("--home", help="папка приложения (по умолчанию $PYTHONPROJECTMNGR_HOME или профиль)")
+    parser.add_argument("--profile-startup", action="store_true", help="замерить этапы запуска")
+    sub = parser.add_subparsers(dest="command")
+
+    open_parser = sub.add_parser("open", help="открыть папку проекта")
+    open_parser.add_argument("names", nargs="+")
+
+    create = sub.add_parser("create", help="создать проекты")
+    create.add_argument("names", nargs="+")
+    create.add_argument("--template", help="шаблон проекта")
+    create.add_argument("--venv", action="store_true", help="создать .venv")
+
+    delete = sub.add_parser("delete", help="удалить проекты")
+    delete.add_argument("names", nargs="+")
+
+    batch = sub.add_parser("batch", help="операции из файла JSON Lines")
+    batch.add_argument("file", help="путь к файлу или '-' для stdin")
+    return parser
+
+
+def operations_from_args(args):
+    if args.command == "open":
+        return [{"op": "open", "name": name} for name in args.names]
+    if args.command == "create":
+        return [{"op": "create", "name": name, "template": args.template, "venv": args.venv}
+                for name in args.names]
+    if args.command == "delete":
+        return [{"op": "delete", "name": name} for name in args.names]
+    if args.command == "batch":
+        stream = sys.stdin if args.file == "-" else open(args.file, "r", encoding="utf-8")
+        with stream:
+            return [json.loads(line) for line in stream
+                    if line.strip() and not line.strip().startswith("#")]
+    return [{"op": "show"}]
+
+
+def print_reply(result):
+    # У собранного exe без консоли stdout нет
+    if sys.stdout is not None:
+        print(json.dumps(result, ensure_ascii=False, default=str), flush=True)
+
+
+def forward(app_folder, operations):
+    """
+    Передача операций запущенному экземпляру и печать ответов
+    Returns: код выхода или None, если экземпляр не запущен
+    """
+    replies = ipc.send(app_folder, operations)
+    if replies is None:
+        return None
+    for reply in replies:
+        print_reply(reply)
+    return 0 if all(reply.get("ok", False) for reply in replies) else 1
+
+
+def run_gui(app_folder, operations, profile=False):
+    """Первый экземпляр: трей и сервер команд для следующих запусков"""
+    with profiler.phase("import.qt"):
+        from PyQt6.QtWidgets import QApplication
+        from PyQt6.QtCore import QTimer
+    with profiler.phase("import.core"):
+        from core.manager import ProjectManager
+        from core.trash import TrashPurger
+        from core.instance import InstanceServer
+        from core import trace
+    with profiler.phase("import.ui.tray"):
+        # Модуль окон загружается позже, при первом открытии окна
+        from ui.tray import TrayIcon
+
+    with profiler.phase("init.qapplication"):
+        app = QApplication(sys.argv)
+        app.setQuitOnLastWindowClosed(False)
+
+    with profiler.phase("init.ipc"):
+        # Сервер поднимается до долгой инициализации, чтобы одновременный
+        # запуск нашёл этот экземпляр, а не создал второй трей
+        server = InstanceServer(ipc.server_address(app_folder))
+        if not server.listen():
+            # Адрес занят экземпляром, который запустился раньше
+            deadline = time.monotonic() + STARTUP_WAIT
+            code = forward(app_folder, operations)
+            while code is None and time.monotonic() < deadline:
+                time.sleep(0.1)
+                code = forward(app_folder, operations)
+            if code is None:
+                print_reply({"ok": False, "message": "Не удалось связаться с запущенным экземпляром"})
+                return 1
+            return code
+
+    with profiler.phase("init.manager"):
+        manager = ProjectManager(app_folder)
+    purger = TrashPurger(manager)
+    purger.start()
+
+    with profiler.phase("init.tray"):
+        tray = TrayIcon(manager)
+        tray.show()
+    profiler.mark("tray.visible")
+    server.handler = tray.handle_command
+
+    # Команды самого первого запуска (кроме показа окна) выполняются в трее
+    for op in operations:
+        if op.get("op") != "show":
+            tray.handle_command(op, print_reply)
+
+    def on_event_loop_started():
+        profiler.mark("event_loop.started")
+        profiler.to_tracer(trace.tracer)
+        if profile:
+            profiler.save(manager.app_folder / "startup.json")
+            if sys.stderr is not None:
+                print(profiler.format(), file=sys.stderr, flush=True)
+
+    QTimer.singleShot(0, on_event_loop_started)
     
-    sys.exit(app.exec())
+    code = app.exec()
+    server.close()
+    return code
+
+
+def main(argv=None):
+    # Пул процессов индексации в собранном PyInstaller exe
+    multiprocessing.freeze_support()
+    args = build_parser().parse_args(argv)
+    app_folder = Path(args.home) if args.home else default_app_folder()
+    operations = operations_from_args(args)
+
+    code = forward(app_folder, operations)
+    if code is None:
+        return run_gui(app_folder, operations, args.profile_startup)
+    return code
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""
+Замеры производительности ProjectManager и окон на синтетических корневых папках
+
+Примеры:
+    python benchmarks/bench.py
+    python benchmarks/bench.py --sizes 1000,10000,100000 --shapes shallow,deep
+    python benchmarks/bench.py --save benchmarks/baseline.json
+    python benchmarks/bench.py --compare benchmarks/baseline.json --threshold 20
+
+Каждый замер запускается на свежем дереве во временной папке.
+Окна проверяются на платформе Qt offscreen (без PyQt6 эти замеры пропускаются).
+Результат - JSON {замер: метрики}; --compare печатает разницу с сохранённым
+файлом и возвращает код 1, если медиана ухудшилась больше порога.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from core.manager import ProjectManager
+
+# Форма проекта: (глубина вложенности, папок на уровне, файлов в папке)
+SHAPES = {
+    "shallow": (0, 0, 2),
+    "deep": (4, 2, 3),
+}
+
+# Сколько проектов создаётся и удаляется в замерах create/delete
+MUTATION_SAMPLES = 200
+
+
+def make_project(path, shape):
+    depth, fanout, files = SHAPES[shape]
+    os.makedirs(path)
+    dirs = [path]
+    for _ in range(depth):
+        next_dirs = []
+        for parent in dirs:
+            for i in range(fanout):
+                child = os.path.join(parent, f"pkg{i}")
+                os.mkdir(child)
+                next_dirs.append(child)
+        dirs = next_dirs if len(next_dirs) < 64 else next_dirs[:64]
+    for directory in [path] + dirs:
+        for i in range(files):
+            with open(os.path.join(directory, f"module{i}.py"), "w") as f:
+                f.write("x = 1\n" * (i + 1))
+
+
+def make_root(root, count, shape):
+    """Корневая папка с count синтетическими проектами"""
+    os.makedirs(root, exist_ok=True)
+    for i in range(count):
+        make_project(os.path.join(root, f"project_{i:06d}"), shape)
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * p / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def summarize(samples, ops_per_sample=1):
+    """Метрики по списку длительностей в секундах"""
+    total = sum(samples)
+    return {
+        "samples": len(samples),
+        "mean_ms": round(total / len(samples) * 1000, 3),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p90_ms": round(percentile(samples, 90) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+        "ops_per_sec": round(len(samples) * ops_per_sample / total, 1) if total else None,
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+class Workspace:
+    """Временная папка приложения с корнем на count проектов"""
+    def __init__(self, count, shape):
+        self.count = count
+        self.shape = shape
+
+    def __enter__(self):
+        self.dir = tempfile.mkdtemp(prefix="ppm-bench-")
+        self.root = os.path.join(self.dir, "Projects")
+        make_root(self.root, self.count, self.shape)
+        self.manager = ProjectManager(os.path.join(self.dir, "app"))
+        self.manager.change_root_path(self.root, move_projects=False)
+        return self
+
+    def __exit__(self, *exc):
+        self.manager.store.flush()
+        shutil.rmtree(self.dir, ignore_errors=True)
+        return False
+
+
+# --- Замеры: func(workspace, repeat) -> (длительности, операций в замере) ---
+
+def bench_get_projects_cold(ws, repeat):
+    samples = []
+    for _ in range(repeat):
+        ws.manager.index.set_root(ws.root)
+        samples.append(timed(ws.manager.get_projects))
+    return samples, 1
+
+
+def bench_get_projects_warm(ws, repeat):
+    ws.manager.get_projects()
+    return [timed(ws.manager.get_projects) for _ in range(repeat * 10)], 1
+
+
+def bench_create_delete(ws, repeat):
+    """Создание и удаление (в корзину) MUTATION_SAMPLES проектов"""
+    names = [f"bench_new_{i}" for i in range(MUTATION_SAMPLES)]
+    created = [timed(ws.manager.create_project, name) for name in names]
+    deleted = [timed(ws.manager.delete_project, name) for name in names]
+    return {"create_project": created, "delete_project": deleted}, 1
+
+
+def bench_scan_sizes(ws, repeat):
+    samples = [timed(lambda: ws.manager.scan_sizes(full=True))]
+    samples += [timed(ws.manager.scan_sizes) for _ in range(repeat - 1)]
+    return samples, ws.count
+
+
+def bench_search(ws, repeat):
+    ws.manager.get_search_index()
+    queries = ["proj", "project_00", "0042", "prjct", "ect_12", "xyz"]
+    return [timed(ws.manager.search_projects, q) for q in queries * repeat], 1
+
+
+def bench_change_root(ws, repeat):
+    """Перенос всех проектов в новую папку и обратно"""
+    other = os.path.join(ws.dir, "Moved")
+    samples = []
+    for i in range(repeat):
+        target = other if i % 2 == 0 else ws.root
+        samples.append(timed(ws.manager.change_root_path, target, True))
+    return samples, ws.count
+
+
+CORE_BENCHMARKS = {
+    "get_projects_cold": bench_get_projects_cold,
+    "get_projects_warm": bench_get_projects_warm,
+    "create_delete": bench_create_delete,
+    "scan_sizes": bench_scan_sizes,
+    "search_projects": bench_search,
+    "change_root_path": bench_change_root,
+}
+
+
+def ui_benchmarks():
+    """Замеры окон на offscreen-платформе Qt (пусто, если PyQt6 не установлен)"""
+    if sys.platform.startswith("linux"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt6.QtWidgets import QApplication
+    except ImportError:
+        return {}
+    from core.tasks import TaskManager
+    from ui.windows import DeleteProjectWindow
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    def wait_for(condition, timeout=60):
+        deadline = time.perf_counter() + timeout
+        while not condition():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("окно не загрузило список проектов")
+            app.processEvents()
+            time.sleep(0.0005)
+
+    def bench_delete_window_load(ws, repeat):
+        """Открытие окна удаления до заполненной первой порции таблицы"""
+        tasks = TaskManager(ws.manager)
+        samples = []
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                window = DeleteProjectWindow(ws.manager, tasks)
+                window.show()
+                wait_for(lambda: window.refresh_btn.isEnabled() and window.model.rowCount() > 0)
+                samples.append(time.perf_counter() - start)
+                window.close()
+                window.deleteLater()
+                app.processEvents()
+        finally:
+            tasks.shutdown()
+        return samples, 1
+
+    def bench_delete_window_filter(ws, repeat):
+        """Фильтрация таблицы по мере ввода текста"""
+        tasks = TaskManager(ws.manager)
+        window = DeleteProjectWindow(ws.manager, tasks)
+        try:
+            wait_for(lambda: window.refresh_btn.isEnabled())
+            samples = []
+            for _ in range(repeat):
+                for text in ("p", "pr", "project_0", "project_00", ""):
+                    samples.append(timed(window.filter_input.setText, text))
+            return samples, 1
+        finally:
+            window.close()
+            tasks.shutdown()
+
+    return {
+        "ui_delete_window_load": bench_delete_window_load,
+        "ui_delete_window_filter": bench_delete_window_filter,
+    }
+
+
+def run_case(func, count, shape, repeat):
+    """
+    Прогон замера: сначала время, затем отдельный прогон под tracemalloc
+    (он заметно замедляет код, поэтому в длительности не попадает)
+    """
+    with Workspace(count, shape) as ws:
+        samples, ops = func(ws, repeat)
+    with Workspace(count, shape) as ws:
+        tracemalloc.start()
+        try:
+            func(ws, 1)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    groups = samples if isinstance(samples, dict) else {None: samples}
+    results = {}
+    for name, group in groups.items():
+        metrics = summarize(group, ops)
+        metrics["peak_kb"] = peak // 1024
+        results[name] = metrics
+    return results
+
+
+def run(sizes, shapes, repeat, selected=None, include_ui=True, log=sys.stderr):
+    benchmarks = dict(CORE_BENCHMARKS)
+    if include_ui:
+        benchmarks.update(ui_benchmarks())
+    results = {}
+    for shape in shapes:
+        for count in sizes:
+            for bench_name, func in benchmarks.items():
+                if selected and bench_name not in selected:
+                    continue
+                log.write(f"{bench_name} [{count} {shape}]...\n")
+                log.flush()
+                for name, metrics in run_case(func, count, shape, repeat).items():
+                    results[f"{name or bench_name}/{count}/{shape}"] = metrics
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Таблица изменений медианы и пикового потребления памяти
+    Returns: список замеров, где медиана ухудшилась больше threshold %
+    """
+    regressions = []
+    lines = [f"{'замер':48} {'p50 было':>10} {'p50 стало':>10} {'изм.':>8} {'память':>8}"]
+    for key, metrics in sorted(current["results"].items()):
+        old = baseline["results"].get(key)
+        if old is None:
+            lines.append(f"{key:48} {'-':>10} {metrics['p50_ms']:>10.3f} {'новый':>8}")
+            continue
+        change = (metrics["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0.0
+        memory = (metrics["peak_kb"] - old["peak_kb"]) / old["peak_kb"] * 100 if old["peak_kb"] else 0.0
+        mark = " !" if change > threshold else ""
+        lines.append(f"{key:48} {old['p50_ms']:>10.3f} {metrics['p50_ms']:>10.3f} "
+                     f"{change:>+7.1f}% {memory:>+7.1f}%{mark}")
+        if change > threshold:
+            regressions.append(key)
+    return lines, regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bench.py", description="Замеры PythonProjectMngr")
+    parser.add_argument("--sizes", default="1000,10000", help="число проектов через запятую")
+    parser.add_argument("--shapes", default="shallow,deep", help=f"формы проектов: {', '.join(SHAPES)}")
+    parser.add_argument("--repeat", type=int, default=5, help="повторов каждого замера")
+    parser.add_argument("--only", help="только эти замеры (через запятую)")
+    parser.add_argument("--no-ui", action="store_true", help="без замеров окон")
+    parser.add_argument("--save", help="записать результат в файл")
+    parser.add_argument("--compare", help="сравнить с сохранённым результатом")
+    parser.add_argument("--threshold", type=float, default=20.0, help="допустимое ухудшение медианы, %%")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    shapes = args.shapes.split(",")
+    selected = set(args.only.split(",")) if args.only else None
+    current = run(sizes, shapes, max(args.repeat, 1), selected, not args.no_ui)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2, sort_keys=True)
+    if not args.compare:
+        json.dump(current, sys.stdout, ensure_ascii=False, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+        return 0
+
+    with open(args.compare, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    lines, regressions = compare(baseline, current, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\nУхудшение больше {args.threshold}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
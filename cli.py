@@ -0,0 +1,289 @@
+"""
+PythonProjectMngr - консольный режим без графического интерфейса
+
+Примеры:
+    python cli.py list
+    python cli.py create proj1 proj2 --template package --venv
+    python cli.py delete proj1 proj2
+    python cli.py archive old_proj
+    python cli.py move proj1 proj2 --to work
+    python cli.py migrate D:/Projects
+    python cli.py deps proj1 --write
+    python cli.py deps --package numpy
+    python cli.py import D:/Work --move
+    python cli.py snapshot proj1
+    python cli.py snapshot --list
+    python cli.py snapshot --restore 12
+    python cli.py batch operations.jsonl --jobs 8
+
+Файл batch - JSON Lines, одна операция на строку:
+    {"op": "create", "name": "proj1", "template": "package", "venv": true}
+    {"op": "delete", "name": "proj2"}
+    {"op": "archive", "name": "old_proj"}
+    {"op": "unarchive", "name": "old_proj"}
+    {"op": "move", "name": "proj1", "to": "work"}
+    {"op": "list", "sort": "recent", "tag": "client", "limit": 20}
+    {"op": "list", "all_roots": true}
+    {"op": "migrate", "path": "D:/Projects", "move": true}
+    {"op": "deps", "names": ["proj1"], "write": true}
+    {"op": "deps", "package": "numpy"}
+    {"op": "import", "path": "D:/Work", "move": false, "dry_run": true}
+    {"op": "snapshot", "name": "proj1"}
+    {"op": "snapshots", "name": "proj1"}
+    {"op": "restore_snapshot", "id": 12}
+
+Каждый результат печатается отдельной строкой JSON.
+Код возврата 0, если все операции успешны, иначе 1.
+"""
+import sys
+import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from core.manager import ProjectManager
+
+
+class BatchRunner:
+    """Параллельное выполнение операций над ProjectManager"""
+    def __init__(self, manager, jobs=4, out=sys.stdout):
+        self.manager = manager
+        self.jobs = jobs
+        self.out = out
+        self.failed = 0
+        self._out_lock = threading.Lock()
+
+    def emit(self, result):
+        with self._out_lock:
+            if not result.get("ok", False):
+                self.failed += 1
+            self.out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            self.out.flush()
+
+    def execute(self, op):
+        """Выполнение одной операции. Returns: dict с результатом"""
+        kind = op.get("op")
+        try:
+            if kind == "create":
+                success, message, path = self.manager.create_project(op.get("name", ""), op.get("template"))
+                result = {"op": kind, "name": op.get("name"), "ok": success, "message": message, "path": path}
+                if success and op.get("venv"):
+                    env_ok, env_message = self.manager.provision_env(path)
+                    result.update({"ok": env_ok, "venv": env_message})
+                return result
+            if kind == "delete":
+                success, message = self.manager.delete_project(op.get("name", ""))
+                return {"op": kind, "name": op.get("name"), "ok": success, "message": message}
+            if kind in ("archive", "unarchive"):
+                action = self.manager.archive_project if kind == "archive" else self.manager.restore_archived
+                success, message = action(op.get("name", ""), op.get("root"))
+                return {"op": kind, "name": op.get("name"), "ok": success, "message": message}
+            if kind == "move":
+                success, message = self.manager.move_project(op.get("name", ""), op.get("root"), op.get("to"))
+                return {"op": kind, "name": op.get("name"), "ok": success, "message": message}
+            if kind == "list":
+                if op.get("all_roots"):
+                    projects = [{"name": name, "root": root} for name, root in self.manager.get_workspace()]
+                    return {"op": kind, "ok": True, "roots": self.manager.root_paths(),
+                            "status": self.manager.workspace.status(), "projects": projects}
+                if op.get("sort", "name") == "name" and not op.get("tag"):
+                    projects = self.manager.get_projects()
+                else:
+                    rows = self.manager.query_projects(op.get("sort", "name"), op.get("tag"), op.get("limit"))
+                    projects = [row["name"] for row in rows]
+                return {"op": kind, "ok": True, "root_path": self.manager.root_path, "projects": projects}
+            if kind == "deps":
+                return self.deps(op)
+            if kind == "snapshot":
+                success, message = self.manager.snapshot_project(op.get("name", ""), op.get("root"), throttled=False)
+                return {"op": kind, "name": op.get("name"), "ok": success, "message": message}
+            if kind == "snapshots":
+                snapshots = self.manager.project_snapshots(op.get("name"), op.get("root"))
+                return {"op": kind, "name": op.get("name"), "ok": True, "snapshots": snapshots}
+            if kind == "restore_snapshot":
+                success, message = self.manager.restore_snapshot(op.get("id"))
+                return {"op": kind, "id": op.get("id"), "ok": success, "message": message}
+            if kind == "import":
+                return self.import_projects(op)
+            if kind == "migrate":
+                success, message = self.manager.change_root_path(op.get("path", ""), op.get("move", True))
+                return {"op": kind, "path": op.get("path"), "ok": success, "message": message}
+            return {"op": kind, "ok": False, "message": f"Неизвестная операция: {kind}"}
+        except Exception as e:
+            return {"op": kind, "ok": False, "message": str(e)}
+
+    def deps(self, op):
+        """Зависимости проектов или, с package, проекты, которые от него зависят"""
+        from core.deps import dependents, package_name
+        report = self.manager.analyze_dependencies(op.get("names") or None, op.get("root"))
+        if op.get("package"):
+            package = op["package"].lower()
+            projects = next((projects for name, projects in dependents(report).items()
+                             if name.lower() == package), [])
+            return {"op": "deps", "ok": True, "package": op["package"], "projects": projects}
+        projects = {}
+        for name, modules in report.items():
+            projects[name] = {package_name(module): len(files) for module, files in modules.items()}
+            if op.get("write"):
+                success, message = self.manager.suggest_requirements(name, op.get("root"), write=True)
+                projects[name]["requirements.txt"] = message
+        return {"op": "deps", "ok": True, "projects": projects}
+
+    def import_projects(self, op):
+        """Поиск проектов в дереве и импорт ссылкой или переносом"""
+        success, message, paths = self.manager.find_importable(op.get("path", ""))
+        result = {"op": "import", "path": op.get("path"), "ok": success, "message": message, "projects": paths}
+        if success and paths and not op.get("dry_run"):
+            result["ok"], result["message"] = self.manager.import_projects(paths, op.get("move", False))
+        return result
+
+    def run(self, operations):
+        """
+        Операции выполняются параллельно; migrate, import и restore_snapshot
+        меняют состав корневой папки, а list должен видеть результат всех
+        предыдущих операций, поэтому они работают как барьер между группами
+        """
+        group = []
+        for op in operations:
+            if op.get("op") in ("migrate", "import", "restore_snapshot", "list"):
+                self.run_group(group)
+                group = []
+                self.emit(self.execute(op))
+            else:
+                group.append(op)
+        self.run_group(group)
+        return self.failed == 0
+
+    def run_group(self, operations):
+        """
+        Операции над разными проектами идут параллельно, над одним проектом -
+        по порядку в файле. Результаты выводятся в порядке операций
+        """
+        if not operations:
+            return
+        chains = {}
+        for i, op in enumerate(operations):
+            # Операция без имени проекта ни от чего не зависит
+            chains.setdefault(op.get("name") or i, []).append((i, op))
+        results = {}
+        next_index = 0
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            futures = [executor.submit(self.run_chain, chain) for chain in chains.values()]
+            for future in as_completed(futures):
+                results.update(future.result())
+                while next_index in results:
+                    self.emit(results.pop(next_index))
+                    next_index += 1
+
+    def run_chain(self, chain):
+        """Последовательное выполнение операций одного проекта. Returns: {номер: результат}"""
+        return {i: self.execute(op) for i, op in chain}
+
+
+def read_operations(path):
+    """Чтение операций из файла JSON Lines ('-' - стандартный ввод)"""
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line in stream:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield json.loads(line)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="PythonProjectMngr без интерфейса")
+    parser.add_argument("--home", help="папка приложения (по умолчанию $PYTHONPROJECTMNGR_HOME или профиль)")
+    parser.add_argument("--jobs", type=int, default=4, help="число параллельных операций")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    listing = sub.add_parser("list", help="список проектов")
+    listing.add_argument("--sort", choices=["name", "recent", "created", "size"], default="name")
+    listing.add_argument("--tag", help="только проекты с тегом")
+    listing.add_argument("--limit", type=int)
+    listing.add_argument("--all-roots", action="store_true", help="проекты всех корневых папок")
+
+    create = sub.add_parser("create", help="создать проекты")
+    create.add_argument("names", nargs="+")
+    create.add_argument("--template", help="шаблон проекта")
+    create.add_argument("--venv", action="store_true", help="создать .venv")
+
+    delete = sub.add_parser("delete", help="удалить проекты")
+    delete.add_argument("names", nargs="+")
+
+    for command, help_text in (("archive", "отправить проекты в архив"),
+                               ("unarchive", "восстановить проекты из архива")):
+        archive = sub.add_parser(command, help=help_text)
+        archive.add_argument("names", nargs="+")
+        archive.add_argument("--root", help="метка корневой папки")
+
+    move = sub.add_parser("move", help="перенести проекты в другую корневую папку")
+    move.add_argument("names", nargs="+")
+    move.add_argument("--root", help="метка папки, где проекты сейчас")
+    move.add_argument("--to", required=True, help="метка папки назначения")
+
+    migrate = sub.add_parser("migrate", help="сменить корневую папку")
+    migrate.add_argument("path")
+    migrate.add_argument("--no-move", action="store_true", help="не переносить проекты")
+
+    deps = sub.add_parser("deps", help="сторонние зависимости проектов")
+    deps.add_argument("names", nargs="*", help="проекты (по умолчанию все)")
+    deps.add_argument("--root", help="метка корневой папки")
+    deps.add_argument("--package", help="только проекты, которые зависят от пакета")
+    deps.add_argument("--write", action="store_true", help="создать requirements.txt, если его нет")
+
+    importing = sub.add_parser("import", help="найти проекты в дереве папок и импортировать")
+    importing.add_argument("path")
+    importing.add_argument("--move", action="store_true", help="перенести проекты, а не ссылаться на них")
+    importing.add_argument("--dry-run", action="store_true", help="только показать найденные проекты")
+
+    snapshot = sub.add_parser("snapshot", help="инкрементальные снимки проектов")
+    snapshot.add_argument("names", nargs="*", help="проекты для снимка")
+    snapshot.add_argument("--root", help="метка корневой папки")
+    snapshot.add_argument("--list", action="store_true", help="показать снимки")
+    snapshot.add_argument("--restore", type=int, metavar="ID", help="восстановить снимок в корневую папку")
+
+    batch = sub.add_parser("batch", help="операции из файла JSON Lines")
+    batch.add_argument("file", help="путь к файлу или '-' для stdin")
+    return parser
+
+
+def operations_from_args(args):
+    if args.command == "list":
+        return [{"op": "list", "sort": args.sort, "tag": args.tag, "limit": args.limit,
+                 "all_roots": args.all_roots}]
+    if args.command == "create":
+        return [{"op": "create", "name": name, "template": args.template, "venv": args.venv}
+                for name in args.names]
+    if args.command == "delete":
+        return [{"op": "delete", "name": name} for name in args.names]
+    if args.command in ("archive", "unarchive"):
+        return [{"op": args.command, "name": name, "root": args.root} for name in args.names]
+    if args.command == "move":
+        return [{"op": "move", "name": name, "root": args.root, "to": args.to} for name in args.names]
+    if args.command == "deps":
+        return [{"op": "deps", "names": args.names, "root": args.root,
+                 "package": args.package, "write": args.write}]
+    if args.command == "snapshot":
+        if args.restore is not None:
+            return [{"op": "restore_snapshot", "id": args.restore}]
+        if args.list:
+            return [{"op": "snapshots", "name": name, "root": args.root} for name in args.names or [None]]
+        return [{"op": "snapshot", "name": name, "root": args.root} for name in args.names]
+    if args.command == "import":
+        return [{"op": "import", "path": args.path, "move": args.move, "dry_run": args.dry_run}]
+    if args.command == "migrate":
+        return [{"op": "migrate", "path": args.path, "move": not args.no_move}]
+    return read_operations(args.file)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    manager = ProjectManager(args.home)
+    runner = BatchRunner(manager, jobs=max(args.jobs, 1))
+    return 0 if runner.run(operations_from_args(args)) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""
+Архивирование неактивных проектов в холодное хранилище и восстановление
+"""
+import os
+import json
+import stat
+import time
+import heapq
+import shutil
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+ARCHIVE_SUFFIX = ".pyarchive"
+RESTORING_SUFFIX = ".restoring"
+
+# Уже сжатые форматы пишутся без повторного сжатия
+STORED_EXTENSIONS = {
+    ".zip", ".whl", ".egg", ".jar", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp3", ".mp4", ".mkv", ".pdf",
+}
+
+
+# Диапазон дат, которые помещаются в zip
+ZIP_MIN_TIME = time.mktime((1980, 1, 1, 0, 0, 0, 0, 0, -1))
+ZIP_MAX_TIME = time.mktime((2107, 12, 31, 23, 59, 58, 0, 0, -1))
+
+
+class ArchiveCancelled(Exception):
+    pass
+
+
+def is_temporary(name):
+    """Временная папка незавершённого восстановления"""
+    return name.endswith(RESTORING_SUFFIX)
+
+
+def split_shards(files, count):
+    """
+    Раскладка файлов по частям с выравниванием объёма: самый крупный
+    файл уходит в наименее загруженную часть
+    files: [(путь, размер)]
+    """
+    shards = [[] for _ in range(count)]
+    loads = [(0, i) for i in range(count)]
+    for rel, size in sorted(files, key=lambda item: item[1], reverse=True):
+        load, i = heapq.heappop(loads)
+        shards[i].append((rel, size))
+        heapq.heappush(loads, (load + size, i))
+    return [shard for shard in shards if shard]
+
+
+class ProjectArchiver:
+    """
+    Проект пишется в несколько zip-частей параллельно: каждый поток сжимает
+    свою часть (zlib отпускает GIL), а zipfile читает и пишет файлы кусками,
+    поэтому расход памяти не зависит от размера проекта. Сжатие - deflate
+    уровня 1: в разы быстрее уровня по умолчанию при близком размере.
+    В корневой папке вместо проекта остаётся заглушка <имя>.pyarchive
+    со ссылкой на архив.
+    """
+    def __init__(self, archive_dir, workers=4, compresslevel=1):
+        self.archive_dir = str(archive_dir)
+        self.workers = workers
+        self.compresslevel = compresslevel
+
+    @staticmethod
+    def stub_path(root_path, name):
+        return os.path.join(root_path, name + ARCHIVE_SUFFIX)
+
+    def read_stub(self, root_path, name):
+        with open(self.stub_path(root_path, name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def is_archived(self, root_path, name):
+        return (not os.path.exists(os.path.join(root_path, name))
+                and os.path.isfile(self.stub_path(root_path, name)))
+
+    def _run_parallel(self, func, jobs, total, progress, cancelled, text):
+        """Выполнение func(job, on_file) в пуле с общим счётчиком файлов"""
+        done = [0]
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def on_file():
+            with lock:
+                done[0] += 1
+            if stop.is_set() or (cancelled and cancelled()):
+                raise ArchiveCancelled()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = [executor.submit(func, job, on_file) for job in jobs]
+            while pending:
+                finished, pending = wait(pending, timeout=0.2, return_when=FIRST_EXCEPTION)
+                if progress:
+                    progress(done[0], total, text)
+                for future in finished:
+                    if future.exception() is not None:
+                        # Остальные части останавливаются на следующем файле
+                        stop.set()
+                        wait(pending)
+                        raise future.exception()
+
+    def _write_shard(self, src, path, files, on_file, mtimes):
+        """
+        Запись части архива. mtime вне диапазона zip (до 1980 или после 2107)
+        zipfile ограничивает, настоящий запоминается в mtimes для восстановления
+        """
+        with zipfile.ZipFile(path, "w", allowZip64=True, strict_timestamps=False) as zf:
+            for rel, _ in files:
+                full = os.path.join(src, rel)
+                arcname = rel.replace(os.sep, "/")
+                ext = os.path.splitext(rel)[1].lower()
+                compress = zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+                mtime = os.stat(full).st_mtime
+                if not ZIP_MIN_TIME <= mtime < ZIP_MAX_TIME:
+                    mtimes[rel] = mtime
+                try:
+                    zf.write(full, arcname, compress_type=compress, compresslevel=self.compresslevel)
+                except ValueError:
+                    # Метаданные файла, которые zipfile не принял: пишем содержимое
+                    # с собственной записью, чтобы не сорвать архивирование проекта
+                    info = zipfile.ZipInfo(arcname, time.localtime(min(max(mtime, ZIP_MIN_TIME), ZIP_MAX_TIME - 2))[:6])
+                    info.compress_type = compress
+                    info.external_attr = (os.stat(full).st_mode & 0xFFFF) << 16
+                    mtimes[rel] = mtime
+                    with open(full, "rb") as source, zf.open(info, "w", force_zip64=True) as target:
+                        shutil.copyfileobj(source, target, 1024 * 1024)
+                on_file()
+
+    def archive(self, root_path, name, progress=None, cancelled=None):
+        """
+        Упаковка проекта и замена папки заглушкой
+        Returns: содержимое заглушки
+        """
+        src = os.path.join(root_path, name)
+        files, dirs, links = [], [], []
+        for dirpath, dirnames, filenames in os.walk(src):
+            rel_dir = os.path.relpath(dirpath, src)
+            for dirname in dirnames:
+                full = os.path.join(dirpath, dirname)
+                rel = os.path.normpath(os.path.join(rel_dir, dirname))
+                if os.path.islink(full):
+                    links.append({"path": rel, "target": os.readlink(full), "dir": True})
+                else:
+                    dirs.append(rel)
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                rel = os.path.normpath(os.path.join(rel_dir, filename))
+                if os.path.islink(full):
+                    links.append({"path": rel, "target": os.readlink(full), "dir": False})
+                else:
+                    files.append((rel, os.path.getsize(full)))
+
+        target = os.path.join(self.archive_dir, f"{name}.{time.time_ns()}")
+        tmp_dir = target + ".tmp"
+        os.makedirs(tmp_dir)
+        shards = split_shards(files, max(1, min(self.workers, len(files))))
+        parts = [f"part-{i:02d}.zip" for i in range(len(shards))]
+        mtimes = {}
+        try:
+            self._run_parallel(
+                lambda job, on_file: self._write_shard(src, os.path.join(tmp_dir, job[0]), job[1], on_file, mtimes),
+                list(zip(parts, shards)), len(files), progress, cancelled, f"Архивирование {name}"
+            )
+            manifest = {
+                "name": name,
+                "files": len(files),
+                "bytes": sum(size for _, size in files),
+                "parts": parts,
+                "dirs": dirs,
+                "links": links,
+                "mtimes": mtimes,
+            }
+            with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(tmp_dir, target)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        stub = {
+            "archive": target,
+            "archived_at": time.time(),
+            "files": manifest["files"],
+            "bytes": manifest["bytes"],
+            "archive_bytes": sum(os.path.getsize(os.path.join(target, part)) for part in parts),
+        }
+        stub_file = self.stub_path(root_path, name)
+        with open(stub_file + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(stub, f, ensure_ascii=False)
+        os.replace(stub_file + ".tmp", stub_file)
+        shutil.rmtree(src)
+        return stub
+
+    @staticmethod
+    def _extract_shard(path, target, on_file):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                extracted = zf.extract(info, target)
+                mode = info.external_attr >> 16
+                if mode:
+                    os.chmod(extracted, stat.S_IMODE(mode))
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                os.utime(extracted, (mtime, mtime))
+                on_file()
+
+    def restore(self, root_path, name, progress=None, cancelled=None):
+        """Распаковка проекта на место заглушки. Returns: путь к проекту"""
+        project_path = os.path.join(root_path, name)
+        if os.path.exists(project_path):
+            raise FileExistsError(project_path)
+        stub = self.read_stub(root_path, name)
+        archive = stub["archive"]
+        with open(os.path.join(archive, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        tmp_dir = project_path + RESTORING_SUFFIX
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            for rel in manifest["dirs"]:
+                os.makedirs(os.path.join(tmp_dir, rel), exist_ok=True)
+            self._run_parallel(
+                lambda part, on_file: self._extract_shard(os.path.join(archive, part), tmp_dir, on_file),
+                manifest["parts"], manifest["files"], progress, cancelled, f"Восстановление {name}"
+            )
+            for item in manifest["links"]:
+                os.symlink(item["target"], os.path.join(tmp_dir, item["path"]),
+                           target_is_directory=item["dir"])
+            # Время, которое не поместилось в zip
+            for rel, mtime in manifest.get("mtimes", {}).items():
+                os.utime(os.path.join(tmp_dir, rel), (mtime, mtime))
+            os.rename(tmp_dir, project_path)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        os.remove(self.stub_path(root_path, name))
+        shutil.rmtree(archive, ignore_errors=True)
+        return project_path
+
+    def discard(self, root_path, name):
+        """Удаление архива и заглушки"""
+        try:
+            archive = self.read_stub(root_path, name)["archive"]
+            shutil.rmtree(archive, ignore_errors=True)
+        except (OSError, ValueError, KeyError):
+            pass
+        os.remove(self.stub_path(root_path, name))
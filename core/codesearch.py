@@ -0,0 +1,349 @@
+"""
+Полнотекстовый поиск по исходникам всех проектов (инвертированный индекс в SQLite)
+"""
+import os
+import re
+import array
+import sqlite3
+import threading
+from fnmatch import fnmatch
+from concurrent.futures import ProcessPoolExecutor
+from core.sizes import DEFAULT_IGNORE
+from core.store import _Transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    path TEXT NOT NULL,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    tokens BLOB,
+    UNIQUE (project, path)
+);
+CREATE TABLE IF NOT EXISTS tokens (
+    id INTEGER PRIMARY KEY,
+    token TEXT NOT NULL UNIQUE,
+    files BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+SOURCE_EXTENSIONS = {
+    ".py", ".pyi", ".pyx", ".ipynb", ".txt", ".md", ".rst", ".toml", ".cfg", ".ini",
+    ".json", ".yaml", ".yml", ".js", ".ts", ".html", ".css", ".sql", ".sh", ".bat", ".ps1",
+}
+MAX_FILE_SIZE = 2 * 1024 * 1024
+TOKEN_RE = re.compile(r"\w+")
+
+# Меньше этого числа изменённых файлов пул процессов не окупает запуск
+POOL_THRESHOLD = 200
+BATCH_SIZE = 2000
+
+
+def read_text(path):
+    """Текст файла или None для двоичных файлов"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if b"\0" in data[:8192]:
+        return None
+    return data.decode("utf-8", "replace")
+
+
+def file_tokens(path):
+    """Уникальные слова файла в нижнем регистре (выполняется в процессах пула)"""
+    try:
+        text = read_text(path)
+    except OSError:
+        return []
+    if text is None:
+        return []
+    return sorted({token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1})
+
+
+class CodeIndex:
+    """
+    Индекс слов исходников: слово -> файлы. Файл переиндексируется,
+    только если изменились его mtime или размер. Запрос разбивается на
+    слова; слова внутри запроса ищутся точно, крайние - как окончание
+    или начало слова. Найденные файлы проверяются построчно, поэтому
+    результат точный, а индекс лишь сужает круг файлов.
+    """
+    def __init__(self, db_file, ignore=None, workers=None):
+        self.db_file = str(db_file)
+        self.ignore = list(DEFAULT_IGNORE if ignore is None else ignore)
+        self.workers = workers
+        self._local = threading.local()
+        self._update_lock = threading.Lock()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA cache_size=-65536")
+            self._local.db = db
+        return db
+
+    def is_ignored(self, name):
+        return any(fnmatch(name, pattern) for pattern in self.ignore)
+
+    def source_files(self, root_path, project):
+        """Исходники проекта: {относительный путь: (mtime, size)}"""
+        result = {}
+        base = os.path.join(root_path, project)
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames[:] = [d for d in dirnames if not self.is_ignored(d)]
+            for filename in filenames:
+                if os.path.splitext(filename)[1].lower() not in SOURCE_EXTENSIONS:
+                    continue
+                full = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                if st.st_size <= MAX_FILE_SIZE:
+                    result[os.path.relpath(full, base)] = (st.st_mtime_ns, st.st_size)
+        return result
+
+    def update(self, root_path, projects, progress=None, cancelled=None):
+        """
+        Инкрементальное обновление индекса корневой папки
+        Returns: (переиндексировано файлов, удалено файлов)
+        """
+        with self._update_lock:
+            db = self.connection()
+            if self._meta("root_path") != root_path:
+                # Другая корневая папка - индекс строится заново
+                with _Transaction(db):
+                    db.execute("DELETE FROM files")
+                    db.execute("DELETE FROM tokens")
+                    self._set_meta("root_path", root_path)
+
+            known = {}
+            for file_id, project, path, mtime, size in db.execute(
+                    "SELECT id, project, path, mtime, size FROM files"):
+                known[(project, path)] = (file_id, mtime, size)
+
+            changed = []
+            seen = set()
+            for i, project in enumerate(projects):
+                if cancelled and cancelled():
+                    return 0, 0
+                if progress and i % 50 == 0:
+                    progress(i, len(projects), f"Поиск изменений: {project}")
+                for path, (mtime, size) in self.source_files(root_path, project).items():
+                    key = (project, path)
+                    seen.add(key)
+                    old = known.get(key)
+                    if old is None or old[1] != mtime or old[2] != size:
+                        changed.append((project, path, mtime, size))
+
+            removed = [file_id for key, (file_id, _, _) in known.items() if key not in seen]
+            for start in range(0, len(removed), BATCH_SIZE):
+                batch = removed[start:start + BATCH_SIZE]
+                with _Transaction(db):
+                    removes = {}
+                    for file_id in batch:
+                        for token_id in self._file_token_ids(file_id):
+                            removes.setdefault(token_id, set()).add(file_id)
+                    self._apply_postings({}, removes)
+                    db.executemany("DELETE FROM files WHERE id = ?", [(file_id,) for file_id in batch])
+
+            indexed = self._index_files(root_path, changed, known, progress, cancelled)
+            return indexed, len(removed)
+
+    def _index_files(self, root_path, changed, known, progress, cancelled):
+        if not changed:
+            return 0
+        db = self.connection()
+        vocabulary = dict(db.execute("SELECT token, id FROM tokens"))
+        next_token_id = max(vocabulary.values(), default=0) + 1
+        paths = [os.path.join(root_path, project, path) for project, path, _, _ in changed]
+
+        executor = None
+        if len(changed) >= POOL_THRESHOLD:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+            results = executor.map(file_tokens, paths, chunksize=32)
+        else:
+            results = map(file_tokens, paths)
+
+        done = 0
+        try:
+            batch = []
+            for item, tokens in zip(changed, results):
+                batch.append((item, tokens))
+                if len(batch) >= BATCH_SIZE:
+                    next_token_id = self._write_batch(batch, known, vocabulary, next_token_id)
+                    done += len(batch)
+                    batch = []
+                    if progress:
+                        progress(done, len(changed), "Индексирование файлов")
+                    if cancelled and cancelled():
+                        return done
+            next_token_id = self._write_batch(batch, known, vocabulary, next_token_id)
+            done += len(batch)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        if progress:
+            progress(done, len(changed), "Индексирование файлов")
+        return done
+
+    def _file_token_ids(self, file_id):
+        row = self.connection().execute("SELECT tokens FROM files WHERE id = ?", (file_id,)).fetchone()
+        token_ids = array.array("I")
+        if row and row[0]:
+            token_ids.frombytes(row[0])
+        return token_ids
+
+    def _apply_postings(self, adds, removes):
+        """
+        Обновление списков файлов у слов: по одной записи на слово,
+        а не на каждую пару слово-файл
+        """
+        db = self.connection()
+        updates = []
+        for token_id in set(adds) | set(removes):
+            row = db.execute("SELECT files FROM tokens WHERE id = ?", (token_id,)).fetchone()
+            files = array.array("I")
+            files.frombytes(row[0])
+            drop = removes.get(token_id)
+            if drop:
+                files = array.array("I", (file_id for file_id in files if file_id not in drop))
+            files.extend(adds.get(token_id, ()))
+            updates.append((files.tobytes(), token_id))
+        db.executemany("UPDATE tokens SET files = ? WHERE id = ?", updates)
+
+    def _write_batch(self, batch, known, vocabulary, next_token_id):
+        """Запись пачки файлов одной транзакцией. Returns: следующий свободный id слова"""
+        if not batch:
+            return next_token_id
+        db = self.connection()
+        adds, removes = {}, {}
+        with _Transaction(db):
+            new_tokens = []
+            for (project, path, mtime, size), tokens in batch:
+                token_ids = array.array("I")
+                for token in tokens:
+                    token_id = vocabulary.get(token)
+                    if token_id is None:
+                        token_id = vocabulary[token] = next_token_id
+                        next_token_id += 1
+                        new_tokens.append((token_id, token, b""))
+                    token_ids.append(token_id)
+                old = known.get((project, path))
+                if old is not None:
+                    file_id = old[0]
+                    for token_id in self._file_token_ids(file_id):
+                        removes.setdefault(token_id, set()).add(file_id)
+                    db.execute("UPDATE files SET mtime = ?, size = ?, tokens = ? WHERE id = ?",
+                               (mtime, size, token_ids.tobytes(), file_id))
+                else:
+                    file_id = db.execute(
+                        "INSERT INTO files (project, path, mtime, size, tokens) VALUES (?, ?, ?, ?, ?)",
+                        (project, path, mtime, size, token_ids.tobytes())
+                    ).lastrowid
+                for token_id in token_ids:
+                    adds.setdefault(token_id, []).append(file_id)
+            db.executemany("INSERT INTO tokens (id, token, files) VALUES (?, ?, ?)", new_tokens)
+            self._apply_postings(adds, removes)
+        return next_token_id
+
+    def _meta(self, key):
+        row = self.connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.connection().execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, value)
+        )
+
+    def _token_files(self, token, left_bounded, right_bounded):
+        """Файлы со словом, подходящим под часть запроса"""
+        if left_bounded and right_bounded:
+            condition, param = "token = ?", token
+        elif left_bounded:
+            # Начало слова: диапазон по индексу tokens.token
+            condition, param = "token >= ? AND token < ? || char(1114111)", token
+        elif right_bounded:
+            condition, param = "substr(token, -length(?)) = ?", token
+        else:
+            condition, param = "instr(token, ?) > 0", token
+        params = [param] * condition.count("?")
+        result = set()
+        for (blob,) in self.connection().execute(f"SELECT files FROM tokens WHERE {condition}", params):
+            files = array.array("I")
+            files.frombytes(blob)
+            result.update(files)
+        return result
+
+    def candidates(self, query):
+        """Файлы, которые могут содержать запрос, или None, если сузить нельзя"""
+        lower = query.lower()
+        parts = [(m.group(), m.start() > 0, m.end() < len(lower))
+                 for m in TOKEN_RE.finditer(lower) if len(m.group()) > 1]
+        if not parts:
+            return None
+        # Сначала самые избирательные части: целые слова, затем длинные
+        parts.sort(key=lambda part: (not (part[1] and part[2]), -len(part[0])))
+        result = None
+        for token, left, right in parts:
+            files = self._token_files(token, left, right)
+            result = files if result is None else result & files
+            if not result:
+                break
+        return result
+
+    def search(self, root_path, query, limit=200, cancelled=None):
+        """
+        Поиск подстроки без учёта регистра
+        Returns: [{project, path, line, text}]
+        """
+        if not query.strip():
+            return []
+        db = self.connection()
+        candidates = self.candidates(query)
+        if candidates is None:
+            rows = db.execute("SELECT project, path FROM files ORDER BY project, path").fetchall()
+        else:
+            rows = []
+            ids = sorted(candidates)
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows += db.execute(
+                    f"SELECT project, path FROM files WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+            rows.sort()
+
+        needle = query.lower()
+        results = []
+        for project, path in rows:
+            if cancelled and cancelled():
+                break
+            try:
+                text = read_text(os.path.join(root_path, project, path))
+            except OSError:
+                continue
+            if text is None or needle not in text.lower():
+                continue
+            for number, line in enumerate(text.splitlines(), 1):
+                if needle in line.lower():
+                    results.append({"project": project, "path": path, "line": number, "text": line.strip()[:300]})
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def stats(self):
+        """Число файлов и слов в индексе"""
+        db = self.connection()
+        files = db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        tokens = db.execute("SELECT COUNT(*) FROM tokens").fetchone()[0]
+        return {"files": files, "tokens": tokens}
+
@@ -0,0 +1,358 @@
+"""
+Поиск одинаковых файлов во всех проектах и замена копий ссылками
+"""
+import os
+import stat
+import errno
+import shutil
+import hashlib
+import sqlite3
+import threading
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from core.store import _Transaction
+from core.importer import is_link
+from core.templates import HARDLINK_SAFE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    dev INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    partial TEXT,
+    full TEXT,
+    PRIMARY KEY (dev, inode)
+);
+"""
+
+# Файлы меньше этого размера не стоят отдельной ссылки
+MIN_SIZE = 4096
+# Частичный хэш - начало и конец файла
+PARTIAL_BYTES = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+# Как часто сохраняются посчитанные хэши (для продолжения после прерывания)
+SAVE_EVERY = 500
+
+TEMP_SUFFIX = ".dedup-tmp"
+SKIP_DIRS = {".trash"}
+
+HARDLINK = "hardlink"
+REFLINK = "reflink"
+
+# ioctl FICLONE (Linux: Btrfs, XFS)
+FICLONE = 0x40049409
+
+
+class DedupCancelled(Exception):
+    pass
+
+
+def partial_hash(path, size):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(PARTIAL_BYTES))
+        if size > PARTIAL_BYTES * 2:
+            f.seek(-PARTIAL_BYTES, os.SEEK_END)
+            h.update(f.read(PARTIAL_BYTES))
+    return h.hexdigest()
+
+
+def full_hash(path, size):
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def reflink(src, dst):
+    """Копия с общими блоками на диске (copy-on-write); OSError, если ФС не умеет"""
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "reflink не поддерживается", dst)
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.remove(dst)
+            raise
+
+
+class FileInfo:
+    __slots__ = ("path", "dev", "inode", "mtime", "size", "mode", "links")
+
+    def __init__(self, path, st):
+        self.path = path
+        self.dev = st.st_dev
+        self.inode = st.st_ino
+        self.mtime = st.st_mtime_ns
+        self.size = st.st_size
+        self.mode = stat.S_IMODE(st.st_mode)
+        self.links = st.st_nlink
+
+
+class DedupReport:
+    """Группы одинаковых файлов и объём, который освободится"""
+    def __init__(self, groups, scanned):
+        self.groups = groups
+        self.scanned = scanned
+
+    @property
+    def duplicates(self):
+        return sum(len(self._copies(group)) for group in self.groups)
+
+    @property
+    def reclaimable(self):
+        return sum(group[0].size * len(self._copies(group)) for group in self.groups)
+
+    @staticmethod
+    def _copies(group):
+        """Файлы группы, кроме первого, которые ещё не ссылаются на него"""
+        keep = group[0]
+        return [item for item in group[1:] if (item.dev, item.inode) != (keep.dev, keep.inode)]
+
+    def as_dict(self):
+        return {
+            "scanned": self.scanned,
+            "groups": len(self.groups),
+            "duplicates": self.duplicates,
+            "reclaimable": self.reclaimable,
+        }
+
+
+class Deduplicator:
+    """
+    Одинаковые файлы ищутся в три шага, и каждый следующий, более дорогой,
+    выполняется только для оставшихся кандидатов: размер, хэш начала и
+    конца файла, хэш всего файла. Хэши считаются в пуле потоков (hashlib
+    отпускает GIL) и кэшируются по устройству и inode вместе с mtime:
+    повторный проход читает только изменённые файлы, а прерванный
+    продолжается с уже посчитанного. Копии заменяются жёсткой ссылкой или
+    reflink через временный файл и os.replace, поэтому прерывание не
+    оставляет проект без файла. Жёсткая ссылка делает копии одним файлом,
+    поэтому в этом режиме участвуют только файлы, которые не правят на
+    месте (HARDLINK_SAFE); проекты-ссылки не обходятся совсем.
+    """
+    def __init__(self, cache_file, workers=4):
+        self.cache_file = str(cache_file)
+        self.workers = workers
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.cache_file, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def collect(self, root_path, cancelled=None, patterns=None):
+        """
+        Обычные файлы корневой папки не меньше MIN_SIZE;
+        patterns - только файлы, путь которых подходит под один из шаблонов
+        """
+        files = []
+        for dirpath, dirnames, filenames in os.walk(root_path):
+            if cancelled and cancelled():
+                raise DedupCancelled()
+            if dirpath == root_path:
+                dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            # Ссылки и junction ведут за пределы корневой папки
+            dirnames[:] = [d for d in dirnames if not is_link(os.path.join(dirpath, d))]
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                if filename.endswith(TEMP_SUFFIX):
+                    # Остаток прерванной замены
+                    try:
+                        os.remove(full)
+                    except OSError:
+                        pass
+                    continue
+                if patterns is not None:
+                    rel = "/" + os.path.relpath(full, root_path).replace(os.sep, "/")
+                    if not any(fnmatch(rel, pattern) for pattern in patterns):
+                        continue
+                try:
+                    st = os.lstat(full)
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode) and st.st_size >= MIN_SIZE:
+                    files.append(FileInfo(full, st))
+        return files
+
+    def _cached(self, files):
+        db = self.connection()
+        cache = {}
+        for dev, inode, mtime, size, partial, full in db.execute(
+                "SELECT dev, inode, mtime, size, partial, full FROM hashes"):
+            cache[(dev, inode)] = (mtime, size, partial, full)
+        result = {}
+        for item in files:
+            row = cache.get((item.dev, item.inode))
+            if row is not None and row[0] == item.mtime and row[1] == item.size:
+                result[(item.dev, item.inode)] = (row[2], row[3])
+        return result
+
+    def _save(self, rows):
+        if not rows:
+            return
+        db = self.connection()
+        with _Transaction(db):
+            db.executemany(
+                "INSERT INTO hashes (dev, inode, mtime, size, partial, full) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (dev, inode) DO UPDATE SET mtime = excluded.mtime, size = excluded.size, "
+                "partial = excluded.partial, full = COALESCE(excluded.full, "
+                "CASE WHEN hashes.mtime = excluded.mtime THEN hashes.full END)",
+                rows
+            )
+
+    def _hash_step(self, items, kind, known, progress, cancelled, text):
+        """
+        Хэш kind (0 - частичный, 1 - полный) для items с кэшем known
+        Returns: {(dev, inode): хэш}
+        """
+        result, todo = {}, []
+        for item in items:
+            key = (item.dev, item.inode)
+            cached = known.get(key)
+            if cached is not None and cached[kind] is not None:
+                result[key] = cached[kind]
+            elif key not in result:
+                result[key] = None
+                todo.append(item)
+
+        func = partial_hash if kind == 0 else full_hash
+        rows = []
+
+        def work(item):
+            if cancelled and cancelled():
+                raise DedupCancelled()
+            try:
+                return item, func(item.path, item.size)
+            except OSError:
+                return item, None
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                for done, (item, digest) in enumerate(executor.map(work, todo), 1):
+                    key = (item.dev, item.inode)
+                    result[key] = digest
+                    if digest is not None:
+                        partial, full = known.get(key, (None, None))
+                        if kind == 0:
+                            partial = digest
+                        else:
+                            full = digest
+                        known[key] = (partial, full)
+                        rows.append((item.dev, item.inode, item.mtime, item.size, partial, full))
+                    if len(rows) >= SAVE_EVERY:
+                        self._save(rows)
+                        rows = []
+                    if progress and done % 100 == 0:
+                        progress(done, len(todo), text)
+            finally:
+                self._save(rows)
+        return result
+
+    def scan(self, root_path, mode=HARDLINK, progress=None, cancelled=None):
+        """
+        Поиск групп одинаковых файлов без изменений на диске
+        Returns: DedupReport
+        """
+        with self._lock:
+            if progress:
+                progress(0, 0, "Поиск файлов")
+            files = self.collect(root_path, cancelled, HARDLINK_SAFE if mode == HARDLINK else None)
+
+            # Шаг 1: размер. Ссылка возможна только в пределах одного диска,
+            # а у жёсткой ссылки права общие - поэтому они тоже в ключе
+            groups = {}
+            for item in files:
+                key = (item.dev, item.size, item.mode if mode == HARDLINK else 0)
+                groups.setdefault(key, []).append(item)
+            candidates = [group for group in groups.values()
+                          if len({(item.dev, item.inode) for item in group}) > 1]
+
+            known = self._cached([item for group in candidates for item in group])
+
+            # Шаг 2: начало и конец файла
+            items = [item for group in candidates for item in group]
+            partial = self._hash_step(items, 0, known, progress, cancelled, "Сравнение начала файлов")
+            narrowed = []
+            for group in candidates:
+                by_partial = {}
+                for item in group:
+                    digest = partial.get((item.dev, item.inode))
+                    if digest is not None:
+                        by_partial.setdefault(digest, []).append(item)
+                narrowed += [sub for sub in by_partial.values()
+                             if len({(item.dev, item.inode) for item in sub}) > 1]
+
+            # Шаг 3: весь файл
+            items = [item for group in narrowed for item in group]
+            full = self._hash_step(items, 1, known, progress, cancelled, "Сравнение файлов целиком")
+            result = []
+            for group in narrowed:
+                by_full = {}
+                for item in group:
+                    digest = full.get((item.dev, item.inode))
+                    if digest is not None:
+                        by_full.setdefault(digest, []).append(item)
+                for same in by_full.values():
+                    if len({(item.dev, item.inode) for item in same}) > 1:
+                        # Оставляется файл, на который уже больше всего ссылок
+                        same.sort(key=lambda item: (-item.links, item.path))
+                        result.append(same)
+            result.sort(key=lambda group: group[0].size * len(group), reverse=True)
+            return DedupReport(result, len(files))
+
+    @staticmethod
+    def _replace(keep, item, mode):
+        """Замена файла ссылкой на keep через временный файл"""
+        for current in (keep, item):
+            st = os.lstat(current.path)
+            if st.st_mtime_ns != current.mtime or st.st_size != current.size:
+                # Файл изменился после сравнения
+                return False
+        tmp = item.path + TEMP_SUFFIX
+        if mode == REFLINK:
+            reflink(keep.path, tmp)
+            # У reflink-копии свои права и время - как у заменяемого файла
+            shutil.copystat(item.path, tmp)
+        else:
+            os.link(keep.path, tmp)
+        try:
+            os.replace(tmp, item.path)
+        except OSError:
+            os.remove(tmp)
+            raise
+        return True
+
+    def apply(self, report, mode=HARDLINK, progress=None, cancelled=None):
+        """
+        Замена копий ссылками. Повторный запуск пропускает уже заменённые
+        Returns: (заменено файлов, освобождено байт, ошибки)
+        """
+        total = report.duplicates
+        replaced, freed, errors = 0, 0, []
+        with self._lock:
+            for group in report.groups:
+                keep = group[0]
+                for item in DedupReport._copies(group):
+                    if cancelled and cancelled():
+                        return replaced, freed, errors
+                    try:
+                        if self._replace(keep, item, mode):
+                            replaced += 1
+                            freed += item.size
+                    except OSError as e:
+                        errors.append(f"{item.path}: {e.strerror or e}")
+                    if progress and (replaced + len(errors)) % 50 == 0:
+                        progress(replaced + len(errors), total, "Замена копий ссылками")
+        return replaced, freed, errors
@@ -0,0 +1,336 @@
+"""
+Анализ зависимостей проектов: сторонние импорты по разбору исходников (ast)
+"""
+import os
+import sys
+import ast
+import json
+import hashlib
+import sqlite3
+import threading
+from fnmatch import fnmatch
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from core.sizes import DEFAULT_IGNORE
+from core.store import _Transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS imports (
+    hash TEXT PRIMARY KEY,
+    modules TEXT NOT NULL
+);
+"""
+
+# Меньше этого числа изменённых файлов пул процессов не окупает запуск
+POOL_THRESHOLD = 200
+# Входит в хэш содержимого: при смене формата разбора старый кэш не используется
+PARSER_VERSION = b"imports-2"
+
+# Имена модулей, которые не совпадают с названием пакета на PyPI
+PACKAGE_NAMES = {
+    "attr": "attrs",
+    "bs4": "beautifulsoup4",
+    "cv2": "opencv-python",
+    "dateutil": "python-dateutil",
+    "docx": "python-docx",
+    "dotenv": "python-dotenv",
+    "fitz": "PyMuPDF",
+    "google.protobuf": "protobuf",
+    "google.oauth2": "google-auth",
+    "jose": "python-jose",
+    "jwt": "PyJWT",
+    "magic": "python-magic",
+    "MySQLdb": "mysqlclient",
+    "OpenSSL": "pyOpenSSL",
+    "PIL": "Pillow",
+    "pptx": "python-pptx",
+    "psycopg2": "psycopg2-binary",
+    "serial": "pyserial",
+    "skimage": "scikit-image",
+    "sklearn": "scikit-learn",
+    "telegram": "python-telegram-bot",
+    "usb": "pyusb",
+    "win32api": "pywin32",
+    "win32con": "pywin32",
+    "win32gui": "pywin32",
+    "yaml": "PyYAML",
+    "Crypto": "pycryptodome",
+}
+
+STDLIB_MODULES = set(getattr(sys, "stdlib_module_names", ())) | set(sys.builtin_module_names) | {"__future__"}
+
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16, person=PARSER_VERSION).hexdigest()
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return content_hash(f.read())
+
+
+def module_key(name):
+    """
+    Имя модуля, по которому определяется пакет: корневое, а у пространства
+    имён google - вместе с подпакетом (google.auth, google.cloud.storage)
+    """
+    parts = name.split(".")
+    if parts[0] != "google" or len(parts) == 1:
+        return parts[0]
+    if parts[1] == "cloud" and len(parts) > 2:
+        return ".".join(parts[:3])
+    return ".".join(parts[:2])
+
+
+def file_imports(path):
+    """
+    Импортированные модули (выполняется в процессах пула)
+    Returns: (хэш содержимого, [модули]); относительные импорты пропускаются
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = content_hash(data)
+    try:
+        tree = ast.parse(data, path)
+    except (SyntaxError, ValueError):
+        return digest, []
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.update(module_key(alias.name) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules.add(module_key(node.module))
+    return digest, sorted(modules)
+
+
+def _safe_file_imports(path):
+    try:
+        return file_imports(path)
+    except OSError:
+        return None
+
+
+def _safe_file_hash(path):
+    try:
+        return file_hash(path)
+    except OSError:
+        return None
+
+
+def package_name(module):
+    """Название пакета для requirements.txt по имени модуля"""
+    if module in PACKAGE_NAMES:
+        return PACKAGE_NAMES[module]
+    if module.startswith("google."):
+        # google.cloud.storage -> google-cloud-storage, google.api_core -> google-api-core
+        return module.replace(".", "-").replace("_", "-")
+    return module
+
+
+class DependencyAnalyzer:
+    """
+    Импорты каждого файла кэшируются по хэшу содержимого, а хэш - по
+    mtime и размеру файла: при повторном анализе неизменённые файлы
+    даже не читаются, а заново разбираются только правленые. Файлы
+    с одинаковым содержимым разбираются один раз.
+    """
+    def __init__(self, cache_file, ignore=None, workers=None):
+        self.cache_file = str(cache_file)
+        self.ignore = list(DEFAULT_IGNORE if ignore is None else ignore)
+        self.workers = workers
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.cache_file, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def is_ignored(self, name):
+        return any(fnmatch(name, pattern) for pattern in self.ignore)
+
+    def source_files(self, project_path):
+        """
+        Исходники проекта и имена его собственных модулей
+        Returns: ({путь: (mtime, size)}, {локальные имена})
+        """
+        files, local = {}, set()
+        for dirpath, dirnames, filenames in os.walk(project_path):
+            dirnames[:] = [d for d in dirnames if not self.is_ignored(d)]
+            has_sources = False
+            for filename in filenames:
+                if not filename.endswith(".py"):
+                    continue
+                full = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                files[full] = (st.st_mtime_ns, st.st_size)
+                local.add(filename[:-3])
+                has_sources = True
+            if has_sources and dirpath != project_path:
+                local.add(os.path.basename(dirpath))
+        return files, local
+
+    def analyze(self, root_path, projects, progress=None, cancelled=None):
+        """
+        Сторонние импорты проектов
+        Returns: {проект: {модуль: [файлы относительно проекта]}}
+        """
+        with self._lock:
+            db = self.connection()
+            sources, locals_ = {}, {}
+            for i, project in enumerate(projects):
+                if cancelled and cancelled():
+                    return {}
+                if progress and i % 50 == 0:
+                    progress(i, len(projects), f"Поиск исходников: {project}")
+                sources[project], locals_[project] = self.source_files(os.path.join(root_path, project))
+
+            known = {path: (mtime, size, digest)
+                     for path, mtime, size, digest in db.execute("SELECT path, mtime, size, hash FROM files")}
+            hashes, changed = {}, []
+            for files in sources.values():
+                for path, (mtime, size) in files.items():
+                    old = known.get(path)
+                    if old is not None and old[0] == mtime and old[1] == size:
+                        hashes[path] = old[2]
+                    else:
+                        changed.append((path, mtime, size))
+
+            parsed = self._parse(changed, hashes, progress, cancelled)
+            if parsed is None:
+                return {}
+            self._drop_missing(root_path, sources, known)
+
+            wanted = set(hashes.values())
+            cached = {}
+            for digest, modules in db.execute("SELECT hash, modules FROM imports"):
+                if digest in wanted:
+                    cached[digest] = json.loads(modules)
+            cached.update(parsed)
+
+        result = {}
+        for project, files in sources.items():
+            base = os.path.join(root_path, project)
+            found = {}
+            for path in files:
+                for module in cached.get(hashes.get(path), ()):
+                    if module in STDLIB_MODULES or module.split(".", 1)[0] in locals_[project]:
+                        continue
+                    found.setdefault(module, []).append(os.path.relpath(path, base))
+            result[project] = {module: sorted(paths) for module, paths in sorted(found.items())}
+        return result
+
+    def _parse(self, changed, hashes, progress, cancelled):
+        """
+        Хэширование изменённых файлов и разбор только нового содержимого:
+        импорты уже известного хэша берутся из кэша, из одинаковых файлов
+        разбирается один. Записывает результат в кэш
+        Returns: {хэш: [модули]} разобранных файлов или None при отмене
+        """
+        if not changed:
+            return {}
+        if progress:
+            progress(0, len(changed), "Сравнение исходников")
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            digests = list(executor.map(_safe_file_hash, [path for path, _, _ in changed]))
+        if cancelled and cancelled():
+            return None
+
+        db = self.connection()
+        rows = {}
+        for (path, mtime, size), digest in zip(changed, digests):
+            if digest is not None:
+                hashes[path] = digest
+                rows[path] = (path, mtime, size, digest)
+        new = set(hashes[path] for path in rows)
+        new.difference_update(digest for (digest,) in db.execute("SELECT hash FROM imports"))
+        # По одному файлу на каждое ещё не разобранное содержимое
+        todo = {}
+        for path, row in rows.items():
+            if row[3] in new:
+                todo.setdefault(row[3], path)
+
+        paths = list(todo.values())
+        executor = None
+        if len(paths) >= POOL_THRESHOLD:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+            results = executor.map(_safe_file_imports, paths, chunksize=32)
+        else:
+            results = map(_safe_file_imports, paths)
+
+        parsed = {}
+        try:
+            for done, (expected, item) in enumerate(zip(todo, results), 1):
+                if item is None:
+                    continue
+                digest, modules = item
+                parsed[digest] = modules
+                if digest != expected:
+                    # Файл изменился между хэшированием и разбором
+                    hashes[todo[expected]] = digest
+                if done % 200 == 0:
+                    if progress:
+                        progress(done, len(paths), "Разбор исходников")
+                    if cancelled and cancelled():
+                        return None
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        # Файлы, чьё содержимое не удалось разобрать, в кэш не пишутся -
+        # при следующем анализе они будут прочитаны заново
+        missing = new.difference(parsed)
+        rows = [row for row in rows.values() if row[3] not in missing]
+
+        with _Transaction(db):
+            db.executemany(
+                "INSERT INTO files (path, mtime, size, hash) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET mtime = excluded.mtime, "
+                "size = excluded.size, hash = excluded.hash", rows
+            )
+            db.executemany(
+                "INSERT OR REPLACE INTO imports (hash, modules) VALUES (?, ?)",
+                [(digest, json.dumps(modules)) for digest, modules in parsed.items()]
+            )
+        return parsed
+
+    def _drop_missing(self, root_path, sources, known):
+        """Удаление из кэша файлов проверенных проектов, которых больше нет"""
+        prefixes = tuple(os.path.join(root_path, project, "") for project in sources)
+        present = set()
+        for files in sources.values():
+            present.update(files)
+        gone = [(path,) for path in known if path not in present and path.startswith(prefixes)]
+        if not gone:
+            return
+        db = self.connection()
+        with _Transaction(db):
+            db.executemany("DELETE FROM files WHERE path = ?", gone)
+            db.execute("DELETE FROM imports WHERE hash NOT IN (SELECT hash FROM files)")
+
+
+def dependents(report):
+    """Обратная сводка по корневой папке: {пакет: [проекты]}"""
+    result = {}
+    for project, modules in report.items():
+        for module in modules:
+            result.setdefault(package_name(module), []).append(project)
+    return {package: sorted(projects) for package, projects in sorted(result.items(), key=lambda i: i[0].lower())}
+
+
+def requirements_text(modules):
+    """Содержимое requirements.txt по списку модулей"""
+    packages = sorted({package_name(module) for module in modules}, key=str.lower)
+    return "".join(f"{package}\n" for package in packages)
@@ -0,0 +1,164 @@
+"""
+Быстрое создание виртуальных окружений из локального кэша колёс
+"""
+import os
+import sys
+import shutil
+import hashlib
+import threading
+import subprocess
+from core.templates import LinkCopier
+
+
+def find_python(python_path=""):
+    """Интерпретатор для создания окружений (в собранном exe sys.executable - это сам exe)"""
+    if python_path:
+        return python_path
+    if not getattr(sys, 'frozen', False):
+        return sys.executable
+    return shutil.which("python") or shutil.which("py") or "python"
+
+
+def run(args, cancelled=None):
+    """Запуск команды без окна консоли. Returns: (код возврата, вывод)"""
+    kwargs = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+    process = subprocess.Popen(
+        args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, encoding="utf-8", errors="replace", **kwargs
+    )
+    while True:
+        try:
+            output, _ = process.communicate(timeout=0.5)
+            return process.returncode, output
+        except subprocess.TimeoutExpired:
+            if cancelled and cancelled():
+                process.kill()
+                process.communicate()
+                return -1, "Отменено"
+
+
+class EnvProvisioner:
+    """
+    Окружение проекта = `python -m venv --without-pip` (десятки мс)
+    + содержимое site-packages из готовой «затравки».
+    Затравка - site-packages с нужным набором пакетов, собранная один раз
+    из локального кэша колёс (pip install --target --no-index), поэтому
+    повторные создания ничего не скачивают и не распаковывают и работают
+    без сети. Файлы затравки раздаются через reflink или жёсткие ссылки.
+    Консольные скрипты пакетов не переносятся: pip и прочие модули
+    запускаются как `python -m <модуль>`.
+    """
+    def __init__(self, app_folder, python_path=""):
+        self.envs_dir = os.path.join(app_folder, "envs")
+        self.wheels_dir = os.path.join(self.envs_dir, "wheels")
+        self.seeds_dir = os.path.join(self.envs_dir, "seeds")
+        self.python_path = python_path
+        self.copier = LinkCopier()
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._versions = {}
+
+    @property
+    def python(self):
+        return find_python(self.python_path)
+
+    def python_version(self):
+        """
+        Версия и платформа целевого интерпретатора (не того, в котором
+        работает приложение). Спрашивается один раз, пока файл не изменился
+        """
+        python = self.python
+        try:
+            mtime = os.stat(shutil.which(python) or python).st_mtime_ns
+        except OSError:
+            mtime = None
+        version = self._versions.get((python, mtime))
+        if version is None:
+            code, output = run([python, "-c", "import sys, sysconfig; print(sys.version, sysconfig.get_platform())"])
+            if code != 0:
+                raise RuntimeError(output.strip() or f"Не удалось запустить {python}")
+            version = self._versions[(python, mtime)] = output.strip()
+        return version
+
+    def seed_key(self, packages):
+        key = "|".join([self.python, self.python_version()] + sorted(packages))
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+    def _lock_for(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def ensure_seed(self, packages, progress=None, cancelled=None):
+        """Путь к затравке для набора пакетов (собирается при первом обращении)"""
+        key = self.seed_key(packages)
+        seed_dir = os.path.join(self.seeds_dir, key)
+        with self._lock_for(key):
+            if os.path.isdir(seed_dir):
+                return seed_dir
+            os.makedirs(self.wheels_dir, exist_ok=True)
+            tmp_dir = seed_dir + ".tmp"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not packages:
+                os.makedirs(tmp_dir)
+                os.replace(tmp_dir, seed_dir)
+                return seed_dir
+
+            install = [self.python, "-m", "pip", "install", "--quiet", "--disable-pip-version-check",
+                       "--no-index", "--find-links", self.wheels_dir, "--target", tmp_dir] + list(packages)
+            if progress:
+                progress(0, 3, "Установка из кэша колёс")
+            code, output = run(install, cancelled)
+            if code != 0:
+                # В кэше не хватает колёс - докачиваем один раз
+                if progress:
+                    progress(1, 3, "Загрузка колёс в кэш")
+                code, output = run([self.python, "-m", "pip", "wheel", "--quiet",
+                                    "--disable-pip-version-check",
+                                    "--wheel-dir", self.wheels_dir] + list(packages), cancelled)
+                if code != 0:
+                    raise RuntimeError(output.strip() or "Не удалось загрузить пакеты")
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                code, output = run(install, cancelled)
+                if code != 0:
+                    raise RuntimeError(output.strip() or "Не удалось установить пакеты")
+            # Скрипты с абсолютными путями в затравке не нужны
+            for scripts in ("bin", "Scripts"):
+                shutil.rmtree(os.path.join(tmp_dir, scripts), ignore_errors=True)
+            os.replace(tmp_dir, seed_dir)
+            return seed_dir
+
+    @staticmethod
+    def site_packages(venv_dir):
+        if sys.platform == "win32":
+            return os.path.join(venv_dir, "Lib", "site-packages")
+        lib_dir = os.path.join(venv_dir, "lib")
+        for name in os.listdir(lib_dir):
+            if name.startswith("python"):
+                return os.path.join(lib_dir, name, "site-packages")
+        raise FileNotFoundError(f"site-packages не найден в {venv_dir}")
+
+    def provision(self, project_path, packages, progress=None, cancelled=None):
+        """Создание .venv в папке проекта. Returns: путь к окружению"""
+        seed_dir = self.ensure_seed(packages, progress, cancelled)
+        if progress:
+            progress(2, 3, "Создание окружения")
+
+        venv_dir = os.path.join(project_path, ".venv")
+        code, output = run([self.python, "-m", "venv", "--without-pip", venv_dir], cancelled)
+        if code != 0:
+            raise RuntimeError(output.strip() or "Не удалось создать окружение")
+
+        target = self.site_packages(venv_dir)
+        for dirpath, dirnames, filenames in os.walk(seed_dir):
+            rel_dir = os.path.relpath(dirpath, seed_dir)
+            target_dir = os.path.normpath(os.path.join(target, rel_dir))
+            os.makedirs(target_dir, exist_ok=True)
+            for filename in filenames:
+                rel = os.path.join("site-packages", rel_dir, filename)
+                self.copier.copy(os.path.join(dirpath, filename),
+                                 os.path.join(target_dir, filename), rel)
+        if progress:
+            progress(3, 3, "Готово")
+        return venv_dir
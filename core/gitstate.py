@@ -0,0 +1,261 @@
+"""
+Состояние git-репозиториев проектов: ветка, незакоммиченные изменения, неотправленные коммиты
+"""
+import os
+import sys
+import json
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+GIT_TIMEOUT = 20
+
+
+def git(path, *args):
+    """
+    Локальная команда git без окна консоли и без блокировок индекса
+    Returns: stdout или None, если git нет или команда не удалась
+    """
+    kwargs = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+    try:
+        result = subprocess.run(
+            ["git", "--no-optional-locks", "-C", path, *args],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL,
+            timeout=GIT_TIMEOUT, **kwargs
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.decode("utf-8", "replace")
+
+
+def find_git_dir(project_path):
+    """Папка .git проекта (в том числе по ссылке «gitdir:» у worktree) или None"""
+    dot_git = os.path.join(project_path, ".git")
+    if os.path.isdir(dot_git):
+        return dot_git
+    try:
+        with open(dot_git, "r", encoding="utf-8") as f:
+            line = f.readline().strip()
+    except OSError:
+        return None
+    if not line.startswith("gitdir:"):
+        return None
+    git_dir = line[len("gitdir:"):].strip()
+    return os.path.normpath(os.path.join(project_path, git_dir))
+
+
+def common_dir(git_dir):
+    """Общая часть репозитория (refs, config) для worktree"""
+    try:
+        with open(os.path.join(git_dir, "commondir"), "r", encoding="utf-8") as f:
+            return os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        return git_dir
+
+
+def _read(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def read_ref(common, ref):
+    """sha ссылки из отдельного файла или packed-refs"""
+    loose = _read(os.path.join(common, *ref.split("/")))
+    if loose:
+        return loose.strip()
+    packed = _read(os.path.join(common, "packed-refs")) or ""
+    for line in packed.splitlines():
+        if line.endswith(" " + ref) and not line.startswith(("#", "^")):
+            return line.split(" ", 1)[0]
+    return None
+
+
+def upstream_ref(common, branch):
+    """Ссылка на отслеживаемую ветку из config: refs/remotes/<remote>/<ветка>"""
+    config = _read(os.path.join(common, "config")) or ""
+    section, remote, merge = None, None, None
+    for line in config.splitlines():
+        line = line.strip()
+        if line.startswith("["):
+            section = line
+            continue
+        if section != f'[branch "{branch}"]':
+            continue
+        key, _, value = line.partition("=")
+        key, value = key.strip(), value.strip()
+        if key == "remote":
+            remote = value
+        elif key == "merge":
+            merge = value
+    if not remote or not merge or remote == ".":
+        return None
+    return f"refs/remotes/{remote}/{merge[len('refs/heads/'):] if merge.startswith('refs/heads/') else merge}"
+
+
+class GitStateCollector:
+    """
+    Ветка и ссылки читаются прямо из .git (HEAD, refs, packed-refs,
+    config), git запускается только там, где без него нельзя: проверка
+    рабочей копии (status) и подсчёт коммитов, если ветка разошлась
+    с отслеживаемой. Запуски идут в ограниченном пуле потоков.
+    Результат кэшируется с ключом из mtime HEAD, index, config и файлов
+    ссылок, поэтому при обновлении заново опрашиваются только
+    изменившиеся репозитории. Правка файла без git add ключ не меняет -
+    для проверки перед удалением есть полный опрос (full=True).
+    """
+    def __init__(self, cache_file, workers=8):
+        self.cache_file = cache_file
+        self.workers = workers
+        self.cache = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def save(self):
+        tmp_file = str(self.cache_file) + ".tmp"
+        try:
+            with self._lock:
+                data = json.dumps(self.cache, ensure_ascii=False)
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_file, self.cache_file)
+        except OSError:
+            pass
+
+    def state(self, project_path, full=False):
+        """
+        Состояние репозитория проекта
+        Returns: None (не репозиторий) или {branch, detached, dirty, changes,
+        ahead, upstream}; dirty и ahead - None, если узнать не удалось
+        """
+        git_dir = find_git_dir(project_path)
+        if git_dir is None:
+            with self._lock:
+                self.cache.pop(project_path, None)
+            return None
+        common = common_dir(git_dir)
+
+        head = (_read(os.path.join(git_dir, "HEAD")) or "").strip()
+        detached = not head.startswith("ref:")
+        ref = None if detached else head[len("ref:"):].strip()
+        branch = head[:8] if detached else ref.rsplit("refs/heads/", 1)[-1]
+        upstream = None if detached else upstream_ref(common, branch)
+
+        key = [
+            _mtime(os.path.join(git_dir, "HEAD")),
+            _mtime(os.path.join(git_dir, "index")),
+            _mtime(os.path.join(common, "config")),
+            _mtime(os.path.join(common, "packed-refs")),
+            _mtime(os.path.join(common, *ref.split("/"))) if ref else 0,
+            _mtime(os.path.join(common, *upstream.split("/"))) if upstream else 0,
+        ]
+        cached = self.cache.get(project_path)
+        if not full and cached and cached["key"] == key:
+            return cached["state"]
+
+        result = {"branch": branch, "detached": detached, "upstream": upstream,
+                  "dirty": None, "changes": None, "ahead": None}
+
+        status = git(project_path, "status", "--porcelain", "-z", "--untracked-files=normal")
+        if status is not None:
+            entries = [entry for entry in status.split("\0") if entry]
+            result["changes"] = len(entries)
+            result["dirty"] = bool(entries)
+
+        local = read_ref(common, ref) if ref else head
+        remote = read_ref(common, upstream) if upstream else None
+        if local and remote:
+            if local == remote:
+                result["ahead"] = 0
+            else:
+                count = git(project_path, "rev-list", "--count", f"{remote}..{local}")
+                if count is not None and count.strip().isdigit():
+                    result["ahead"] = int(count.strip())
+        elif local and upstream is None and not detached:
+            # Ветка никуда не отправлялась: все её коммиты - неотправленные
+            count = git(project_path, "rev-list", "--count", local, "--not", "--remotes")
+            if count is not None and count.strip().isdigit():
+                result["ahead"] = int(count.strip())
+
+        with self._lock:
+            self.cache[project_path] = {"key": key, "state": result}
+        return result
+
+    def collect(self, root_path, names, on_result=None, full=False, cancelled=None, prune=True):
+        """
+        Параллельный опрос проектов root_path.
+        on_result(name, state) вызывается по мере готовности.
+        prune=False - names лишь часть проектов корня, кэш остальных не трогается.
+        Returns: {name: state}
+        """
+        results = {}
+
+        def work(name):
+            if cancelled and cancelled():
+                return None
+            return self.state(os.path.join(root_path, name), full)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(work, name): name for name in names}
+            for future in as_completed(futures):
+                name = futures[future]
+                state = future.result()
+                results[name] = state
+                if on_result and state is not None:
+                    on_result(name, state)
+
+        if prune and not (cancelled and cancelled()):
+            # Выбрасываем из кэша удалённые проекты этого корня
+            prefix = os.path.join(root_path, "")
+            keep = {os.path.join(root_path, name) for name in names}
+            with self._lock:
+                for path in [p for p in self.cache if p.startswith(prefix) and p not in keep]:
+                    del self.cache[path]
+        self.save()
+        return results
+
+
+def describe(state):
+    """Короткая подпись для таблицы и меню"""
+    if state is None:
+        return ""
+    parts = [state["branch"]]
+    if state["dirty"]:
+        parts.append(f"изменений: {state['changes']}")
+    if state["ahead"]:
+        parts.append(f"↑{state['ahead']}")
+    return " · ".join(parts)
+
+
+def unsaved_work(state):
+    """Предупреждение о несохранённой работе или None"""
+    if state is None:
+        return None
+    notes = []
+    if state["dirty"]:
+        notes.append(f"незакоммиченных изменений: {state['changes']}")
+    if state["ahead"]:
+        notes.append(f"неотправленных коммитов: {state['ahead']}")
+    elif state["ahead"] is None and state["dirty"] is None:
+        notes.append("состояние репозитория не удалось проверить")
+    return ", ".join(notes) if notes else None
@@ -0,0 +1,207 @@
+"""
+Поиск существующих Python-проектов в дереве папок и импорт в корневую папку
+"""
+import os
+import sys
+import stat
+import time
+import errno
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Файлы, по которым папка считается Python-проектом
+MARKERS = ("pyproject.toml", "setup.py", "setup.cfg", "requirements.txt", "app.py")
+# Папки, внутри которых проектов не ищем (кроме настраиваемых size_ignore)
+PRUNE = {".git", ".hg", ".svn", ".venv", "venv", "env", "node_modules", "__pycache__",
+         ".tox", ".nox", ".mypy_cache", ".pytest_cache", "site-packages", "build", "dist"}
+
+LINK = "link"
+MOVE = "move"
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+def link_dir(src, dst):
+    """Ссылка на папку: на Windows - junction (не требует прав администратора)"""
+    if sys.platform == "win32":
+        import _winapi
+        _winapi.CreateJunction(src, dst)
+    else:
+        os.symlink(src, dst, target_is_directory=True)
+
+
+def is_link(path):
+    """Символическая ссылка или junction (os.path.islink junction не видит)"""
+    if os.path.islink(path):
+        return True
+    if sys.platform != "win32":
+        return False
+    try:
+        return os.lstat(path).st_reparse_tag == stat.IO_REPARSE_TAG_MOUNT_POINT
+    except OSError:
+        return False
+
+
+def is_link_entry(entry):
+    """is_link для os.DirEntry: на Windows данные уже получены обходом"""
+    if entry.is_symlink():
+        return True
+    if sys.platform != "win32":
+        return False
+    try:
+        return entry.stat(follow_symlinks=False).st_reparse_tag == stat.IO_REPARSE_TAG_MOUNT_POINT
+    except OSError:
+        return False
+
+
+def remove_link(path):
+    """Удаление самой ссылки или junction, папка назначения не затрагивается"""
+    try:
+        os.unlink(path)
+    except (IsADirectoryError, PermissionError):
+        # junction на старых версиях Python удаляется как пустая папка
+        os.rmdir(path)
+
+
+def move_dir(src, dst):
+    """Перенос папки: на том же томе - переименование, иначе копирование"""
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+
+class ProjectDetector:
+    """
+    Обход дерева в несколько потоков через os.scandir. Папки берутся из
+    общего стека (обход в глубину держит в памяти только границу обхода,
+    а не всё дерево), найденный проект отдаётся через on_found сразу и
+    внутрь него обход не спускается. Символические ссылки, окружения
+    (pyvenv.cfg) и служебные папки пропускаются.
+    """
+    def __init__(self, ignore=(), workers=8):
+        self.prune = PRUNE | set(ignore)
+        self.workers = workers
+
+    def scan_dir(self, path):
+        """Returns: (маркеры проекта, вложенные папки)"""
+        markers, subdirs = [], []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.prune:
+                                subdirs.append(entry.path)
+                        elif entry.name in MARKERS:
+                            markers.append(entry.name)
+                        elif entry.name == "pyvenv.cfg":
+                            # Виртуальное окружение, а не проект
+                            return [], []
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return markers, subdirs
+
+    def detect(self, tree, on_found, skip=(), progress=None, cancelled=None):
+        """
+        Поиск проектов в tree; skip - папки, которые обходить не нужно
+        (корневая папка менеджера, корзина, архив).
+        on_found(path, markers) вызывается из рабочих потоков.
+        Returns: (просмотрено папок, найдено проектов)
+        """
+        skip = {os.path.normcase(os.path.abspath(path)) for path in skip}
+        stack = [os.path.abspath(tree)]
+        cond = threading.Condition()
+        state = {"active": 0, "scanned": 0, "found": 0, "reported": 0.0}
+
+        def worker():
+            while True:
+                with cond:
+                    while not stack and state["active"]:
+                        cond.wait()
+                    if not stack or (cancelled and cancelled()):
+                        stack.clear()
+                        cond.notify_all()
+                        return
+                    path = stack.pop()
+                    state["active"] += 1
+                markers, subdirs = [], []
+                try:
+                    markers, subdirs = self.scan_dir(path)
+                    if markers:
+                        on_found(path, markers)
+                finally:
+                    with cond:
+                        if markers:
+                            state["found"] += 1
+                        else:
+                            stack.extend(sub for sub in subdirs
+                                         if os.path.normcase(sub) not in skip)
+                        state["active"] -= 1
+                        state["scanned"] += 1
+                        now = time.monotonic()
+                        if progress and now - state["reported"] >= 0.2:
+                            state["reported"] = now
+                            progress(state["scanned"], 0,
+                                     f"Просмотрено папок: {state['scanned']}, найдено проектов: {state['found']}")
+                        cond.notify_all()
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if cancelled and cancelled():
+            raise ImportCancelled()
+        return state["scanned"], state["found"]
+
+
+def unique_name(root_path, name, taken):
+    """Свободное имя в корневой папке: name, name-2, name-3..."""
+    candidate, n = name, 1
+    while candidate in taken or os.path.lexists(os.path.join(root_path, candidate)):
+        n += 1
+        candidate = f"{name}-{n}"
+    taken.add(candidate)
+    return candidate
+
+
+def import_projects(paths, root_path, mode=LINK, on_result=None, workers=4, cancelled=None):
+    """
+    Ссылки на проекты (LINK) или их перенос (MOVE) в root_path в пуле потоков.
+    on_result(src, name, error) - по мере готовности; после отмены
+    оставшиеся проекты пропускаются.
+    Returns: [(src, name, error)]
+    """
+    taken = set()
+    # Имена выбираются заранее, чтобы параллельные операции не столкнулись
+    plan = [(src, unique_name(root_path, os.path.basename(os.path.normpath(src)), taken)) for src in paths]
+    action = link_dir if mode == LINK else move_dir
+    results = []
+
+    def work(src, name):
+        if cancelled and cancelled():
+            return None
+        try:
+            action(src, os.path.join(root_path, name))
+            return src, name, None
+        except OSError as e:
+            return src, name, e.strerror or str(e)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(work, src, name) for src, name in plan]
+        for future in as_completed(futures):
+            result = future.result()
+            if result is None:
+                continue
+            results.append(result)
+            if on_result:
+                on_result(*result)
+    return results
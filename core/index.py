@@ -0,0 +1,196 @@
+"""
+Индекс проектов - кэш содержимого корневой папки
+"""
+import os
+import json
+import threading
+from core.trash import TRASH_DIR_NAME
+from core.archive import ARCHIVE_SUFFIX, is_temporary
+from core.importer import is_link, is_link_entry
+
+
+class ProjectIndex:
+    """
+    Хранит имена, mtime и тип проектов корневой папки.
+    Пока mtime корневой папки не изменился, список отдаётся из индекса
+    за один stat; при изменении корень пересканируется одним os.scandir.
+    """
+    def __init__(self, index_file, root_path):
+        self.index_file = index_file
+        self.root_path = root_path
+        self.root_mtime = None
+        self.entries = {}
+        self._names = None
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        """Загрузка индекса с диска"""
+        if not self.index_file.exists():
+            return
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("root_path") == self.root_path:
+                self.root_mtime = data.get("root_mtime")
+                self.entries = data.get("entries", {})
+                self._names = None
+        except Exception:
+            self.root_mtime = None
+            self.entries = {}
+
+    def save(self):
+        """Атомарная запись индекса на диск"""
+        tmp_file = self.index_file.with_suffix(".tmp")
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({
+                    "root_path": self.root_path,
+                    "root_mtime": self.root_mtime,
+                    "entries": self.entries
+                }, f, ensure_ascii=False)
+            os.replace(tmp_file, self.index_file)
+        except OSError:
+            pass
+
+    def set_root(self, root_path):
+        """Сменить корневую папку (индекс строится заново)"""
+        with self._lock:
+            self.root_path = root_path
+            self.root_mtime = None
+            self.entries = {}
+            self._names = None
+
+    @staticmethod
+    def entry_kind(entry):
+        """Тип элемента корневой папки (dir | link | archive) или None, если это не проект"""
+        if entry.name == TRASH_DIR_NAME or is_temporary(entry.name):
+            return None
+        try:
+            if not entry.is_dir():
+                # Заглушка проекта, отправленного в архив
+                if entry.name.endswith(ARCHIVE_SUFFIX) and entry.is_file():
+                    return "archive"
+                return None
+            return "link" if is_link_entry(entry) else "dir"
+        except OSError:
+            return None
+
+    @staticmethod
+    def entry_name(name, kind):
+        return name[:-len(ARCHIVE_SUFFIX)] if kind == "archive" else name
+
+    def validate(self):
+        """Проверка актуальности индекса по mtime корневой папки"""
+        try:
+            mtime = os.stat(self.root_path).st_mtime_ns
+        except OSError:
+            self.root_mtime = None
+            self.entries = {}
+            self._names = None
+            return
+        if mtime != self.root_mtime:
+            self.rescan(mtime)
+
+    def rescan(self, root_mtime=None):
+        """Полное пересканирование корневой папки одним проходом os.scandir"""
+        if root_mtime is None:
+            root_mtime = os.stat(self.root_path).st_mtime_ns
+        entries = {}
+        with os.scandir(self.root_path) as it:
+            for entry in it:
+                kind = self.entry_kind(entry)
+                if kind is None:
+                    continue
+                name = self.entry_name(entry.name, kind)
+                if kind == "archive" and entries.get(name, {}).get("kind") not in (None, "archive"):
+                    # Папка важнее заглушки с тем же именем
+                    continue
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    mtime, ino = st.st_mtime_ns, st.st_ino or entry.inode()
+                except OSError:
+                    mtime, ino = None, None
+                entries[name] = {"mtime": mtime, "kind": kind, "ino": ino}
+        self.entries = entries
+        self.root_mtime = root_mtime
+        self._names = None
+        self.save()
+
+    def names(self):
+        """Отсортированный список проектов"""
+        with self._lock:
+            self.validate()
+            if self._names is None:
+                self._names = sorted(self.entries)
+            return list(self._names)
+
+    def archived(self):
+        """Проекты, отправленные в архив (без проверки актуальности и без блокировки)"""
+        entries = dict(self.entries)
+        return {name for name, entry in entries.items() if entry.get("kind") == "archive"}
+
+    def snapshot(self):
+        """Текущее состояние индекса: {имя: inode}"""
+        os.makedirs(self.root_path, exist_ok=True)
+        with self._lock:
+            self.validate()
+            return {name: entry.get("ino") for name, entry in self.entries.items()}
+
+    def before_change(self):
+        """mtime корня перед собственным изменением - передаётся потом в add/remove"""
+        try:
+            return os.stat(self.root_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _touch_root(self, before):
+        """
+        Запомнить новый mtime корня после собственного изменения. Если до
+        изменения индекс уже отставал от папки (её менял кто-то ещё), новый
+        mtime не принимается и следующий вызов пересканирует папку
+        """
+        if before is None or before != self.root_mtime:
+            self.root_mtime = None
+        else:
+            try:
+                self.root_mtime = os.stat(self.root_path).st_mtime_ns
+            except OSError:
+                self.root_mtime = None
+        self._names = None
+        self.save()
+
+    def add(self, name, before=None):
+        """
+        Добавить или обновить проект в индексе без пересканирования;
+        before - значение before_change() до изменения папки.
+        Returns: before для следующего изменения той же операции
+        """
+        if self.root_mtime is None:
+            return None
+        path = os.path.join(self.root_path, name)
+        try:
+            st = os.lstat(path)
+            entry = {"mtime": st.st_mtime_ns, "kind": "link" if is_link(path) else "dir", "ino": st.st_ino}
+        except OSError:
+            try:
+                st = os.lstat(path + ARCHIVE_SUFFIX)
+                entry = {"mtime": st.st_mtime_ns, "kind": "archive", "ino": st.st_ino}
+            except OSError:
+                entry = None
+        with self._lock:
+            if entry is None:
+                self.entries.pop(name, None)
+            else:
+                self.entries[name] = entry
+            self._touch_root(before)
+            return self.root_mtime
+
+    def remove(self, name, before=None):
+        """Удалить проект из индекса без пересканирования. Returns: как у add"""
+        if self.root_mtime is None:
+            return None
+        with self._lock:
+            self.entries.pop(name, None)
+            self._touch_root(before)
+            return self.root_mtime
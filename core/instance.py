@@ -0,0 +1,89 @@
+"""
+Сервер команд единственного экземпляра приложения (QLocalServer)
+"""
+import json
+from PyQt6.QtCore import QObject
+from PyQt6.QtNetwork import QAbstractSocket, QLocalServer, QLocalSocket
+
+
+class InstanceServer(QObject):
+    """
+    Принимает операции от повторных запусков app.py. Каждая строка
+    передаётся в handler(op, reply); reply(result) можно вызвать позже,
+    когда фоновая операция завершится. Ответ на закрытое соединение
+    просто отбрасывается. Соединения обрабатываются только в цикле
+    событий, поэтому handler можно задать уже после listen().
+    """
+    def __init__(self, address, handler=None, parent=None):
+        super().__init__(parent)
+        self.address = address
+        self.handler = handler
+        self.server = QLocalServer(self)
+        # Сокет доступен только текущему пользователю
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self.on_new_connection)
+        self._buffers = {}
+
+    def listen(self):
+        """
+        Запуск сервера. Returns: False, если по адресу уже отвечает другой
+        экземпляр. Сокет, оставшийся от упавшего процесса, удаляется
+        """
+        probe = QLocalSocket()
+        probe.connectToServer(self.address)
+        if probe.waitForConnected(200):
+            probe.disconnectFromServer()
+            return False
+        if self.server.listen(self.address):
+            return True
+        if self.server.serverError() != QAbstractSocket.SocketError.AddressInUseError:
+            return False
+        # Никто не ответил - сокет остался от завершившегося процесса
+        QLocalServer.removeServer(self.address)
+        return self.server.listen(self.address)
+
+    def close(self):
+        self.server.close()
+
+    def on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._buffers[socket] = b""
+            socket.readyRead.connect(self.on_ready_read)
+            socket.disconnected.connect(self.on_disconnected)
+
+    def on_disconnected(self):
+        socket = self.sender()
+        self._buffers.pop(socket, None)
+        socket.deleteLater()
+
+    def on_ready_read(self):
+        socket = self.sender()
+        data = self._buffers.get(socket, b"") + bytes(socket.readAll())
+        *lines, rest = data.split(b"\n")
+        self._buffers[socket] = rest
+        for line in lines:
+            if line.strip():
+                self.dispatch(socket, line)
+
+    def dispatch(self, socket, line):
+        try:
+            op = json.loads(line)
+        except ValueError as e:
+            self.write(socket, {"ok": False, "message": f"Неверная команда: {e}"})
+            return
+        op_id = op.pop("id", None)
+
+        def reply(result):
+            self.write(socket, dict(result, id=op_id))
+
+        try:
+            self.handler(op, reply)
+        except Exception as e:
+            reply({"op": op.get("op"), "ok": False, "message": str(e)})
+
+    def write(self, socket, result):
+        if socket not in self._buffers or socket.state() != QLocalSocket.LocalSocketState.ConnectedState:
+            return
+        socket.write(json.dumps(result, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+        socket.flush()
@@ -0,0 +1,107 @@
+"""
+Канал команд к уже запущенному экземпляру приложения (без PyQt6)
+
+Протокол - JSON Lines в обе стороны: клиент отправляет операции
+({"id": 1, "op": "create", "name": "proj1"}), сервер отвечает на каждую
+строкой с тем же id. Операции - те же, что у cli.py batch, плюс
+"show" (быстрое открытие) и "open" (открыть папку проекта).
+"""
+import os
+import sys
+import json
+import time
+import socket
+import hashlib
+import getpass
+import tempfile
+
+# Ожидание ответа на одну операцию (create/delete могут занять время)
+REPLY_TIMEOUT = 120
+
+
+def server_name(app_folder):
+    """Имя локального сервера: своё для каждого пользователя и папки приложения"""
+    key = f"{getpass.getuser()}:{os.path.normcase(os.path.abspath(str(app_folder)))}"
+    return "PythonProjectMngr-" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def server_address(app_folder):
+    """
+    Адрес для QLocalServer.listen и клиента: на Windows - имя именованного
+    канала, в остальных системах - полный путь к Unix-сокету
+    """
+    name = server_name(app_folder)
+    if sys.platform == "win32":
+        return name
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, name + ".sock")
+
+
+class _Connection:
+    """Соединение с сервером как файл строк"""
+    def __init__(self, address, timeout):
+        if sys.platform == "win32":
+            pipe = r"\\.\pipe" + "\\" + address
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    self.stream = open(pipe, "r+b", buffering=0)
+                    break
+                except FileNotFoundError:
+                    raise
+                except OSError:
+                    # Канал занят другим клиентом
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.01)
+            self.sock = None
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            try:
+                self.sock.connect(address)
+            except OSError:
+                self.sock.close()
+                raise
+            self.sock.settimeout(REPLY_TIMEOUT)
+            self.stream = self.sock.makefile("rwb", buffering=0)
+
+    def write(self, data):
+        self.stream.write(data)
+
+    def readline(self):
+        return self.stream.readline()
+
+    def close(self):
+        self.stream.close()
+        if self.sock is not None:
+            self.sock.close()
+
+
+def send(app_folder, operations, timeout=0.5):
+    """
+    Отправка операций запущенному экземпляру
+    Returns: список ответов в порядке операций или None, если экземпляр
+    не запущен
+    """
+    try:
+        connection = _Connection(server_address(app_folder), timeout)
+    except OSError:
+        # Сокета нет или он остался от завершившегося процесса
+        return None
+    try:
+        operations = [dict(op, id=i) for i, op in enumerate(operations)]
+        connection.write(b"".join(
+            json.dumps(op, ensure_ascii=False).encode("utf-8") + b"\n" for op in operations
+        ))
+        replies = {}
+        while len(replies) < len(operations):
+            line = connection.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            replies[reply.pop("id", len(replies))] = reply
+    finally:
+        connection.close()
+    return [replies.get(op["id"], {"op": op.get("op"), "ok": False, "message": "Нет ответа"})
+            for op in operations]
@@ -3,18 +3,111 @@
 """
 import os
 import json
+import time
 import shutil
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from core.index import ProjectIndex
+from core.trash import Trash, TRASH_DIR_NAME
+from core.migration import Migration
+from core.sizes import SizeScanner, DEFAULT_IGNORE
+from core.templates import TemplateStore
+from core.envs import EnvProvisioner
+from core.store import ProjectStore, PROJECT_FIELDS
+from core.search import FuzzyIndex, RecentProjects
+from core.workspace import Workspace, PRIMARY_ROOT
+from core.archive import ProjectArchiver, ArchiveCancelled, ARCHIVE_SUFFIX
+from core.importer import is_link, remove_link
+from core.sizes import format_size
+from core.paths import default_app_folder
+from core import trace
+from core.trace import traced
+
+
+DEFAULT_SETTINGS = {
+    "open_after_create": True,
+    "use_trash": True,
+    "trash_retention_days": 7,
+    "size_ignore": DEFAULT_IGNORE,
+    "default_template": "empty",
+    "create_venv": False,
+    "venv_packages": ["pip"],
+    "python_path": "",
+    "tracing_enabled": False,
+    "roots": {},
+    "archive_path": "",
+    "dedup_mode": "hardlink",
+    "safety_snapshots": True,
+    "snapshot_interval_hours": 0,
+    "snapshot_keep": 5,
+    "snapshot_rate_mb": 20,
+}
 
 
 class ProjectManager:
-    def __init__(self):
-        user = os.getlogin()
-        self.app_folder = Path(f"C:/Users/{user}/PythonProjectMngr")
+    # Сколько проектов обрабатывается одновременно в пакетных операциях
+    BATCH_WORKERS = 4
+
+    def __init__(self, app_folder=None):
+        self.app_folder = Path(app_folder) if app_folder else default_app_folder()
         self.app_folder.mkdir(parents=True, exist_ok=True)
 
         self.config_file = self.app_folder / "settings.mngr"
+        self.index_file = self.app_folder / "projects.idx"
+        self.migration_journal = self.app_folder / "migration.journal"
+        self.store = ProjectStore(self.app_folder / "projects.db")
         self.load_config()
+        self.index = ProjectIndex(self.index_file, self.root_path)
+        self.trash = Trash(self.root_path)
+        self.sizes = SizeScanner(self.app_folder / "sizes.cache", self.size_ignore)
+        self.templates = TemplateStore(self.app_folder)
+        self.envs = EnvProvisioner(self.app_folder, self.python_path)
+        self.archiver = ProjectArchiver(self.archive_path or self.app_folder / "Archive")
+        # Поиск по коду, зависимости, дубликаты и состояние git нужны не сразу - их базы
+        # и модули загружаются при первом обращении, а не при запуске
+        self._services = {}
+        self._services_lock = threading.Lock()
+        self.workspace = Workspace(self.app_folder / "roots")
+        self.update_workspace()
+        self._search_index = None
+        self._recent = None
+
+    def _service(self, name, factory):
+        with self._services_lock:
+            service = self._services.get(name)
+            if service is None:
+                service = self._services[name] = factory()
+            return service
+
+    @property
+    def code_index(self):
+        from core.codesearch import CodeIndex
+        return self._service("code_index", lambda: CodeIndex(self.app_folder / "codesearch.db", self.size_ignore))
+
+    @property
+    def deps(self):
+        from core.deps import DependencyAnalyzer
+        return self._service("deps", lambda: DependencyAnalyzer(self.app_folder / "deps.db", self.size_ignore))
+
+    @property
+    def dedup(self):
+        from core.dedup import Deduplicator
+        return self._service("dedup", lambda: Deduplicator(self.app_folder / "dedup.db"))
+
+    @property
+    def git_states(self):
+        from core.gitstate import GitStateCollector
+        return self._service("git_states", lambda: GitStateCollector(self.app_folder / "gitstate.cache"))
+
+    @property
+    def snapshots(self):
+        from core.snapshots import SnapshotStore
+        store = self._service("snapshots", lambda: SnapshotStore(self.app_folder / "Snapshots"))
+        # .git не пропускается: в нём могут быть неотправленные коммиты
+        store.ignore = [name for name in self.size_ignore if name != ".git"]
+        store.rate = self.snapshot_rate_mb * 1024 * 1024
+        return store
 
     def get_default_root(self):
         default = self.app_folder / "Projects"
@@ -23,35 +116,110 @@ class ProjectManager:
 
     def load_config(self):
         default_root = self.get_default_root()
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, "r", encoding="utf-8") as f:
-                    config = json.load(f)
-                    self.root_path = config.get("root_path", default_root)
-                    self.open_after_create = config.get("open_after_create", True)
-            except:
-                self.root_path = default_root
-                self.open_after_create = True
-                self.save_config()
-        else:
-            self.root_path = default_root
-            self.open_after_create = True
+        config = self.store.load_settings()
+        first_run = not config
+        if first_run:
+            # Однократный перенос настроек из старого settings.mngr
+            config = self.load_legacy_config()
+
+        self.root_path = config.get("root_path", default_root)
+        for key, value in DEFAULT_SETTINGS.items():
+            setattr(self, key, config.get(key, value))
+        trace.tracer.enabled = self.tracing_enabled
+
+        if first_run:
             self.save_config()
 
+    def load_legacy_config(self):
+        """Настройки из JSON-файла settings.mngr предыдущих версий"""
+        if not self.config_file.exists():
+            return {}
+        try:
+            with open(self.config_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except:
+            return {}
+
+    @traced("manager.save_config")
     def save_config(self):
-        with open(self.config_file, "w", encoding="utf-8") as f:
-            json.dump({
-                "root_path": self.root_path,
-                "open_after_create": self.open_after_create
-            }, f, ensure_ascii=False, indent=4)
+        """Атомарное сохранение настроек"""
+        config = {"root_path": self.root_path}
+        for key in DEFAULT_SETTINGS:
+            config[key] = getattr(self, key)
+        self.store.save_settings(config)
+
+    def root_paths(self):
+        """Все корневые папки: {метка: путь}, основная первой"""
+        return {PRIMARY_ROOT: self.root_path, **self.roots}
+
+    def update_workspace(self):
+        self.workspace.set_roots(self.root_paths(), {PRIMARY_ROOT: self.index})
+
+    def resolve_root(self, root=None):
+        """
+        Путь, индекс и корзина папки по метке (None - основная)
+        Returns: (path, index, trash) или None
+        """
+        if root in (None, PRIMARY_ROOT):
+            return self.root_path, self.index, self.trash
+        state = self.workspace.state(root)
+        if state is None:
+            return None
+        return state.path, state.index, state.trash
+
+    def add_root(self, name, path):
+        """Добавление именованной корневой папки"""
+        name = (name or "").strip()
+        if not name:
+            return False, "Введите название папки!"
+        if name == PRIMARY_ROOT or name in self.roots:
+            return False, f"Папка с названием '{name}' уже есть!"
+        if not path or not os.path.isdir(path):
+            return False, "Папка не найдена!"
+        normalized = os.path.normcase(os.path.normpath(path))
+        if any(os.path.normcase(os.path.normpath(p)) == normalized for p in self.root_paths().values()):
+            return False, "Эта папка уже добавлена!"
+        self.roots = {**self.roots, name: path}
+        self.update_workspace()
+        self.save_config()
+        return True, f"Папка '{name}' добавлена"
+
+    def remove_root(self, name):
+        """Удаление дополнительной корневой папки из списка (файлы не трогаются)"""
+        if name not in self.roots:
+            return False, "Папка не найдена!"
+        self.roots = {key: value for key, value in self.roots.items() if key != name}
+        self.update_workspace()
+        self.save_config()
+        return True, f"Папка '{name}' убрана из списка"
+
+    @traced("manager.get_workspace")
+    def get_workspace(self, timeout=None):
+        """
+        Проекты всех корневых папок: [(имя, метка папки)].
+        Медленная папка не задерживает список дольше timeout -
+        для неё отдаётся последний известный состав
+        """
+        self.ensure_root_exists()
+        items = self.workspace.merged(timeout)
+        trace.add(projects=len(items))
+        return items
 
     def ensure_root_exists(self):
         """Убедиться, что корневая папка существует"""
         os.makedirs(self.root_path, exist_ok=True)
 
-    def create_project(self, project_name):
+    def get_templates(self):
+        """Доступные шаблоны: [(id, название)]"""
+        try:
+            return self.templates.templates()
+        except OSError:
+            return []
+
+    @traced("manager.create_project")
+    def create_project(self, project_name, template=None):
         """
-        Создание нового проекта
+        Создание нового проекта из шаблона
         Returns: (success: bool, message: str, project_path: str)
         """
         if not project_name or not project_name.strip():
@@ -70,55 +238,731 @@ class ProjectManager:
         if os.path.exists(project_path):
             return False, f"Проект '{name}' уже существует!", None
 
+        before = self.index.before_change()
         try:
             os.makedirs(project_path)
-            app_file = os.path.join(project_path, "app.py")
-            with open(app_file, 'w', encoding='utf-8') as f:
-                f.write("")  # Создаём пустой файл
+        except Exception as e:
+            return False, f"Не удалось создать проект:\n{str(e)}", None
 
-            return True, f"Проект '{name}' создан!", project_path
+        try:
+            self.templates.materialize(template or self.default_template, project_path, name)
         except Exception as e:
+            # Не оставляем наполовину созданный проект
+            shutil.rmtree(project_path, ignore_errors=True)
             return False, f"Не удалось создать проект:\n{str(e)}", None
 
+        self.index.add(name, before)
+        self.store.update_project(
+            self.root_path, name,
+            created_at=time.time(), template=template or self.default_template
+        )
+        self.apply_project_changes(added=[name])
+        return True, f"Проект '{name}' создан!", project_path
+
+    @traced("manager.provision_env")
+    def provision_env(self, project_path, progress=None, cancelled=None):
+        """
+        Создание виртуального окружения проекта из локального кэша
+        Returns: (success: bool, message: str)
+        """
+        if not os.path.isdir(project_path):
+            return False, "Папка проекта не найдена!"
+        try:
+            self.envs.python_path = self.python_path
+            self.envs.provision(project_path, self.venv_packages, progress, cancelled)
+            name = os.path.basename(project_path)
+            return True, f"Окружение проекта '{name}' создано!"
+        except Exception as e:
+            return False, f"Не удалось создать окружение:\n{str(e)}"
+
+    @traced("manager.find_importable")
+    def find_importable(self, tree, on_found=None, progress=None, cancelled=None):
+        """
+        Поиск Python-проектов в дереве tree для импорта. Корневые папки
+        менеджера и архив не просматриваются
+        Returns: (success: bool, message: str, paths: list)
+        """
+        from core.importer import ProjectDetector, ImportCancelled
+        if not tree or not os.path.isdir(tree):
+            return False, "Папка не найдена!", []
+        found = []
+
+        def store_result(path, markers):
+            found.append(path)
+            if on_found:
+                on_found(path, markers)
+
+        detector = ProjectDetector(self.size_ignore)
+        skip = [*self.root_paths().values(), self.archiver.archive_dir, self.app_folder,
+                *self.linked_projects()]
+        try:
+            scanned, _ = detector.detect(tree, store_result, skip, progress, cancelled)
+        except ImportCancelled:
+            return False, "Поиск проектов отменён", found
+        trace.add(dirs=scanned, projects=len(found))
+        return True, f"Просмотрено папок: {scanned}. Найдено проектов: {len(found)}", sorted(found)
+
+    def linked_projects(self):
+        """Настоящие пути проектов основной папки, импортированных ссылкой"""
+        paths = []
+        for name in self.get_projects():
+            path = os.path.join(self.root_path, name)
+            if is_link(path):
+                paths.append(os.path.realpath(path))
+        return paths
+
+    @traced("manager.import_projects")
+    def import_projects(self, paths, move=False, progress=None, cancelled=None):
+        """
+        Импорт найденных проектов в основную папку: ссылкой (папка остаётся
+        на месте) или переносом (move=True)
+        Returns: (success: bool, message: str)
+        """
+        from core.importer import import_projects, LINK, MOVE
+        self.ensure_root_exists()
+        # Проекты, которые уже лежат в основной папке или импортированы ссылкой, пропускаются
+        root = os.path.join(os.path.normcase(os.path.normpath(self.root_path)), "")
+        linked = {os.path.normcase(path) for path in self.linked_projects()}
+        paths = [path for path in paths
+                 if not os.path.join(os.path.normcase(os.path.normpath(path)), "").startswith(root)
+                 and os.path.normcase(os.path.realpath(path)) not in linked]
+        if not paths:
+            return False, "Нет проектов для импорта!"
+        imported, errors = [], []
+        # Результаты приходят в потоке вызова, поэтому before передаётся по цепочке
+        before = [self.index.before_change()]
+
+        def store_result(src, name, error):
+            if error:
+                errors.append(f"{src}: {error}")
+            else:
+                imported.append(name)
+                before[0] = self.index.add(name, before[0])
+                try:
+                    created = os.stat(os.path.join(self.root_path, name)).st_mtime
+                except OSError:
+                    created = time.time()
+                self.store.update_project(self.root_path, name, created_at=created, template="import")
+            if progress:
+                progress(len(imported) + len(errors), len(paths), "Импорт проектов")
+
+        import_projects(paths, self.root_path, MOVE if move else LINK, store_result, cancelled=cancelled)
+        self.apply_project_changes(added=imported)
+        trace.add(projects=len(imported))
+        message = f"Импортировано проектов: {len(imported)}"
+        if cancelled and cancelled():
+            message += " (прервано)"
+        if errors:
+            return False, message + f"\nНе удалось импортировать {len(errors)}:\n" + "\n".join(errors[:10])
+        return True, message
+
+    @traced("manager.get_projects")
     def get_projects(self):
-        """Получение списка проектов"""
+        """Получение списка проектов (из индекса, пересканирование только при изменениях)"""
         self.ensure_root_exists()
         try:
-            return sorted([
-                d for d in os.listdir(self.root_path)
-                if os.path.isdir(os.path.join(self.root_path, d))
-            ])
+            return self.index.names()
         except Exception:
             return []
 
-    def delete_project(self, project_name):
-        """Удаление проекта"""
+    @traced("manager.delete_project")
+    def delete_project(self, project_name, root=None):
+        """Удаление проекта (в корзину, если она включена); root - метка папки"""
         if not project_name:
             return False, "Проект не выбран!"
 
-        project_path = os.path.join(self.root_path, project_name)
+        resolved = self.resolve_root(root)
+        if resolved is None:
+            return False, f"Папка '{root}' не найдена!"
+        root_path, index, trash = resolved
+        primary = root_path == self.root_path
+        project_path = os.path.join(root_path, project_name)
 
-        if not os.path.exists(project_path):
+        if self.archiver.is_archived(root_path, project_name):
+            try:
+                before = index.before_change()
+                self.archiver.discard(root_path, project_name)
+                index.remove(project_name, before)
+                self.store.remove_project(root_path, project_name)
+                if primary:
+                    self.apply_project_changes(removed=[project_name])
+                return True, f"Архив проекта '{project_name}' удалён!"
+            except Exception as e:
+                return False, f"Не удалось удалить архив проекта:\n{str(e)}"
+
+        if not os.path.lexists(project_path):
             return False, f"Проект '{project_name}' не найден!"
 
         try:
-            shutil.rmtree(project_path)
-            return True, f"Проект '{project_name}' удалён!"
+            before = index.before_change()
+            if is_link(project_path):
+                # Проект импортирован ссылкой: удаляется только ссылка,
+                # без корзины и снимка - папка проекта остаётся на месте
+                remove_link(project_path)
+                message = f"Ссылка на проект '{project_name}' удалена!"
+            elif self.use_trash:
+                trash.move(project_name)
+                message = f"Проект '{project_name}' перемещён в корзину!"
+            else:
+                if self.safety_snapshots:
+                    success, snapshot_message = self.snapshot_project(project_name, root, "delete", throttled=False)
+                    if not success:
+                        return False, f"Проект не удалён: {snapshot_message}"
+                shutil.rmtree(project_path)
+                message = f"Проект '{project_name}' удалён!"
+            index.remove(project_name, before)
+            self.store.remove_project(root_path, project_name)
+            if primary:
+                self.apply_project_changes(removed=[project_name])
+            return True, message
         except Exception as e:
             return False, f"Не удалось удалить проект:\n{str(e)}"
 
+    @traced("manager.archive_project")
+    def archive_project(self, project_name, root=None, progress=None, cancelled=None):
+        """
+        Отправка проекта в архив: папка сжимается и заменяется заглушкой
+        Returns: (success: bool, message: str)
+        """
+        resolved = self.resolve_root(root)
+        if resolved is None:
+            return False, f"Папка '{root}' не найдена!"
+        root_path, index, _ = resolved
+        if not project_name or not os.path.isdir(os.path.join(root_path, project_name)):
+            return False, f"Проект '{project_name}' не найден!"
+        if is_link(os.path.join(root_path, project_name)):
+            # Архивировалась бы папка проекта за пределами корневой, а затем удалялась
+            return False, f"Проект '{project_name}' импортирован ссылкой, его нельзя отправить в архив!"
+        before = index.before_change()
+        try:
+            os.makedirs(self.archiver.archive_dir, exist_ok=True)
+            stub = self.archiver.archive(root_path, project_name, progress, cancelled)
+        except ArchiveCancelled:
+            return False, "Архивирование отменено"
+        except Exception as e:
+            return False, f"Не удалось отправить проект в архив:\n{str(e)}"
+        index.add(project_name, before)
+        trace.add(files=stub["files"], bytes=stub["bytes"])
+        return True, (f"Проект '{project_name}' отправлен в архив "
+                      f"({format_size(stub['bytes'])} → {format_size(stub['archive_bytes'])})")
+
+    @traced("manager.restore_archived")
+    def restore_archived(self, project_name, root=None, progress=None, cancelled=None):
+        """Восстановление проекта из архива на прежнее место"""
+        resolved = self.resolve_root(root)
+        if resolved is None:
+            return False, f"Папка '{root}' не найдена!"
+        root_path, index, _ = resolved
+        if not self.archiver.is_archived(root_path, project_name):
+            return False, f"Проект '{project_name}' не найден в архиве!"
+        before = index.before_change()
+        try:
+            self.archiver.restore(root_path, project_name, progress, cancelled)
+        except ArchiveCancelled:
+            return False, "Восстановление отменено"
+        except Exception as e:
+            return False, f"Не удалось восстановить проект из архива:\n{str(e)}"
+        index.add(project_name, before)
+        return True, f"Проект '{project_name}' восстановлен из архива!"
+
+    def is_archived(self, project_path):
+        root, name = os.path.split(os.path.normpath(project_path))
+        return self.archiver.is_archived(root, name)
+
+    def archived_projects(self, root=None):
+        """Имена проектов папки, отправленных в архив"""
+        resolved = self.resolve_root(root)
+        return resolved[1].archived() if resolved else set()
+
+    @traced("manager.move_project")
+    def move_project(self, project_name, root=None, target_root=None):
+        """
+        Перенос проекта в другую корневую папку (root, target_root - метки)
+        Returns: (success: bool, message: str)
+        """
+        from core.importer import move_dir
+        source, target = self.resolve_root(root), self.resolve_root(target_root)
+        if source is None or target is None:
+            return False, f"Папка '{root if source is None else target_root}' не найдена!"
+        root_path, index, _ = source
+        target_path, target_index, _ = target
+        if os.path.normcase(root_path) == os.path.normcase(target_path):
+            return False, f"Проект '{project_name}' уже в этой папке"
+        if self.archiver.is_archived(root_path, project_name):
+            return False, f"Проект '{project_name}' в архиве - сначала восстановите его"
+        src = os.path.join(root_path, project_name)
+        dst = os.path.join(target_path, project_name)
+        if not os.path.exists(src):
+            return False, f"Проект '{project_name}' не найден!"
+        if os.path.lexists(dst):
+            return False, f"В папке назначения уже есть проект '{project_name}'!"
+        before, target_before = index.before_change(), target_index.before_change()
+        try:
+            move_dir(src, dst)
+        except Exception as e:
+            return False, f"Не удалось перенести проект:\n{str(e)}"
+        # Метаданные (время создания и открытия, шаблон) переезжают вместе с проектом
+        info = self.store.get_project(root_path, project_name) or {}
+        index.remove(project_name, before)
+        target_index.add(project_name, target_before)
+        self.store.remove_project(root_path, project_name)
+        self.store.update_project(target_path, project_name, **{
+            key: info[key] for key in PROJECT_FIELDS if info.get(key) is not None
+        })
+        if info.get("tags"):
+            self.store.set_tags(target_path, project_name, info["tags"])
+        if root_path == self.root_path:
+            self.apply_project_changes(removed=[project_name])
+        elif target_path == self.root_path:
+            self.apply_project_changes(added=[project_name])
+        return True, f"Проект '{project_name}' перенесён"
+
+    @traced("manager.batch_projects")
+    def batch_projects(self, action, items, target_root=None, progress=None, cancelled=None):
+        """
+        Одна операция над многими проектами в ограниченном пуле потоков.
+        action: delete | archive | unarchive | move; items - пары (имя, метка папки)
+        Returns: (success: bool, message: str, results: [(имя, метка, success, message)])
+        """
+        actions = {
+            "delete": (self.delete_project, "Удалено"),
+            "archive": (self.archive_project, "В архиве"),
+            "unarchive": (self.restore_archived, "Восстановлено"),
+            "move": (lambda name, root: self.move_project(name, root, target_root), "Перенесено"),
+        }
+        if action not in actions:
+            return False, f"Неизвестная операция: {action}", []
+        func, title = actions[action]
+        items = list(items)
+        results = []
+
+        def work(item):
+            name, root = item
+            if cancelled and cancelled():
+                return name, root, False, "отменено"
+            try:
+                success, message = func(name, root)
+            except Exception as e:
+                success, message = False, str(e)
+            return name, root, success, message
+
+        with ThreadPoolExecutor(max_workers=self.BATCH_WORKERS) as executor:
+            for done, result in enumerate(executor.map(work, items), 1):
+                results.append(result)
+                if progress:
+                    progress(done, len(items), title)
+
+        failed = [f"{name}: {message}" for name, _, success, message in results if not success]
+        trace.add(projects=len(results) - len(failed))
+        message = f"{title} проектов: {len(results) - len(failed)} из {len(items)}"
+        if failed:
+            return False, message + f"\nОшибок {len(failed)}:\n" + "\n".join(failed[:10]), results
+        return True, message, results
+
+    def get_trash(self):
+        """Содержимое корзины, которое можно восстановить"""
+        try:
+            return [item for item in self.trash.items() if not item.get("purging")]
+        except Exception:
+            return []
+
+    @traced("manager.restore_project")
+    def restore_project(self, item_id, project_name=None):
+        """Восстановление проекта из корзины"""
+        try:
+            before = self.index.before_change()
+            name = self.trash.restore(item_id, project_name)
+            self.index.add(name, before)
+            self.store.update_project(self.root_path, name)
+            self.apply_project_changes(added=[name])
+            return True, f"Проект '{name}' восстановлен!"
+        except KeyError:
+            return False, "Проект не найден в корзине!"
+        except FileExistsError:
+            return False, "Проект с таким именем уже существует!"
+        except Exception as e:
+            return False, f"Не удалось восстановить проект:\n{str(e)}"
+
+    @traced("manager.scan_sizes")
+    def scan_sizes(self, on_result=None, full=False, cancelled=None, root=None):
+        """
+        Подсчёт размеров всех проектов папки root (None - основная)
+        Returns: {name: (size, files)}
+        """
+        self.sizes.ignore = list(self.size_ignore)
+        resolved = self.resolve_root(root)
+        if resolved is None:
+            return {}
+        root_path, index, _ = resolved
+
+        def store_result(name, size, files):
+            self.store.update_project(root_path, name, size=size, files=files)
+            if on_result:
+                on_result(name, size, files)
+
+        names = self.get_projects() if root_path == self.root_path else index.names()
+        archived = index.archived()
+        names = [name for name in names if name not in archived]
+        results = self.sizes.scan(root_path, names, store_result, full, cancelled)
+        trace.add(projects=len(results),
+                  files=sum(files for _, files in results.values()),
+                  bytes=sum(size for size, _ in results.values()))
+        return results
+
+    @traced("manager.scan_git")
+    def scan_git(self, on_result=None, full=False, cancelled=None, root=None):
+        """
+        Состояние git всех проектов папки root (None - основная)
+        Returns: {name: state | None}
+        """
+        resolved = self.resolve_root(root)
+        if resolved is None:
+            return {}
+        root_path, index, _ = resolved
+        names = self.get_projects() if root_path == self.root_path else index.names()
+        archived = index.archived()
+        names = [name for name in names if name not in archived]
+        results = self.git_states.collect(root_path, names, on_result, full, cancelled)
+        trace.add(projects=len(results), repos=sum(1 for state in results.values() if state))
+        return results
+
+    def git_state(self, project_name, root=None):
+        """Свежее (без кэша) состояние git проекта - для проверки перед удалением"""
+        resolved = self.resolve_root(root)
+        if resolved is None:
+            return None
+        return self.git_states.state(os.path.join(resolved[0], project_name), full=True)
+
+    def git_states_of(self, items, cancelled=None):
+        """
+        Свежие состояния git пар (имя, метка папки) - для проверки перед
+        пакетным удалением. Returns: {(имя, метка): state | None}
+        """
+        by_root = {}
+        for name, root in items:
+            by_root.setdefault(root, []).append(name)
+        states = {}
+        for root, names in by_root.items():
+            resolved = self.resolve_root(root)
+            if resolved is None:
+                continue
+            results = self.git_states.collect(resolved[0], names, full=True, cancelled=cancelled, prune=False)
+            for name, state in results.items():
+                states[(name, root)] = state
+        return states
+
+    def cached_git_state(self, project_name):
+        """Последнее известное состояние git проекта основной папки (без запуска git)"""
+        entry = self.git_states.cache.get(os.path.join(self.root_path, project_name))
+        return entry["state"] if entry else None
+
+    @traced("manager.snapshot_project")
+    def snapshot_project(self, project_name, root=None, reason="manual", throttled=True,
+                         progress=None, cancelled=None):
+        """
+        Инкрементальный снимок проекта: читаются и сохраняются только изменённые файлы
+        Returns: (success: bool, message: str)
+        """
+        from core.snapshots import SnapshotCancelled
+        resolved = self.resolve_root(root)
+        if resolved is None:
+            return False, f"Папка '{root}' не найдена!"
+        project_path = os.path.join(resolved[0], project_name)
+        if not os.path.isdir(project_path):
+            return False, f"Проект '{project_name}' не найден!"
+        try:
+            result = self.snapshots.snapshot(project_path, reason, throttled, progress, cancelled)
+            self.snapshots.prune(project_path, max(self.snapshot_keep, 1))
+        except SnapshotCancelled:
+            return False, "Снимок отменён"
+        except Exception as e:
+            return False, f"Не удалось сделать снимок проекта:\n{str(e)}"
+        trace.add(files=result["changed"], bytes=result["stored"])
+        if not result["new"]:
+            return True, f"Проект '{project_name}' не изменился с прошлого снимка"
+        return True, (f"Снимок проекта '{project_name}': изменённых файлов {result['changed']}, "
+                      f"записано {format_size(result['stored'])}")
+
+    @traced("manager.snapshot_projects")
+    def snapshot_projects(self, reason="schedule", names=None, throttled=True, progress=None, cancelled=None):
+        """
+        Снимки проектов основной папки (по умолчанию всех, кроме архивных)
+        Returns: (success: bool, message: str)
+        """
+        if names is None:
+            archived = self.index.archived()
+            names = [name for name in self.get_projects() if name not in archived]
+        errors = []
+        for done, name in enumerate(names, 1):
+            if cancelled and cancelled():
+                return False, "Снимки отменены"
+            success, message = self.snapshot_project(name, None, reason, throttled, cancelled=cancelled)
+            if not success:
+                errors.append(f"{name}: {message}")
+            if progress:
+                progress(done, len(names), "Снимки проектов")
+        if errors:
+            return False, f"Не удалось сделать снимков: {len(errors)}\n" + "\n".join(errors[:10])
+        return True, f"Снимки проектов обновлены: {len(names)}"
+
+    def snapshot_due(self):
+        """Пора ли делать снимки по расписанию"""
+        if not self.snapshot_interval_hours:
+            return False
+        last = self.snapshots.last_created("schedule")
+        return last is None or time.time() - last >= self.snapshot_interval_hours * 3600
+
+    def project_snapshots(self, project_name=None, root=None):
+        """Снимки проекта (или всех проектов) от новых к старым"""
+        if project_name is None:
+            return self.snapshots.snapshots()
+        resolved = self.resolve_root(root)
+        if resolved is None:
+            return []
+        return self.snapshots.snapshots(os.path.join(resolved[0], project_name))
+
+    @traced("manager.restore_snapshot")
+    def restore_snapshot(self, snapshot_id, progress=None, cancelled=None):
+        """
+        Восстановление снимка в основную папку; занятое имя получает суффикс
+        Returns: (success: bool, message: str)
+        """
+        from core.snapshots import SnapshotCancelled
+        from core.importer import unique_name
+        snapshot = self.snapshots.get(snapshot_id)
+        if snapshot is None:
+            return False, f"Снимок {snapshot_id} не найден!"
+        self.ensure_root_exists()
+        name = unique_name(self.root_path, os.path.basename(snapshot["project"]), set())
+        target = os.path.join(self.root_path, name)
+        before = self.index.before_change()
+        try:
+            files = self.snapshots.restore(snapshot_id, target, progress, cancelled)
+        except SnapshotCancelled:
+            shutil.rmtree(target, ignore_errors=True)
+            return False, "Восстановление отменено"
+        except Exception as e:
+            shutil.rmtree(target, ignore_errors=True)
+            return False, f"Не удалось восстановить снимок:\n{str(e)}"
+        self.index.add(name, before)
+        self.store.update_project(self.root_path, name, created_at=snapshot["created"])
+        self.apply_project_changes(added=[name])
+        return True, f"Проект восстановлен из снимка как '{name}' (файлов: {files})"
+
+    @traced("manager.find_duplicates")
+    def find_duplicates(self, progress=None, cancelled=None):
+        """
+        Поиск одинаковых файлов в корневой папке без изменений на диске
+        Returns: (success: bool, message: str, report: DedupReport | None)
+        """
+        from core.dedup import DedupCancelled
+        try:
+            report = self.dedup.scan(self.root_path, self.dedup_mode, progress, cancelled)
+        except DedupCancelled:
+            return False, "Поиск дубликатов отменён", None
+        except Exception as e:
+            return False, f"Не удалось найти дубликаты:\n{str(e)}", None
+        trace.add(files=report.scanned, bytes=report.reclaimable)
+        if not report.groups:
+            return True, f"Проверено файлов: {report.scanned}. Одинаковых файлов не найдено", report
+        return True, (f"Проверено файлов: {report.scanned}. Копий: {report.duplicates} "
+                      f"в {len(report.groups)} группах, можно освободить {format_size(report.reclaimable)}"), report
+
+    @traced("manager.deduplicate")
+    def deduplicate(self, report=None, progress=None, cancelled=None):
+        """
+        Замена одинаковых файлов ссылками (dedup_mode: hardlink | reflink).
+        Без report дубликаты ищутся заново - по кэшу хэшей это быстро
+        Returns: (success: bool, message: str)
+        """
+        if report is None:
+            success, message, report = self.find_duplicates(progress, cancelled)
+            if not success:
+                return False, message
+        replaced, freed, errors = self.dedup.apply(report, self.dedup_mode, progress, cancelled)
+        trace.add(files=replaced, bytes=freed)
+        message = f"Заменено ссылками файлов: {replaced}, освобождено {format_size(freed)}"
+        if cancelled and cancelled():
+            message += " (прервано, при следующем запуске продолжится)"
+        if errors:
+            return False, message + f"\nНе удалось заменить {len(errors)}:\n" + "\n".join(errors[:10])
+        return True, message
+
+    @traced("manager.query_projects")
+    def query_projects(self, order="name", tag=None, limit=None):
+        """
+        Проекты текущего корня из базы метаданных
+        order: name | recent | created | size
+        """
+        existing = set(self.get_projects())
+        rows = self.store.query_projects(self.root_path, order, tag, limit)
+        return [row for row in rows if row["name"] in existing]
+
+    def get_project_info(self, project_name):
+        """Метаданные проекта (время создания и открытия, теги, размер)"""
+        return self.store.get_project(self.root_path, project_name)
+
+    @traced("manager.set_project_tags")
+    def set_project_tags(self, project_name, tags):
+        """Замена тегов проекта"""
+        tags = sorted({tag.strip() for tag in tags if tag.strip()})
+        try:
+            self.store.set_tags(self.root_path, project_name, tags)
+            return True, "Теги сохранены"
+        except Exception as e:
+            return False, f"Не удалось сохранить теги:\n{str(e)}"
+
+    @traced("manager.update_code_index")
+    def update_code_index(self, progress=None, cancelled=None):
+        """
+        Обновление индекса поиска по коду (только изменённые файлы)
+        Returns: (success: bool, message: str)
+        """
+        self.code_index.ignore = list(self.size_ignore)
+        archived = self.index.archived()
+        projects = [name for name in self.get_projects() if name not in archived]
+        try:
+            indexed, removed = self.code_index.update(self.root_path, projects, progress, cancelled)
+        except Exception as e:
+            return False, f"Не удалось обновить индекс:\n{str(e)}"
+        trace.add(files=indexed)
+        stats = self.code_index.stats()
+        return True, (f"В индексе файлов: {stats['files']} "
+                      f"(обновлено: {indexed}, удалено: {removed})")
+
+    @traced("manager.search_code")
+    def search_code(self, query, limit=200, cancelled=None):
+        """Поиск текста в исходниках проектов: [{project, path, line, text}]"""
+        return self.code_index.search(self.root_path, query, limit, cancelled)
+
+    @traced("manager.analyze_dependencies")
+    def analyze_dependencies(self, names=None, root=None, progress=None, cancelled=None):
+        """
+        Сторонние импорты проектов папки (по умолчанию всех, кроме архивных)
+        Returns: {проект: {модуль: [файлы]}}
+        """
+        resolved = self.resolve_root(root)
+        if resolved is None:
+            return {}
+        root_path, index, _ = resolved
+        if names is None:
+            archived = index.archived()
+            names = [name for name in index.names() if name not in archived]
+        self.deps.ignore = list(self.size_ignore)
+        report = self.deps.analyze(root_path, names, progress, cancelled)
+        trace.add(files=sum(len(files) for modules in report.values() for files in modules.values()))
+        return report
+
+    def project_dependents(self, root=None, progress=None, cancelled=None):
+        """Какие проекты папки зависят от каждого пакета: {пакет: [проекты]}"""
+        from core.deps import dependents
+        return dependents(self.analyze_dependencies(root=root, progress=progress, cancelled=cancelled))
+
+    def suggest_requirements(self, project_name, root=None, write=False):
+        """
+        Предлагаемый requirements.txt проекта; write - записать файл,
+        если его ещё нет
+        Returns: (success: bool, message: str)
+        """
+        resolved = self.resolve_root(root)
+        if resolved is None or not os.path.isdir(os.path.join(resolved[0], project_name)):
+            return False, f"Проект '{project_name}' не найден!"
+        from core.deps import requirements_text
+        modules = self.analyze_dependencies([project_name], root).get(project_name, {})
+        text = requirements_text(modules)
+        if not write:
+            return True, text
+        path = os.path.join(resolved[0], project_name, "requirements.txt")
+        if os.path.exists(path):
+            return False, f"В проекте '{project_name}' уже есть requirements.txt"
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        except OSError as e:
+            return False, f"Не удалось записать requirements.txt:\n{str(e)}"
+        return True, f"requirements.txt проекта '{project_name}' создан"
+
+    def get_search_index(self):
+        """Индекс нечёткого поиска (строится при первом обращении)"""
+        if self._search_index is None:
+            self._search_index = FuzzyIndex(self.get_projects())
+        return self._search_index
+
+    def get_recent(self):
+        """LRU открытых проектов текущего корня"""
+        if self._recent is None:
+            rows = self.store.query_projects(self.root_path, "recent", limit=100)
+            self._recent = RecentProjects([row["name"] for row in rows])
+        return self._recent
+
+    @traced("manager.search_projects")
+    def search_projects(self, query, limit=20):
+        """Нечёткий поиск проектов с учётом недавних открытий"""
+        return self.get_search_index().search(query, limit, self.get_recent().ranks())
+
+    def recent_projects(self, limit=10):
+        """Недавно открытые проекты"""
+        return self.get_recent().names(limit)
+
+    def apply_project_changes(self, added=(), removed=()):
+        """Точечное обновление поиска при появлении и исчезновении проектов"""
+        search_index = self._search_index
+        for name in removed:
+            if search_index is not None:
+                search_index.remove(name)
+            if self._recent is not None:
+                self._recent.remove(name)
+        for name in added:
+            if search_index is not None:
+                search_index.add(name)
+
+    def set_tracing(self, enabled):
+        """Включение и выключение трассировки операций"""
+        self.tracing_enabled = bool(enabled)
+        trace.tracer.enabled = self.tracing_enabled
+        self.save_config()
+        return True, "Трассировка включена" if enabled else "Трассировка выключена"
+
     def open_projects_folder(self):
         """Открытие папки с проектами"""
         self.ensure_root_exists()
         os.startfile(self.root_path)
 
-    def open_project_folder(self, project_path):
-        """Открытие конкретной папки проекта"""
-        if os.path.exists(project_path):
-            os.startfile(project_path)
+    @traced("manager.open_project_folder")
+    def open_project_folder(self, project_path, progress=None, cancelled=None):
+        """Открытие конкретной папки проекта (из архива проект сначала восстанавливается)"""
+        root, name = os.path.split(os.path.normpath(project_path))
+        if self.archiver.is_archived(root, name):
+            indexes = [self.resolve_root(label)[1] for label, path in self.root_paths().items()
+                       if os.path.normpath(path) == root]
+            befores = [index.before_change() for index in indexes]
+            try:
+                self.archiver.restore(root, name, progress, cancelled)
+            except ArchiveCancelled:
+                return False, "Восстановление отменено"
+            except Exception as e:
+                return False, f"Не удалось восстановить проект из архива:\n{str(e)}"
+            for index, before in zip(indexes, befores):
+                index.add(name, before)
+        if not os.path.exists(project_path):
+            return False, f"Проект '{name}' не найден!"
+        self.store.update_project(root, name, last_opened=time.time())
+        if root == os.path.normpath(self.root_path):
+            self.get_recent().touch(name)
+        os.startfile(project_path)
+        return True, f"Проект '{name}' открыт"
+
+    def pending_migration(self):
+        """Незавершённый перенос проектов или None"""
+        return Migration.load(self.migration_journal)
 
-    def change_root_path(self, new_path, move_projects=True):
-        """Изменение корневой папки"""
+    @traced("manager.change_root_path")
+    def change_root_path(self, new_path, move_projects=True, progress=None, cancelled=None):
+        """
+        Изменение корневой папки
+        progress(done, total, text) и cancelled() - необязательные колбэки
+        для фонового выполнения
+        """
         if not new_path:
             return False, "Путь не указан!"
 
@@ -127,25 +971,54 @@ class ProjectManager:
         if old_path == new_path:
             return True, "Путь не изменился"
 
+        normalized = os.path.normcase(os.path.normpath(new_path))
+        if any(os.path.normcase(os.path.normpath(p)) == normalized for p in self.roots.values()):
+            return False, "Эта папка уже добавлена как дополнительная!"
+
+        migration = self.pending_migration()
+        if migration and migration.new_path != new_path:
+            return False, f"Сначала завершите незавершённый перенос в:\n{migration.new_path}"
+
         try:
             # Создаём новую папку если не существует
             os.makedirs(new_path, exist_ok=True)
 
-            # Переносим проекты если нужно
-            if move_projects and os.path.exists(old_path):
-                projects = self.get_projects()
-
-                for project in projects:
-                    old_project_path = os.path.join(old_path, project)
-                    new_project_path = os.path.join(new_path, project)
+            # Переносим проекты если нужно (или продолжаем прерванный перенос)
+            if migration is None and move_projects and os.path.exists(old_path):
+                # Архивные проекты переносятся своими заглушками
+                archived = self.index.archived()
+                names = [name + ARCHIVE_SUFFIX if name in archived else name
+                         for name in self.get_projects()]
+                if os.path.isdir(os.path.join(old_path, TRASH_DIR_NAME)):
+                    names.append(TRASH_DIR_NAME)
+                if self.safety_snapshots:
+                    success, snapshot_message = self.snapshot_projects(
+                        "migrate", [name for name in self.get_projects() if name not in archived],
+                        throttled=False, progress=progress, cancelled=cancelled
+                    )
+                    if not success:
+                        return False, f"Перенос не начат: {snapshot_message}"
+                migration = Migration.start(self.migration_journal, old_path, new_path, names)
 
-                    if not os.path.exists(new_project_path):
-                        shutil.move(old_project_path, new_project_path)
+            message = "Настройки сохранены и проекты перенесены!"
+            if migration is not None:
+                success, message = migration.run(progress, cancelled)
+                trace.add(files=migration.files_copied, bytes=migration.bytes_copied)
+                if not success:
+                    return False, message
+                message = f"Настройки сохранены. {message}"
 
+            if migration is not None:
+                self.store.move_root(old_path, new_path)
             self.root_path = new_path
+            self._search_index = None
+            self._recent = None
+            self.index.set_root(new_path)
+            self.trash.set_root(new_path)
+            self.update_workspace()
             self.save_config()
 
-            return True, "Настройки сохранены и проекты перенесены!"
+            return True, message
         except PermissionError:
             return False, "Отказано в доступе. Выбери другую папку или запусти программу от имени администратора."
         except Exception as e:
@@ -0,0 +1,229 @@
+"""
+Перенос проектов между корневыми папками с журналом для возобновления
+"""
+import os
+import json
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from core.sizes import format_size
+from core.importer import is_link, link_dir, remove_link
+
+PENDING = "pending"
+COPYING = "copying"
+DONE = "done"
+SKIPPED = "skipped"
+
+# Копии файлов не больше этого размера сверяются ещё и по содержимому
+VERIFY_CONTENT_SIZE = 64 * 1024
+# copy2 переносит mtime, но FAT хранит его с точностью до 2 с
+MTIME_TOLERANCE = 2
+
+
+class MigrationCancelled(Exception):
+    pass
+
+
+class Migration:
+    """
+    Перенос проектов из old_path в new_path.
+    Проекты на том же томе переименовываются, на другом - копируются
+    в несколько потоков с проверкой каждой копии (размер, mtime, у мелких
+    файлов - содержимое) и только потом удаляются.
+    Состояние каждого проекта пишется в журнал, поэтому прерванный
+    перенос продолжается с места остановки.
+    """
+    def __init__(self, journal_file, old_path, new_path, projects, workers=4):
+        self.journal_file = journal_file
+        self.old_path = old_path
+        self.new_path = new_path
+        self.projects = projects
+        self.workers = workers
+        self.bytes_copied = 0
+        self.files_copied = 0
+        self._started = None
+        self._last_report = 0
+
+    @classmethod
+    def start(cls, journal_file, old_path, new_path, names):
+        migration = cls(journal_file, old_path, new_path, {name: PENDING for name in names})
+        migration.save()
+        return migration
+
+    @classmethod
+    def load(cls, journal_file):
+        """Незавершённый перенос из журнала или None"""
+        if not os.path.exists(journal_file):
+            return None
+        try:
+            with open(journal_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(journal_file, data["old_path"], data["new_path"], data["projects"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self):
+        tmp_file = str(self.journal_file) + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "old_path": self.old_path,
+                "new_path": self.new_path,
+                "projects": self.projects
+            }, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_file, self.journal_file)
+
+    def finish(self):
+        """Удаление журнала после успешного переноса"""
+        try:
+            os.remove(self.journal_file)
+        except OSError:
+            pass
+
+    def pending(self):
+        return [name for name, state in self.projects.items() if state in (PENDING, COPYING)]
+
+    def same_device(self):
+        try:
+            return os.stat(self.old_path).st_dev == os.stat(self.new_path).st_dev
+        except OSError:
+            return False
+
+    def run(self, progress=None, cancelled=None):
+        """
+        Выполнение (или продолжение) переноса
+        Returns: (success: bool, message: str)
+        """
+        os.makedirs(self.new_path, exist_ok=True)
+        same_device = self.same_device()
+        names = self.pending()
+        total = len(self.projects)
+        self._started = time.monotonic()
+
+        for name in names:
+            if cancelled and cancelled():
+                return False, "Перенос приостановлен и будет продолжен при следующем сохранении."
+            self._report(progress, name, force=True)
+
+            src = os.path.join(self.old_path, name)
+            dst = os.path.join(self.new_path, name)
+
+            if not os.path.exists(src):
+                # Проект уже перенесён, но журнал не успел обновиться
+                self.projects[name] = DONE if os.path.exists(dst) else SKIPPED
+            elif os.path.exists(dst) and self.projects[name] == PENDING:
+                # В новой папке уже есть свой проект с таким именем - не трогаем
+                self.projects[name] = SKIPPED
+            elif is_link(src):
+                # Проект импортирован ссылкой: в новой папке создаётся такая же
+                # ссылка, сама папка проекта остаётся на месте
+                self.projects[name] = COPYING
+                self.save()
+                if not os.path.lexists(dst):
+                    link_dir(os.path.realpath(src), dst)
+                remove_link(src)
+                self.projects[name] = DONE
+            elif same_device:
+                os.rename(src, dst)
+                self.projects[name] = DONE
+            elif os.path.isfile(src):
+                # Заглушка проекта из архива
+                self.bytes_copied += self.copy_file(src, dst)
+                os.remove(src)
+                self.projects[name] = DONE
+            else:
+                self.projects[name] = COPYING
+                self.save()
+                try:
+                    self.copy_tree(src, dst, progress, cancelled, name)
+                except MigrationCancelled:
+                    return False, "Перенос приостановлен и будет продолжен при следующем сохранении."
+                shutil.rmtree(src)
+                self.projects[name] = DONE
+            self.save()
+
+        self._report(progress, "", force=True)
+        skipped = [name for name, state in self.projects.items() if state == SKIPPED]
+        self.finish()
+        if skipped:
+            return True, f"Проекты перенесены, пропущено (уже существуют): {len(skipped)}"
+        return True, f"Перенесено проектов: {total}"
+
+    def copy_tree(self, src, dst, progress, cancelled, name):
+        """Многопоточное копирование дерева с проверкой каждого файла"""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = set()
+            for dirpath, dirnames, filenames in os.walk(src):
+                rel = os.path.relpath(dirpath, src)
+                target_dir = os.path.normpath(os.path.join(dst, rel))
+                os.makedirs(target_dir, exist_ok=True)
+
+                for dirname in dirnames:
+                    link = os.path.join(dirpath, dirname)
+                    target_link = os.path.join(target_dir, dirname)
+                    if os.path.islink(link) and not os.path.lexists(target_link):
+                        os.symlink(os.readlink(link), target_link, target_is_directory=True)
+
+                for filename in filenames:
+                    if cancelled and cancelled():
+                        raise MigrationCancelled()
+                    in_flight.add(executor.submit(
+                        self.copy_file,
+                        os.path.join(dirpath, filename),
+                        os.path.join(target_dir, filename)
+                    ))
+                    # Ограничиваем очередь, чтобы не держать в памяти всё дерево
+                    if len(in_flight) >= self.workers * 4:
+                        finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        self._collect(finished)
+                        self._report(progress, name)
+
+            finished, _ = wait(in_flight)
+            self._collect(finished)
+
+    def _collect(self, futures):
+        for future in futures:
+            size = future.result()
+            self.bytes_copied += size
+            self.files_copied += 1
+
+    @staticmethod
+    def copy_file(src, dst):
+        """Копирование одного файла; уже скопированные пропускаются"""
+        st = os.lstat(src)
+        if os.path.islink(src):
+            if not os.path.lexists(dst):
+                os.symlink(os.readlink(src), dst)
+            return 0
+        try:
+            dst_st = os.stat(dst)
+            if dst_st.st_size == st.st_size and int(dst_st.st_mtime) == int(st.st_mtime):
+                return 0
+        except OSError:
+            pass
+        shutil.copy2(src, dst)
+        dst_st = os.stat(dst)
+        if dst_st.st_size != st.st_size:
+            raise OSError(f"Размер копии не совпадает: {dst}")
+        if abs(dst_st.st_mtime - st.st_mtime) > MTIME_TOLERANCE:
+            raise OSError(f"Время изменения копии не совпадает: {dst}")
+        if st.st_size <= VERIFY_CONTENT_SIZE:
+            with open(src, "rb") as f_src, open(dst, "rb") as f_dst:
+                if f_src.read() != f_dst.read():
+                    raise OSError(f"Содержимое копии не совпадает: {dst}")
+        return st.st_size
+
+    def _report(self, progress, name, force=False):
+        if not progress:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_report < 0.2:
+            return
+        self._last_report = now
+        elapsed = max(now - self._started, 0.001)
+        done = len(self.projects) - len(self.pending())
+        text = (
+            f"{name} · {format_size(self.bytes_copied)} · "
+            f"{format_size(self.bytes_copied / elapsed)}/с · "
+            f"{self.files_copied / elapsed:.0f} файлов/с"
+        )
+        progress(done, len(self.projects), text)
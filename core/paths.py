@@ -0,0 +1,20 @@
+"""
+Папка приложения (без тяжёлых импортов - нужна и при быстром запуске клиента)
+"""
+import os
+import sys
+from pathlib import Path
+
+APP_FOLDER_ENV = "PYTHONPROJECTMNGR_HOME"
+
+
+def default_app_folder():
+    """Папка приложения: переменная окружения, иначе профиль пользователя"""
+    if os.environ.get(APP_FOLDER_ENV):
+        return Path(os.environ[APP_FOLDER_ENV])
+    if sys.platform == "win32":
+        try:
+            return Path(f"C:/Users/{os.getlogin()}/PythonProjectMngr")
+        except OSError:
+            pass
+    return Path.home() / "PythonProjectMngr"
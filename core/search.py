@@ -0,0 +1,165 @@
+"""
+Нечёткий поиск по названиям проектов и список недавно открытых
+"""
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from itertools import islice
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def is_subsequence(query, text):
+    it = iter(text)
+    return all(c in it for c in query)
+
+
+class RecentProjects:
+    """LRU открытых проектов: первым идёт последний открытый"""
+    def __init__(self, names=(), capacity=100):
+        self.capacity = capacity
+        self._items = OrderedDict((name, None) for name in names)
+        self._lock = threading.Lock()
+
+    def touch(self, name):
+        with self._lock:
+            self._items[name] = None
+            self._items.move_to_end(name, last=False)
+            while len(self._items) > self.capacity:
+                self._items.popitem()
+
+    def remove(self, name):
+        with self._lock:
+            self._items.pop(name, None)
+
+    def names(self, limit=None):
+        with self._lock:
+            return list(islice(self._items, limit))
+
+    def ranks(self):
+        """{имя: позиция}, 0 - самый свежий"""
+        with self._lock:
+            return {name: i for i, name in enumerate(self._items)}
+
+
+class FuzzyIndex:
+    """
+    Индекс названий: отсортированный список для поиска по префиксу
+    и триграммы -> множество имён для подстрок и опечаток.
+    Добавление и удаление имени обновляют только его записи.
+    """
+    MAX_CANDIDATES = 500
+
+    def __init__(self, names=()):
+        self._lock = threading.Lock()
+        self._trigrams = {}
+        self._names = set(names)
+        self._sorted = sorted((name.lower(), name) for name in self._names)
+        for lower, name in self._sorted:
+            for gram in trigrams(lower):
+                self._trigrams.setdefault(gram, set()).add(name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, name):
+        with self._lock:
+            self._add(name)
+
+    def _add(self, name):
+        if name in self._names:
+            return
+        self._names.add(name)
+        lower = name.lower()
+        insort(self._sorted, (lower, name))
+        for gram in trigrams(lower):
+            self._trigrams.setdefault(gram, set()).add(name)
+
+    def remove(self, name):
+        with self._lock:
+            if name not in self._names:
+                return
+            self._names.discard(name)
+            lower = name.lower()
+            i = bisect_left(self._sorted, (lower, name))
+            if i < len(self._sorted) and self._sorted[i] == (lower, name):
+                del self._sorted[i]
+            for gram in trigrams(lower):
+                bucket = self._trigrams.get(gram)
+                if bucket is not None:
+                    bucket.discard(name)
+                    if not bucket:
+                        del self._trigrams[gram]
+
+    def _prefix_matches(self, query, limit):
+        i = bisect_left(self._sorted, (query, ""))
+        result = []
+        for lower, name in islice(self._sorted, i, i + limit):
+            if not lower.startswith(query):
+                break
+            result.append(name)
+        return result
+
+    def _candidates(self, query):
+        grams = trigrams(query)
+        if not grams:
+            return set()
+        buckets = sorted((self._trigrams.get(gram, ()) for gram in grams), key=len)
+        smallest, rest = buckets[0], buckets[1:]
+        # Идём по самому редкому множеству и останавливаемся, набрав лимит:
+        # для первых 20 результатов полное пересечение не нужно
+        matches = (name for name in smallest if all(name in bucket for bucket in rest))
+        candidates = set(islice(matches, self.MAX_CANDIDATES))
+        if candidates:
+            return candidates
+        # Опечатка: имена, где совпадает хотя бы половина триграмм
+        counts = {}
+        per_bucket = max(self.MAX_CANDIDATES // len(buckets), 20)
+        for bucket in buckets:
+            for name in islice(bucket, per_bucket):
+                counts[name] = counts.get(name, 0) + 1
+        need = max(1, len(grams) // 2)
+        return {name for name, count in counts.items() if count >= need}
+
+    @staticmethod
+    def score(query, name):
+        lower = name.lower()
+        if lower == query:
+            return 1000
+        pos = lower.find(query)
+        if pos == 0:
+            return 800 - len(lower)
+        if pos > 0:
+            return 600 - pos - len(lower)
+        if is_subsequence(query, lower):
+            return 300 - len(lower)
+        common = len(trigrams(query) & trigrams(lower))
+        return 100 * common // max(len(query) - 2, 1) - len(lower)
+
+    def search(self, query, limit=20, recent=None):
+        """
+        Лучшие совпадения с учётом недавних открытий
+        recent: {имя: позиция в LRU}
+        """
+        query = query.strip().lower()
+        recent = recent or {}
+        with self._lock:
+            if not query:
+                ordered = sorted(recent, key=recent.get)
+                return [name for name in ordered if name in self._names][:limit]
+
+            candidates = set(self._prefix_matches(query, limit * 5))
+            if len(query) >= 3:
+                candidates |= self._candidates(query)
+            candidates.update(name for name in recent
+                              if name in self._names and query in name.lower())
+
+        def rank(name):
+            bonus = 0
+            if name in recent:
+                bonus = 200 * (len(recent) - recent[name]) // len(recent)
+            return -(self.score(query, name) + bonus), name
+
+        return sorted(candidates, key=rank)[:limit]
@@ -0,0 +1,142 @@
+"""
+Подсчёт размера проектов с кэшем по mtime каталогов
+"""
+import os
+import json
+import time
+import threading
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_IGNORE = [".git", ".venv", "venv", "node_modules", "__pycache__"]
+# Как часто кэш по mtime каталогов всё равно перепроверяется полным пересчётом (с)
+FULL_SCAN_INTERVAL = 24 * 3600
+# Ключ кэша со временем последнего полного пересчёта корня (к пути корня)
+FULL_SCAN_KEY = "full-scan:"
+
+
+def format_size(size):
+    """Человекочитаемый размер"""
+    for unit in ("Б", "КБ", "МБ", "ГБ"):
+        if size < 1024 or unit == "ГБ":
+            return f"{size:.1f} {unit}" if unit != "Б" else f"{int(size)} {unit}"
+        size /= 1024
+
+
+class SizeScanner:
+    """
+    Размер и число файлов проектов.
+    Для каждого каталога кэшируются размер собственных файлов и список
+    подкаталогов, ключ - mtime каталога. Неизменённый каталог стоит
+    одного stat, перечитываются только каталоги, где что-то добавили
+    или удалили. Правка файла без изменения состава каталога mtime не
+    меняет - для этого есть полный пересчёт (full=True): по кнопке
+    «Обновить» и сам, если корень не пересчитывался FULL_SCAN_INTERVAL.
+    """
+    def __init__(self, cache_file, ignore=None, workers=8):
+        self.cache_file = cache_file
+        self.ignore = list(DEFAULT_IGNORE if ignore is None else ignore)
+        self.workers = workers
+        self.cache = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def save(self):
+        tmp_file = str(self.cache_file) + ".tmp"
+        try:
+            with self._lock:
+                data = json.dumps(self.cache, ensure_ascii=False)
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_file, self.cache_file)
+        except OSError:
+            pass
+
+    def is_ignored(self, name):
+        return any(fnmatch(name, pattern) for pattern in self.ignore)
+
+    def scan_dir(self, path, visited, full=False, cancelled=None):
+        """
+        Рекурсивный размер каталога
+        Returns: (size: int, files: int)
+        """
+        if cancelled and cancelled():
+            return 0, 0
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return 0, 0
+
+        visited.add(path)
+        cached = self.cache.get(path)
+        if not full and cached and cached["mtime"] == mtime:
+            size, files, subdirs = cached["size"], cached["files"], cached["dirs"]
+        else:
+            size, files, subdirs = 0, 0, []
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if self.is_ignored(entry.name):
+                            continue
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.name)
+                            elif entry.is_file(follow_symlinks=False):
+                                size += entry.stat(follow_symlinks=False).st_size
+                                files += 1
+                        except OSError:
+                            continue
+            except OSError:
+                return 0, 0
+            with self._lock:
+                self.cache[path] = {"mtime": mtime, "size": size, "files": files, "dirs": subdirs}
+
+        for name in subdirs:
+            sub_size, sub_files = self.scan_dir(os.path.join(path, name), visited, full, cancelled)
+            size += sub_size
+            files += sub_files
+        return size, files
+
+    def scan(self, root_path, names, on_result=None, full=False, cancelled=None):
+        """
+        Параллельный подсчёт размеров проектов root_path.
+        on_result(name, size, files) вызывается по мере готовности.
+        Returns: {name: (size, files)}
+        """
+        results = {}
+        visited = set()
+        full_key = FULL_SCAN_KEY + root_path
+        started = time.time()
+        if started - self.cache.get(full_key, 0) >= FULL_SCAN_INTERVAL:
+            full = True
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(
+                    self.scan_dir, os.path.join(root_path, name), visited, full, cancelled
+                ): name
+                for name in names
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                size, files = future.result()
+                results[name] = (size, files)
+                if on_result:
+                    on_result(name, size, files)
+
+        if not (cancelled and cancelled()):
+            # Выбрасываем из кэша каталоги удалённых проектов этого корня
+            prefix = os.path.join(root_path, "")
+            with self._lock:
+                for path in [p for p in self.cache if p.startswith(prefix) and p not in visited]:
+                    del self.cache[path]
+                if full:
+                    self.cache[full_key] = started
+        self.save()
+        return results
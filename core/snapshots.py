@@ -0,0 +1,310 @@
+"""
+Инкрементальные снимки проектов в локальном хранилище по содержимому
+"""
+import os
+import stat
+import time
+import hashlib
+import sqlite3
+import threading
+from core.store import _Transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS manifest (
+    project TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    hash TEXT,
+    PRIMARY KEY (project, path)
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    created REAL NOT NULL,
+    reason TEXT,
+    files INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    stored INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_project ON snapshots (project, created DESC);
+CREATE TABLE IF NOT EXISTS snapshot_files (
+    snapshot INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    mode INTEGER NOT NULL,
+    hash TEXT,
+    link TEXT
+);
+CREATE INDEX IF NOT EXISTS snapshot_files_snapshot ON snapshot_files (snapshot);
+"""
+
+CHUNK_SIZE = 1024 * 1024
+TMP_SUFFIX = ".tmp"
+
+
+class SnapshotCancelled(Exception):
+    pass
+
+
+class Throttle:
+    """Ограничение скорости чтения и записи (байт в секунду, 0 - без ограничения)"""
+    def __init__(self, rate):
+        self.rate = rate
+        self.started = time.monotonic()
+        self.consumed = 0
+
+    def consume(self, size):
+        if not self.rate:
+            return
+        self.consumed += size
+        ahead = self.consumed / self.rate - (time.monotonic() - self.started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+class SnapshotStore:
+    """
+    Для каждого проекта хранится манифест (путь, размер, mtime, хэш)
+    последнего снимка. Новый снимок обходит проект и читает только файлы,
+    у которых размер или mtime отличаются от манифеста; их содержимое
+    кладётся в objects/ под своим хэшем, поэтому одинаковые файлы и
+    неизменные версии хранятся один раз. Если ничего не изменилось,
+    новый снимок не создаётся. Список файлов снимка пишется в SQLite,
+    а запись в хранилище ограничивается по скорости (rate).
+    """
+    def __init__(self, store_dir, ignore=(), rate=0):
+        self.store_dir = str(store_dir)
+        self.objects_dir = os.path.join(self.store_dir, "objects")
+        self.ignore = list(ignore)
+        self.rate = rate
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(os.path.join(self.store_dir, "snapshots.db"), timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA foreign_keys=ON")
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def project_key(project_path):
+        return os.path.normcase(os.path.abspath(project_path))
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def walk(self, project_path, cancelled=None):
+        """Файлы проекта: [(относительный путь через /, lstat)]"""
+        files = []
+        stack = [("", project_path)]
+        while stack:
+            if cancelled and cancelled():
+                raise SnapshotCancelled()
+            rel, path = stack.pop()
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        name = rel + entry.name
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if entry.name not in self.ignore:
+                                    stack.append((name + "/", entry.path))
+                            else:
+                                files.append((name, entry.stat(follow_symlinks=False)))
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return files
+
+    def _store(self, path, throttle, cancelled):
+        """
+        Копирование файла в хранилище с подсчётом хэша за одно чтение
+        Returns: (хэш, сколько байт добавлено в хранилище)
+        """
+        h = hashlib.blake2b(digest_size=32)
+        tmp = os.path.join(self.objects_dir, f"{threading.get_ident()}{TMP_SUFFIX}")
+        size = 0
+        with open(path, "rb") as src, open(tmp, "wb") as dst:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                if cancelled and cancelled():
+                    break
+                h.update(chunk)
+                dst.write(chunk)
+                size += len(chunk)
+                throttle.consume(len(chunk))
+        if cancelled and cancelled():
+            os.remove(tmp)
+            raise SnapshotCancelled()
+        digest = h.hexdigest()
+        target = self.object_path(digest)
+        if os.path.exists(target):
+            os.remove(tmp)
+            return digest, 0
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(tmp, target)
+        return digest, size
+
+    def snapshot(self, project_path, reason="", throttled=True, progress=None, cancelled=None):
+        """
+        Снимок проекта; неизменившиеся файлы не читаются
+        Returns: {id, files, size, changed, stored, new} - new=False, если
+        проект не изменился с прошлого снимка и возвращён он
+        """
+        key = self.project_key(project_path)
+        db = self.connection()
+        with self._lock:
+            known = {path: (size, mtime, digest) for path, size, mtime, digest in db.execute(
+                "SELECT path, size, mtime, hash FROM manifest WHERE project = ?", (key,))}
+            files = self.walk(project_path, cancelled)
+
+            entries, changed = [], []
+            for path, st in files:
+                link = None
+                digest = None
+                if stat.S_ISLNK(st.st_mode):
+                    try:
+                        link = os.readlink(os.path.join(project_path, *path.split("/")))
+                    except OSError:
+                        continue
+                elif not stat.S_ISREG(st.st_mode):
+                    continue
+                else:
+                    entry = known.get(path)
+                    if entry is not None and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                        digest = entry[2]
+                    if digest is None:
+                        changed.append(len(entries))
+                entries.append([path, st.st_size, st.st_mtime_ns, stat.S_IMODE(st.st_mode), digest, link])
+
+            present = {entry[0] for entry in entries if entry[5] is None}
+            removed = [path for path in known if path not in present]
+            last = db.execute("SELECT id, files, size FROM snapshots WHERE project = ? ORDER BY created DESC LIMIT 1",
+                              (key,)).fetchone()
+            if last is not None and not changed and not removed and last[1] == len(entries):
+                return {"id": last[0], "files": last[1], "size": last[2], "changed": 0, "stored": 0, "new": False}
+
+            throttle = Throttle(self.rate if throttled else 0)
+            stored = 0
+            total_bytes = sum(entries[i][1] for i in changed)
+            done_bytes = 0
+            for done, i in enumerate(changed, 1):
+                entry = entries[i]
+                try:
+                    entry[4], added = self._store(os.path.join(project_path, *entry[0].split("/")), throttle, cancelled)
+                    stored += added
+                except OSError:
+                    # Файл исчез или недоступен - в снимок не попадает
+                    entry[0] = None
+                done_bytes += entry[1]
+                if progress:
+                    progress(done, len(changed), f"Снимок: {done_bytes * 100 // max(total_bytes, 1)}%")
+            entries = [entry for entry in entries if entry[0] is not None]
+
+            size = sum(entry[1] for entry in entries)
+            with _Transaction(db):
+                cursor = db.execute(
+                    "INSERT INTO snapshots (project, created, reason, files, size, stored) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, time.time(), reason, len(entries), size, stored)
+                )
+                snapshot_id = cursor.lastrowid
+                db.executemany(
+                    "INSERT INTO snapshot_files (snapshot, path, size, mtime, mode, hash, link) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(snapshot_id, *entry) for entry in entries]
+                )
+                # Манифест меняется только в изменившихся строках
+                db.executemany("DELETE FROM manifest WHERE project = ? AND path = ?",
+                               [(key, path) for path in removed])
+                db.executemany(
+                    "INSERT OR REPLACE INTO manifest (project, path, size, mtime, hash) VALUES (?, ?, ?, ?, ?)",
+                    [(key, path, file_size, mtime, digest)
+                     for path, file_size, mtime, _, digest, link in entries
+                     if link is None and known.get(path) != (file_size, mtime, digest)]
+                )
+            return {"id": snapshot_id, "files": len(entries), "size": size,
+                    "changed": len(changed), "stored": stored, "new": True}
+
+    def snapshots(self, project_path=None):
+        """Снимки проекта (или все) от новых к старым"""
+        if project_path is None:
+            return self._query("", ())
+        return self._query("WHERE project = ?", (self.project_key(project_path),))
+
+    def get(self, snapshot_id):
+        """Снимок по id или None"""
+        rows = self._query("WHERE id = ?", (snapshot_id,))
+        return rows[0] if rows else None
+
+    def _query(self, where, params):
+        columns = ("id", "project", "created", "reason", "files", "size", "stored")
+        rows = self.connection().execute(
+            f"SELECT {', '.join(columns)} FROM snapshots {where} ORDER BY created DESC", params)
+        return [dict(zip(columns, row)) for row in rows]
+
+    def last_created(self, reason):
+        """Время последнего снимка с причиной reason или None"""
+        row = self.connection().execute("SELECT MAX(created) FROM snapshots WHERE reason = ?", (reason,)).fetchone()
+        return row[0]
+
+    def restore(self, snapshot_id, target_path, progress=None, cancelled=None):
+        """Восстановление снимка в новую папку target_path"""
+        db = self.connection()
+        rows = db.execute("SELECT path, size, mtime, mode, hash, link FROM snapshot_files WHERE snapshot = ?",
+                          (snapshot_id,)).fetchall()
+        os.makedirs(target_path)
+        for done, (path, size, mtime, mode, digest, link) in enumerate(rows, 1):
+            if cancelled and cancelled():
+                raise SnapshotCancelled()
+            target = os.path.join(target_path, *path.split("/"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if link is not None:
+                os.symlink(link, target)
+                continue
+            with open(self.object_path(digest), "rb") as src, open(target, "wb") as dst:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    dst.write(chunk)
+            os.chmod(target, mode)
+            os.utime(target, ns=(mtime, mtime))
+            if progress and done % 100 == 0:
+                progress(done, len(rows), "Восстановление снимка")
+        return len(rows)
+
+    def prune(self, project_path, keep):
+        """Удаление старых снимков проекта сверх keep и ненужных объектов"""
+        key = self.project_key(project_path)
+        db = self.connection()
+        with self._lock:
+            ids = [row[0] for row in db.execute(
+                "SELECT id FROM snapshots WHERE project = ? ORDER BY created DESC", (key,))][keep:]
+            if not ids:
+                return 0
+            with _Transaction(db):
+                db.executemany("DELETE FROM snapshots WHERE id = ?", [(i,) for i in ids])
+            return self._collect_garbage()
+
+    def _collect_garbage(self):
+        """Удаление объектов, на которые не ссылается ни один снимок. Returns: байт освобождено"""
+        db = self.connection()
+        referenced = {row[0] for row in db.execute(
+            "SELECT DISTINCT hash FROM snapshot_files WHERE hash IS NOT NULL")}
+        freed = 0
+        for dirpath, _, filenames in os.walk(self.objects_dir):
+            for filename in filenames:
+                if filename in referenced:
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                except OSError:
+                    pass
+        return freed
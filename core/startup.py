@@ -0,0 +1,79 @@
+"""
+Профилировщик запуска: время импортов и этапов инициализации
+"""
+import json
+import time
+import threading
+from contextlib import contextmanager
+from core.trace import Span
+
+
+class StartupProfiler:
+    """
+    Этапы (phase) и отметки (mark) отсчитываются от импорта этого модуля -
+    app.py импортирует его первым. Повторная отметка с тем же именем
+    не перезаписывает первую: важно время до первого появления.
+    """
+    def __init__(self):
+        self.origin_ns = time.perf_counter_ns()
+        self.phases = []
+        self.marks = {}
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self, ns=None):
+        return ((ns or time.perf_counter_ns()) - self.origin_ns) / 1e6
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            with self._lock:
+                self.phases.append((name, start, end))
+
+    def mark(self, name):
+        with self._lock:
+            self.marks.setdefault(name, time.perf_counter_ns())
+
+    def report(self):
+        """Returns: {phases: [{name, start_ms, duration_ms}], marks: {имя: мс от старта}}"""
+        with self._lock:
+            phases = list(self.phases)
+            marks = dict(self.marks)
+        return {
+            "phases": [{"name": name, "start_ms": round(self.elapsed_ms(start), 2),
+                        "duration_ms": round((end - start) / 1e6, 2)} for name, start, end in phases],
+            "marks": {name: round(self.elapsed_ms(ns), 2) for name, ns in sorted(marks.items(), key=lambda i: i[1])},
+        }
+
+    def format(self):
+        """Отчёт текстом для консоли"""
+        report = self.report()
+        lines = [f"{'этап':40} {'начало, мс':>12} {'длит., мс':>12}"]
+        for item in report["phases"]:
+            lines.append(f"{item['name']:40} {item['start_ms']:>12.1f} {item['duration_ms']:>12.1f}")
+        for name, at in report["marks"].items():
+            lines.append(f"{name:40} {at:>12.1f}")
+        return "\n".join(lines)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+    def to_tracer(self, tracer):
+        """Этапы запуска - в буфер трассировки (видны в окне «Диагностика»)"""
+        if not tracer.enabled:
+            return
+        with self._lock:
+            phases = list(self.phases)
+        for name, start, end in phases:
+            span = Span(tracer, f"startup.{name}", {})
+            span.start_ns = start
+            span.duration_ns = end - start
+            span.thread = threading.get_ident()
+            tracer.buffer.append(span)
+
+
+profiler = StartupProfiler()
@@ -0,0 +1,238 @@
+"""
+Хранилище настроек и метаданных проектов (SQLite в режиме WAL)
+"""
+import os
+import json
+import atexit
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL,
+    name TEXT NOT NULL,
+    created_at REAL,
+    last_opened REAL,
+    template TEXT,
+    size INTEGER,
+    files INTEGER,
+    UNIQUE (root, name)
+);
+CREATE INDEX IF NOT EXISTS projects_recent ON projects (root, last_opened DESC);
+CREATE INDEX IF NOT EXISTS projects_created ON projects (root, created_at DESC);
+CREATE INDEX IF NOT EXISTS projects_size ON projects (root, size DESC);
+CREATE TABLE IF NOT EXISTS tags (
+    project_id INTEGER NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, project_id)
+);
+CREATE INDEX IF NOT EXISTS tags_project ON tags (project_id);
+"""
+
+PROJECT_FIELDS = ("created_at", "last_opened", "template", "size", "files")
+# Отметка в очереди: перед вставкой удалить прежнюю строку проекта вместе с тегами
+REPLACE = "replace"
+
+ORDERS = {
+    "name": "p.name",
+    "recent": "p.last_opened DESC, p.name",
+    "created": "p.created_at DESC, p.name",
+    "size": "p.size DESC, p.name",
+}
+
+
+class ProjectStore:
+    """
+    Настройки и метаданные проектов в одном файле SQLite.
+    Каждый поток работает через своё соединение. Частые мелкие
+    обновления (размеры, время открытия) складываются в очередь,
+    сливаются по проекту и записываются одной транзакцией.
+    """
+    FLUSH_DELAY = 1.0
+    FLUSH_THRESHOLD = 500
+
+    def __init__(self, db_file):
+        self.db_file = str(db_file)
+        self._local = threading.local()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._timer = None
+        self.connection().executescript(SCHEMA)
+        atexit.register(self.flush)
+
+    def connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA foreign_keys=ON")
+            self._local.db = db
+        return db
+
+    def transaction(self):
+        return _Transaction(self.connection())
+
+    # --- Настройки ---
+
+    def load_settings(self):
+        """Все настройки: {key: value}"""
+        rows = self.connection().execute("SELECT key, value FROM settings").fetchall()
+        return {row["key"]: json.loads(row["value"]) for row in rows}
+
+    def save_settings(self, settings):
+        """Атомарная запись настроек одной транзакцией"""
+        with self.transaction() as db:
+            db.executemany(
+                "INSERT INTO settings (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in settings.items()]
+            )
+
+    # --- Метаданные проектов ---
+
+    def update_project(self, root, name, **fields):
+        """Отложенное обновление полей проекта (сливается с другими обновлениями)"""
+        root = os.path.normpath(root)
+        fields = {key: value for key, value in fields.items() if key in PROJECT_FIELDS}
+        with self._pending_lock:
+            key = (root, name)
+            if key not in self._pending:
+                self._pending[key] = {}
+            elif self._pending[key] is None:
+                # Проект удалён в этой же пачке: удаление не должно потеряться
+                self._pending[key] = {REPLACE: True}
+            self._pending[key].update(fields)
+            full = self._schedule_flush()
+        if full:
+            self.flush()
+
+    def remove_project(self, root, name):
+        """Отложенное удаление метаданных проекта"""
+        root = os.path.normpath(root)
+        with self._pending_lock:
+            self._pending[(root, name)] = None
+            full = self._schedule_flush()
+        if full:
+            self.flush()
+
+    def _schedule_flush(self):
+        """Запуск таймера записи (под _pending_lock). Returns: пора ли писать сразу"""
+        if len(self._pending) >= self.FLUSH_THRESHOLD:
+            return True
+        if self._timer is None:
+            self._timer = threading.Timer(self.FLUSH_DELAY, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+        return False
+
+    def flush(self):
+        """Запись накопленных обновлений одной транзакцией"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return
+        with self.transaction() as db:
+            for (root, name), fields in pending.items():
+                if fields is None or fields.pop(REPLACE, False):
+                    db.execute("DELETE FROM projects WHERE root = ? AND name = ?", (root, name))
+                if fields is None:
+                    continue
+                db.execute(
+                    "INSERT INTO projects (root, name) VALUES (?, ?) ON CONFLICT (root, name) DO NOTHING",
+                    (root, name)
+                )
+                if fields:
+                    assignments = ", ".join(f"{key} = ?" for key in fields)
+                    db.execute(
+                        f"UPDATE projects SET {assignments} WHERE root = ? AND name = ?",
+                        list(fields.values()) + [root, name]
+                    )
+
+    def move_root(self, old_root, new_root):
+        """Перенос метаданных при смене корневой папки"""
+        old_root, new_root = os.path.normpath(old_root), os.path.normpath(new_root)
+        self.flush()
+        with self.transaction() as db:
+            db.execute("DELETE FROM projects WHERE root = ? AND name IN "
+                       "(SELECT name FROM projects WHERE root = ?)", (new_root, old_root))
+            db.execute("UPDATE projects SET root = ? WHERE root = ?", (new_root, old_root))
+
+    def set_tags(self, root, name, tags):
+        """Замена тегов проекта"""
+        root = os.path.normpath(root)
+        self.flush()
+        with self.transaction() as db:
+            db.execute(
+                "INSERT INTO projects (root, name) VALUES (?, ?) ON CONFLICT (root, name) DO NOTHING",
+                (root, name)
+            )
+            project_id = db.execute(
+                "SELECT id FROM projects WHERE root = ? AND name = ?", (root, name)
+            ).fetchone()["id"]
+            db.execute("DELETE FROM tags WHERE project_id = ?", (project_id,))
+            db.executemany(
+                "INSERT OR IGNORE INTO tags (project_id, tag) VALUES (?, ?)",
+                [(project_id, tag) for tag in tags]
+            )
+
+    def get_project(self, root, name):
+        """Метаданные проекта или None"""
+        root = os.path.normpath(root)
+        self.flush()
+        row = self.connection().execute(
+            "SELECT * FROM projects WHERE root = ? AND name = ?", (root, name)
+        ).fetchone()
+        if row is None:
+            return None
+        project = dict(row)
+        project["tags"] = [r["tag"] for r in self.connection().execute(
+            "SELECT tag FROM tags WHERE project_id = ? ORDER BY tag", (row["id"],)
+        )]
+        return project
+
+    def query_projects(self, root, order="name", tag=None, limit=None):
+        """
+        Выборка проектов корня по индексу
+        order: name | recent | created | size
+        Returns: список dict
+        """
+        root = os.path.normpath(root)
+        self.flush()
+        sql = "SELECT p.* FROM projects p"
+        params = []
+        if tag:
+            sql += " JOIN tags t ON t.project_id = p.id AND t.tag = ?"
+            params.append(tag)
+        sql += " WHERE p.root = ?"
+        params.append(root)
+        if order == "recent":
+            sql += " AND p.last_opened IS NOT NULL"
+        sql += f" ORDER BY {ORDERS.get(order, ORDERS['name'])}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.connection().execute(sql, params)]
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT / ROLLBACK"""
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        return False
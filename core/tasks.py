@@ -0,0 +1,277 @@
+"""
+Асинхронный слой над ProjectManager - операции выполняются в пуле потоков
+"""
+import time
+import threading
+from core import trace
+from core.workspace import PRIMARY_ROOT
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+
+class Job(QObject):
+    """Дескриптор фоновой операции: прогресс, отмена и завершение"""
+    progress = pyqtSignal(int, int, str)
+    partial = pyqtSignal(object)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+        self.result = None
+        self.done = False
+        self.submitted = time.perf_counter()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Запросить отмену (операция проверяет флаг между шагами)"""
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def report(self, done, total, text=""):
+        """Сообщить о прогрессе (вызывается из рабочего потока)"""
+        self.progress.emit(done, total, text)
+
+    def report_partial(self, result):
+        """Передать промежуточный результат (вызывается из рабочего потока)"""
+        self.partial.emit(result)
+
+
+class _JobRunnable(QRunnable):
+    def __init__(self, job, func):
+        super().__init__()
+        self.job = job
+        self.func = func
+
+    def run(self):
+        # Время в очереди пула - отдельный счётчик интервала задачи
+        waited_ms = (time.perf_counter() - self.job.submitted) * 1000
+        try:
+            with trace.span(f"job.{self.job.name}", queue_ms=round(waited_ms, 3)):
+                result = self.func(self.job)
+        except Exception as e:
+            self.job.done = True
+            self.job.failed.emit(str(e))
+            return
+        self.job.result = result
+        self.job.done = True
+        self.job.finished.emit(result)
+
+
+class TaskManager(QObject):
+    """
+    Неблокирующий фасад над ProjectManager.
+    Каждый метод сразу возвращает Job; изменяющие операции выполняются
+    по одной в порядке запуска в отдельной очереди из одного потока,
+    чтобы не конкурировать за корневую папку и не занимать общий пул.
+    """
+    job_started = pyqtSignal(object)
+
+    def __init__(self, manager, max_workers=4):
+        super().__init__()
+        self.manager = manager
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_workers)
+        self.write_pool = QThreadPool()
+        self.write_pool.setMaxThreadCount(1)
+        self.jobs = set()
+
+    def submit(self, name, func, exclusive=False):
+        """
+        Запуск func(job) в пуле потоков (exclusive - в очереди изменяющих операций)
+        Returns: Job
+        """
+        job = Job(name)
+        self.jobs.add(job)
+        job.finished.connect(lambda _, j=job: self.jobs.discard(j))
+        job.failed.connect(lambda _, j=job: self.jobs.discard(j))
+        pool = self.write_pool if exclusive else self.pool
+        # Запуск откладывается до возврата в цикл событий, чтобы вызывающий
+        # код успел подключиться к сигналам Job
+        runnable = _JobRunnable(job, func)
+        QTimer.singleShot(0, lambda: pool.start(runnable))
+        self.job_started.emit(job)
+        return job
+
+    def create_project(self, project_name, template=None):
+        return self.submit(
+            "create_project",
+            lambda job: self.manager.create_project(project_name, template),
+            exclusive=True
+        )
+
+    def provision_env(self, project_path):
+        return self.submit(
+            "provision_env",
+            lambda job: self.manager.provision_env(
+                project_path, progress=job.report, cancelled=job.is_cancelled
+            )
+        )
+
+    def delete_project(self, project_name, root=None):
+        return self.submit(
+            "delete_project",
+            lambda job: self.manager.delete_project(project_name, root),
+            exclusive=True
+        )
+
+    def batch_projects(self, action, items, target_root=None):
+        return self.submit(
+            "batch_projects",
+            lambda job: self.manager.batch_projects(
+                action, items, target_root, progress=job.report, cancelled=job.is_cancelled
+            ),
+            exclusive=True
+        )
+
+    def restore_project(self, item_id, project_name=None):
+        return self.submit(
+            "restore_project",
+            lambda job: self.manager.restore_project(item_id, project_name),
+            exclusive=True
+        )
+
+    def archive_project(self, project_name, root=None):
+        return self.submit(
+            "archive_project",
+            lambda job: self.manager.archive_project(
+                project_name, root, progress=job.report, cancelled=job.is_cancelled
+            ),
+            exclusive=True
+        )
+
+    def restore_archived(self, project_name, root=None):
+        return self.submit(
+            "restore_archived",
+            lambda job: self.manager.restore_archived(
+                project_name, root, progress=job.report, cancelled=job.is_cancelled
+            ),
+            exclusive=True
+        )
+
+    def open_project_folder(self, project_path):
+        """Открытие проекта, который может понадобиться восстановить из архива"""
+        return self.submit(
+            "open_project_folder",
+            lambda job: self.manager.open_project_folder(
+                project_path, progress=job.report, cancelled=job.is_cancelled
+            ),
+            exclusive=True
+        )
+
+    def find_importable(self, tree):
+        """Промежуточные результаты: (путь проекта, маркеры)"""
+        return self.submit(
+            "find_importable",
+            lambda job: self.manager.find_importable(
+                tree, on_found=lambda path, markers: job.report_partial((path, markers)),
+                progress=job.report, cancelled=job.is_cancelled
+            )
+        )
+
+    def import_projects(self, paths, move=False):
+        return self.submit(
+            "import_projects",
+            lambda job: self.manager.import_projects(
+                paths, move, progress=job.report, cancelled=job.is_cancelled
+            ),
+            exclusive=True
+        )
+
+    def get_projects(self):
+        return self.submit("get_projects", lambda job: self.manager.get_projects())
+
+    def get_workspace(self):
+        return self.submit("get_workspace", lambda job: self.manager.get_workspace())
+
+    def change_root_path(self, new_path, move_projects=True):
+        return self.submit(
+            "change_root_path",
+            lambda job: self.manager.change_root_path(
+                new_path, move_projects,
+                progress=job.report, cancelled=job.is_cancelled
+            ),
+            exclusive=True
+        )
+
+    def scan_sizes(self, full=False, root=None):
+        """Промежуточные результаты: ((имя, метка папки), размер, файлов)"""
+        label = root or PRIMARY_ROOT
+        return self.submit(
+            "scan_sizes",
+            lambda job: self.manager.scan_sizes(
+                on_result=lambda name, size, files: job.report_partial(((name, label), size, files)),
+                full=full, cancelled=job.is_cancelled, root=root
+            )
+        )
+
+    def scan_git(self, full=False, root=None):
+        """Промежуточные результаты: ((имя, метка папки), состояние git)"""
+        label = root or PRIMARY_ROOT
+        return self.submit(
+            "scan_git",
+            lambda job: self.manager.scan_git(
+                on_result=lambda name, state: job.report_partial(((name, label), state)),
+                full=full, cancelled=job.is_cancelled, root=root
+            )
+        )
+
+    def git_state(self, project_name, root=None):
+        return self.submit("git_state", lambda job: self.manager.git_state(project_name, root))
+
+    def git_states_of(self, items):
+        return self.submit(
+            "git_states_of",
+            lambda job: self.manager.git_states_of(items, cancelled=job.is_cancelled)
+        )
+
+    def snapshot_projects(self):
+        """Снимки по расписанию: с ограничением скорости, не блокируя изменяющие операции"""
+        return self.submit(
+            "snapshot_projects",
+            lambda job: self.manager.snapshot_projects(progress=job.report, cancelled=job.is_cancelled)
+        )
+
+    def restore_snapshot(self, snapshot_id):
+        return self.submit(
+            "restore_snapshot",
+            lambda job: self.manager.restore_snapshot(
+                snapshot_id, progress=job.report, cancelled=job.is_cancelled
+            ),
+            exclusive=True
+        )
+
+    def update_code_index(self):
+        return self.submit(
+            "update_code_index",
+            lambda job: self.manager.update_code_index(progress=job.report, cancelled=job.is_cancelled),
+            exclusive=True
+        )
+
+    def search_code(self, query):
+        return self.submit(
+            "search_code",
+            lambda job: self.manager.search_code(query, cancelled=job.is_cancelled)
+        )
+
+    def find_duplicates(self):
+        return self.submit(
+            "find_duplicates",
+            lambda job: self.manager.find_duplicates(progress=job.report, cancelled=job.is_cancelled)
+        )
+
+    def deduplicate(self, report=None):
+        return self.submit(
+            "deduplicate",
+            lambda job: self.manager.deduplicate(report, progress=job.report, cancelled=job.is_cancelled),
+            exclusive=True
+        )
+
+    def shutdown(self):
+        """Отменить активные операции и дождаться завершения пула"""
+        for job in list(self.jobs):
+            job.cancel()
+        self.pool.waitForDone()
+        self.write_pool.waitForDone()
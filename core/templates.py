@@ -0,0 +1,295 @@
+"""
+Шаблоны проектов и их кэш с хранением по содержимому
+"""
+import os
+import sys
+import json
+import stat
+import shutil
+import hashlib
+import threading
+from fnmatch import fnmatch
+
+PLACEHOLDER_NAME = "{{project_name}}"
+PLACEHOLDER_PACKAGE = "{{package_name}}"
+
+BUILTIN_TEMPLATES = {
+    "empty": {
+        "title": "Пустой проект (app.py)",
+        "files": {
+            "app.py": "",
+        },
+    },
+    "package": {
+        "title": "Пакет (pyproject, src, tests)",
+        "files": {
+            "pyproject.toml": (
+                "[build-system]\n"
+                "requires = [\"setuptools>=61\"]\n"
+                "build-backend = \"setuptools.build_meta\"\n"
+                "\n"
+                "[project]\n"
+                "name = \"{{project_name}}\"\n"
+                "version = \"0.1.0\"\n"
+                "requires-python = \">=3.9\"\n"
+                "dependencies = []\n"
+            ),
+            "README.md": "# {{project_name}}\n",
+            ".gitignore": "__pycache__/\n*.py[cod]\n.venv/\ndist/\n*.egg-info/\n",
+            "src/{{package_name}}/__init__.py": "",
+            "src/{{package_name}}/__main__.py": (
+                "def main():\n"
+                "    pass\n"
+                "\n"
+                "\n"
+                "if __name__ == \"__main__\":\n"
+                "    main()\n"
+            ),
+            "tests/__init__.py": "",
+            "tests/test_{{package_name}}.py": (
+                "import {{package_name}}\n"
+                "\n"
+                "\n"
+                "def test_import():\n"
+                "    assert {{package_name}}\n"
+            ),
+        },
+    },
+}
+
+# Файлы, которые никто не правит на месте (pip удаляет и пишет заново),
+# поэтому их можно раздавать жёсткими ссылками на объект кэша
+HARDLINK_SAFE = ["*/site-packages/*", "*.pyc", "*.pyd", "*.so", "*.dll", "*.whl"]
+
+
+def package_name(project_name):
+    """Имя пакета Python из названия проекта"""
+    name = "".join(c if c.isalnum() else "_" for c in project_name.lower()).strip("_")
+    if not name or name[0].isdigit():
+        name = f"project_{name}"
+    return name
+
+
+def render(text, project_name):
+    return (text
+            .replace(PLACEHOLDER_NAME, project_name)
+            .replace(PLACEHOLDER_PACKAGE, package_name(project_name)))
+
+
+def reflink(src, dst):
+    """Копия с общими блоками (copy-on-write). Returns: True при успехе"""
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    FICLONE = 0x40049409
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return True
+    except OSError:
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        return False
+
+
+class LinkCopier:
+    """
+    Материализация файла из кэша: reflink, где ФС его умеет,
+    жёсткая ссылка для неизменяемых файлов, иначе обычное копирование.
+    Неудачные reflink/link запоминаются по устройству, чтобы не повторять.
+    """
+    def __init__(self, hardlink_safe=None):
+        self.hardlink_safe = HARDLINK_SAFE if hardlink_safe is None else hardlink_safe
+        self._no_reflink = set()
+        self._no_hardlink = set()
+
+    def can_hardlink(self, rel_path):
+        rel_path = "/" + rel_path.replace(os.sep, "/")
+        return any(fnmatch(rel_path, pattern) for pattern in self.hardlink_safe)
+
+    def copy(self, src, dst, rel_path, mode=None):
+        """Returns: "reflink" | "hardlink" | "copy" """
+        device = os.stat(os.path.dirname(dst)).st_dev
+        if device not in self._no_reflink:
+            if reflink(src, dst):
+                if mode is not None:
+                    os.chmod(dst, mode)
+                return "reflink"
+            self._no_reflink.add(device)
+
+        if device not in self._no_hardlink and self.can_hardlink(rel_path):
+            try:
+                os.link(src, dst)
+                return "hardlink"
+            except OSError:
+                self._no_hardlink.add(device)
+
+        shutil.copyfile(src, dst)
+        if mode is not None:
+            os.chmod(dst, mode)
+        return "copy"
+
+
+class TemplateStore:
+    """
+    Встроенные шаблоны и пользовательские папки из app_folder/templates.
+    Пользовательский шаблон один раз импортируется в кэш: содержимое
+    файлов хранится по SHA-256 (одинаковые файлы разных шаблонов - один
+    объект), рядом лежит манифест. Кэш обновляется, когда меняется путь,
+    размер или mtime любого файла шаблона, либо явно через refresh().
+    """
+    def __init__(self, app_folder):
+        self.templates_dir = os.path.join(app_folder, "templates")
+        self.cache_dir = os.path.join(app_folder, "template_cache")
+        self.objects_dir = os.path.join(self.cache_dir, "objects")
+        self.manifests_dir = os.path.join(self.cache_dir, "manifests")
+        self.copier = LinkCopier()
+        self._lock = threading.Lock()
+
+    def templates(self):
+        """Список шаблонов: [(id, название)]"""
+        result = [(name, t["title"]) for name, t in BUILTIN_TEMPLATES.items()]
+        if os.path.isdir(self.templates_dir):
+            for entry in sorted(os.scandir(self.templates_dir), key=lambda e: e.name):
+                if entry.is_dir() and entry.name not in BUILTIN_TEMPLATES:
+                    result.append((entry.name, entry.name))
+        return result
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def manifest_path(self, name):
+        return os.path.join(self.manifests_dir, f"{name}.json")
+
+    def store_object(self, path):
+        """Помещение файла в кэш. Returns: sha256 содержимого"""
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        target = self.object_path(digest)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_target = f"{target}.{threading.get_ident()}.tmp"
+            shutil.copyfile(path, tmp_target)
+            os.replace(tmp_target, target)
+        return digest
+
+    @staticmethod
+    def needs_render(path, source_dir):
+        """Текстовый файл с плейсхолдерами или абсолютным путём шаблона"""
+        if os.path.getsize(path) > 1024 * 1024:
+            return False
+        with open(path, "rb") as f:
+            data = f.read()
+        return (PLACEHOLDER_NAME.encode() in data
+                or PLACEHOLDER_PACKAGE.encode() in data
+                or os.fsencode(source_dir) in data)
+
+    @staticmethod
+    def signature(source_dir):
+        """
+        Подпись дерева шаблона по (путь, размер, mtime) всех элементов:
+        mtime корня не меняется при правке вложенных файлов
+        """
+        h = hashlib.sha256()
+        for dirpath, dirnames, filenames in os.walk(source_dir):
+            dirnames.sort()
+            for filename in sorted(filenames + dirnames):
+                path = os.path.join(dirpath, filename)
+                st = os.lstat(path)
+                h.update(f"{os.path.relpath(path, source_dir)}\0{st.st_size}\0{st.st_mtime_ns}\n".encode(
+                    "utf-8", "surrogateescape"))
+        return h.hexdigest()
+
+    def refresh(self, name):
+        """Импорт пользовательского шаблона в кэш"""
+        source_dir = os.path.join(self.templates_dir, name)
+        # Подпись снимается до чтения: правка во время импорта даст новый импорт
+        signature = self.signature(source_dir)
+        files, dirs, links = [], [], []
+        for dirpath, dirnames, filenames in os.walk(source_dir):
+            rel_dir = os.path.relpath(dirpath, source_dir)
+            for dirname in dirnames:
+                full = os.path.join(dirpath, dirname)
+                rel = os.path.normpath(os.path.join(rel_dir, dirname))
+                if os.path.islink(full):
+                    links.append({"path": rel, "target": os.readlink(full), "dir": True})
+                else:
+                    dirs.append(rel)
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                rel = os.path.normpath(os.path.join(rel_dir, filename))
+                if os.path.islink(full):
+                    links.append({"path": rel, "target": os.readlink(full), "dir": False})
+                    continue
+                files.append({
+                    "path": rel,
+                    "hash": self.store_object(full),
+                    "mode": stat.S_IMODE(os.stat(full).st_mode),
+                    "render": self.needs_render(full, source_dir),
+                })
+
+        manifest = {
+            "signature": signature,
+            "source_dir": source_dir,
+            "dirs": dirs,
+            "files": files,
+            "links": links,
+        }
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        tmp_file = self.manifest_path(name) + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_file, self.manifest_path(name))
+        return manifest
+
+    def load_manifest(self, name):
+        """Манифест из кэша; импорт заново, если шаблон изменился"""
+        source_dir = os.path.join(self.templates_dir, name)
+        with self._lock:
+            try:
+                with open(self.manifest_path(name), "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                if manifest["signature"] == self.signature(source_dir):
+                    return manifest
+            except (OSError, ValueError, KeyError):
+                pass
+            return self.refresh(name)
+
+    def materialize(self, name, project_path, project_name):
+        """Создание содержимого проекта из шаблона"""
+        if name in BUILTIN_TEMPLATES:
+            for rel, content in BUILTIN_TEMPLATES[name]["files"].items():
+                target = os.path.join(project_path, render(rel, project_name))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "w", encoding="utf-8") as f:
+                    f.write(render(content, project_name))
+            return
+
+        if not os.path.isdir(os.path.join(self.templates_dir, name)):
+            raise FileNotFoundError(f"Шаблон '{name}' не найден")
+
+        manifest = self.load_manifest(name)
+        source_dir = manifest["source_dir"]
+        for rel in manifest["dirs"]:
+            os.makedirs(os.path.join(project_path, render(rel, project_name)), exist_ok=True)
+        for item in manifest["files"]:
+            target = os.path.join(project_path, render(item["path"], project_name))
+            obj = self.object_path(item["hash"])
+            if item["render"]:
+                with open(obj, "rb") as f:
+                    data = f.read()
+                data = data.replace(os.fsencode(source_dir), os.fsencode(project_path))
+                data = render(data.decode("utf-8", "surrogateescape"), project_name)
+                with open(target, "wb") as f:
+                    f.write(data.encode("utf-8", "surrogateescape"))
+                os.chmod(target, item["mode"])
+            else:
+                self.copier.copy(obj, target, item["path"], item["mode"])
+        for item in manifest["links"]:
+            target = os.path.join(project_path, render(item["path"], project_name))
+            os.symlink(item["target"], target, target_is_directory=item["dir"])
@@ -0,0 +1,208 @@
+"""
+Трассировка операций: интервалы времени и счётчики в кольцевом буфере
+"""
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+
+
+class Span:
+    """Интервал операции: время, поток, результат и счётчики (files, bytes...)"""
+    __slots__ = ("tracer", "name", "start_ns", "duration_ns", "thread", "ok", "error", "fields")
+
+    def __init__(self, tracer, name, fields):
+        self.tracer = tracer
+        self.name = name
+        self.fields = fields
+        self.start_ns = 0
+        self.duration_ns = 0
+        self.thread = 0
+        self.ok = True
+        self.error = None
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def add(self, **fields):
+        """Прибавить к счётчикам интервала"""
+        for key, value in fields.items():
+            self.fields[key] = self.fields.get(key, 0) + value
+
+    def fail(self, error):
+        self.ok = False
+        self.error = str(error)
+
+    def __enter__(self):
+        self.thread = threading.get_ident()
+        self.tracer._stack().append(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ns = time.perf_counter_ns() - self.start_ns
+        if exc_type is not None:
+            self.fail(f"{exc_type.__name__}: {exc}")
+        self.tracer._stack().pop()
+        self.tracer.buffer.append(self)
+        return False
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "start_us": (self.start_ns - self.tracer.origin_ns) // 1000,
+            "duration_us": self.duration_ns // 1000,
+            "thread": self.thread,
+            "ok": self.ok,
+            "error": self.error,
+            "fields": self.fields,
+        }
+
+
+class _NullSpan:
+    """Интервал выключенной трассировки - ничего не делает"""
+    def set(self, **fields):
+        pass
+
+    def add(self, **fields):
+        pass
+
+    def fail(self, error):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Завершённые интервалы складываются в deque(maxlen): append атомарен
+    под GIL, поэтому запись идёт без блокировок, а старые интервалы
+    вытесняются новыми. Выключенный трассировщик возвращает общий пустой
+    интервал и ничего не измеряет.
+    """
+    def __init__(self, capacity=10000):
+        self.enabled = False
+        self.buffer = deque(maxlen=capacity)
+        self.origin_ns = time.perf_counter_ns()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, **fields):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, fields)
+
+    def current(self):
+        """Открытый интервал текущего потока"""
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else NULL_SPAN
+
+    def add(self, **fields):
+        """Прибавить к счётчикам открытого интервала текущего потока"""
+        if self.enabled:
+            self.current().add(**fields)
+
+    def records(self):
+        return list(self.buffer)
+
+    def clear(self):
+        self.buffer.clear()
+
+    def summary(self):
+        """
+        Сводка по операциям
+        Returns: {name: {count, errors, total_ms, p50_ms, p95_ms, max_ms, счётчики...}}
+        """
+        durations = {}
+        result = {}
+        for span in self.records():
+            item = result.setdefault(span.name, {"count": 0, "errors": 0, "total_ms": 0.0})
+            item["count"] += 1
+            if not span.ok:
+                item["errors"] += 1
+            item["total_ms"] += span.duration_ns / 1e6
+            durations.setdefault(span.name, []).append(span.duration_ns / 1e6)
+            for key, value in span.fields.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    item[key] = item.get(key, 0) + value
+        for name, values in durations.items():
+            values.sort()
+            result[name]["p50_ms"] = values[len(values) // 2]
+            result[name]["p95_ms"] = values[min(len(values) - 1, len(values) * 95 // 100)]
+            result[name]["max_ms"] = values[-1]
+        return result
+
+    def export_jsonl(self, path):
+        """Интервалы построчно в JSON. Returns: число записей"""
+        records = self.records()
+        with open(path, "w", encoding="utf-8") as f:
+            for span in records:
+                f.write(json.dumps(span.as_dict(), ensure_ascii=False, default=str) + "\n")
+        return len(records)
+
+    def export_chrome(self, path):
+        """Формат Chrome Trace (chrome://tracing, Perfetto). Returns: число записей"""
+        records = self.records()
+        pid = os.getpid()
+        events = []
+        for span in records:
+            args = dict(span.fields)
+            if not span.ok:
+                args["error"] = span.error
+            events.append({
+                "name": span.name,
+                "cat": span.name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (span.start_ns - self.origin_ns) / 1000,
+                "dur": span.duration_ns / 1000,
+                "pid": pid,
+                "tid": span.thread,
+                "args": args,
+            })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False, default=str)
+        return len(records)
+
+
+tracer = Tracer()
+
+
+def span(name, **fields):
+    return tracer.span(name, **fields)
+
+
+def add(**fields):
+    tracer.add(**fields)
+
+
+def traced(name):
+    """
+    Декоратор: вызов записывается интервалом name. Ответ вида
+    (False, сообщение, ...) считается ошибкой операции
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name) as current:
+                result = func(*args, **kwargs)
+                if isinstance(result, tuple) and len(result) > 1 and result[0] is False:
+                    current.fail(result[1])
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,206 @@
+"""
+Корзина проектов - мгновенное удаление и фоновая очистка
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import threading
+from core import trace
+from core.importer import is_link, remove_link
+
+TRASH_DIR_NAME = ".trash"
+
+
+class Trash:
+    """
+    Скрытая папка корзины внутри корневой папки (тот же том),
+    поэтому удаление проекта - это один os.rename
+    """
+    def __init__(self, root_path):
+        self.root_path = root_path
+        self._lock = threading.RLock()
+
+    @property
+    def trash_dir(self):
+        return os.path.join(self.root_path, TRASH_DIR_NAME)
+
+    @property
+    def manifest_file(self):
+        return os.path.join(self.trash_dir, "trash.json")
+
+    def set_root(self, root_path):
+        with self._lock:
+            self.root_path = root_path
+
+    def ensure_trash_exists(self):
+        """Создание скрытой папки корзины"""
+        if os.path.isdir(self.trash_dir):
+            return
+        os.makedirs(self.trash_dir, exist_ok=True)
+        if sys.platform == "win32":
+            import ctypes
+            FILE_ATTRIBUTE_HIDDEN = 0x02
+            ctypes.windll.kernel32.SetFileAttributesW(self.trash_dir, FILE_ATTRIBUTE_HIDDEN)
+
+    def _load(self):
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, manifest):
+        tmp_file = self.manifest_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_file, self.manifest_file)
+
+    def move(self, project_name):
+        """
+        Перемещение проекта в корзину
+        Returns: item_id
+        """
+        with self._lock:
+            self.ensure_trash_exists()
+            item_id = f"{project_name}.{time.time_ns()}"
+            os.rename(
+                os.path.join(self.root_path, project_name),
+                os.path.join(self.trash_dir, item_id)
+            )
+            manifest = self._load()
+            manifest[item_id] = {"name": project_name, "deleted_at": time.time()}
+            self._save(manifest)
+            return item_id
+
+    def items(self):
+        """Содержимое корзины, новые сверху (удаляемые сейчас - с отметкой purging)"""
+        with self._lock:
+            manifest = self._load()
+        items = [dict(item, id=item_id) for item_id, item in manifest.items()]
+        return sorted(items, key=lambda item: item["deleted_at"], reverse=True)
+
+    def restore(self, item_id, project_name=None):
+        """
+        Восстановление проекта из корзины
+        Returns: имя восстановленного проекта
+        """
+        with self._lock:
+            manifest = self._load()
+            if item_id not in manifest or manifest[item_id].get("purging"):
+                # Элемент, который уже начали удалять, наполовину пуст
+                raise KeyError(item_id)
+            name = project_name or manifest[item_id]["name"]
+            target = os.path.join(self.root_path, name)
+            if os.path.exists(target):
+                raise FileExistsError(target)
+            os.rename(os.path.join(self.trash_dir, item_id), target)
+            del manifest[item_id]
+            self._save(manifest)
+            return name
+
+    def expired(self, retention_days):
+        """Идентификаторы элементов старше срока хранения и недоудалённых"""
+        deadline = time.time() - retention_days * 86400
+        return [item["id"] for item in self.items() if item["deleted_at"] <= deadline or item.get("purging")]
+
+    def purge_item(self, item_id, batch_size=500, pause=0.05, should_stop=None):
+        """
+        Физическое удаление элемента корзины пачками файлов с паузами,
+        чтобы не забивать диск. Returns: True, если элемент удалён полностью
+        """
+        path = os.path.join(self.trash_dir, item_id)
+        removed = 0
+        # Отметка ставится под блокировкой до удаления файлов: restore такой
+        # элемент не вернёт, а после прерывания удаление продолжится
+        with self._lock:
+            manifest = self._load()
+            if item_id in manifest and not manifest[item_id].get("purging"):
+                manifest[item_id]["purging"] = True
+                self._save(manifest)
+        if is_link(path):
+            # Проект, импортированный ссылкой: удаляется только ссылка
+            remove_link(path)
+        for dirpath, dirnames, filenames in os.walk(path):
+            # Ссылки и junction удаляются сами, внутрь обход не спускается
+            links = [name for name in dirnames if is_link(os.path.join(dirpath, name))]
+            dirnames[:] = [name for name in dirnames if name not in links]
+            for name in links:
+                try:
+                    remove_link(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+            for filename in filenames:
+                try:
+                    os.unlink(os.path.join(dirpath, filename))
+                except OSError:
+                    pass
+                removed += 1
+                if removed % batch_size == 0:
+                    if should_stop and should_stop():
+                        return False
+                    time.sleep(pause)
+        shutil.rmtree(path, ignore_errors=True)
+        trace.add(files=removed)
+        if os.path.lexists(path):
+            return False
+        with self._lock:
+            manifest = self._load()
+            manifest.pop(item_id, None)
+            self._save(manifest)
+        return True
+
+    def purge_expired(self, retention_days, should_stop=None):
+        """Очистка элементов с истёкшим сроком хранения"""
+        purged = 0
+        for item_id in self.expired(retention_days):
+            if should_stop and should_stop():
+                break
+            if self.purge_item(item_id, should_stop=should_stop):
+                purged += 1
+        return purged
+
+
+def lower_thread_priority():
+    """Понизить приоритет текущего потока (CPU и, на Windows, ввод-вывод)"""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+        elif hasattr(os, "setpriority"):
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except Exception:
+        pass
+
+
+class TrashPurger(threading.Thread):
+    """Фоновый поток, периодически очищающий корзину"""
+    def __init__(self, manager, interval=600):
+        super().__init__(name="TrashPurger", daemon=True)
+        self.manager = manager
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        lower_thread_priority()
+        # Небольшая задержка, чтобы не мешать запуску приложения
+        if self._stop_event.wait(30):
+            return
+        while not self._stop_event.is_set():
+            try:
+                with trace.span("trash.purge_expired"):
+                    # Корзины дополнительных папок - только тех, что сейчас доступны
+                    for trash in [self.manager.trash] + self.manager.workspace.trashes():
+                        trash.purge_expired(
+                            self.manager.trash_retention_days,
+                            should_stop=self._stop_event.is_set
+                        )
+            except Exception:
+                pass
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,91 @@
+"""
+Наблюдение за корневой папкой - точечные уведомления об изменениях проектов
+"""
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+
+class ProjectWatcher(QObject):
+    """
+    Следит за root_path через QFileSystemWatcher (inotify в Linux,
+    ReadDirectoryChangesW в Windows). Пачка событий схлопывается
+    таймером, после чего индекс проверяется один раз и разница
+    рассылается сигналами added/removed/renamed.
+    """
+    added = pyqtSignal(list)
+    removed = pyqtSignal(list)
+    renamed = pyqtSignal(list)
+
+    def __init__(self, manager, tasks, debounce_ms=300):
+        super().__init__()
+        self.manager = manager
+        self.tasks = tasks
+        self.job = None
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.schedule)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.refresh)
+
+        self.root_path = None
+        self.snapshot = {}
+        self.refresh()
+
+    def watch_root(self):
+        """Переключение наблюдения на текущую корневую папку"""
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        self.root_path = self.manager.root_path
+        self.watcher.addPath(self.root_path)
+
+    def schedule(self, *args):
+        """Отложенная проверка: серия событий даёт одну проверку"""
+        self.timer.start()
+
+    def refresh(self):
+        """Проверка индекса в фоне (один stat, если корень не менялся)"""
+        if self.job is not None:
+            # Проверка уже идёт - повторим после её завершения
+            self.timer.start()
+            return
+        self.job = self.tasks.submit("watch_refresh", lambda job: self.manager.index.snapshot())
+        self.job.finished.connect(self.on_snapshot)
+        self.job.failed.connect(self.on_failed)
+
+    def on_failed(self, error):
+        self.job = None
+
+    def on_snapshot(self, current):
+        """Сравнение индекса с последним снимком и рассылка изменений"""
+        self.job = None
+        previous, self.snapshot = self.snapshot, current
+
+        if self.root_path != self.manager.root_path:
+            self.watch_root()
+            self.emit_changes(list(current), list(previous), [])
+            return
+
+        removed = [name for name in previous if name not in current]
+        added = [name for name in current if name not in previous]
+
+        # Переименование: исчезнувшее и появившееся имя с тем же inode
+        by_inode = {current[name]: name for name in added if current[name]}
+        renamed = []
+        for old_name in removed:
+            new_name = by_inode.get(previous[old_name])
+            if new_name is not None:
+                renamed.append((old_name, new_name))
+        for old_name, new_name in renamed:
+            removed.remove(old_name)
+            added.remove(new_name)
+
+        self.emit_changes(added, removed, renamed)
+
+    def emit_changes(self, added, removed, renamed):
+        if removed:
+            self.removed.emit(sorted(removed))
+        if added:
+            self.added.emit(sorted(added))
+        if renamed:
+            self.renamed.emit(renamed)
@@ -0,0 +1,155 @@
+"""
+Рабочее пространство - несколько именованных корневых папок в одном списке
+"""
+import os
+import time
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import Future, wait
+from core.index import ProjectIndex
+from core.trash import Trash
+
+PRIMARY_ROOT = "Основная"
+
+OK = "ok"
+STALE = "stale"
+UNAVAILABLE = "unavailable"
+
+
+class RootState:
+    """Корневая папка: её индекс, последний известный список и текущая проверка"""
+    def __init__(self, label, path, index):
+        self.label = label
+        self.path = path
+        self.index = index
+        # До первой проверки отдаётся список из сохранённого индекса
+        self.names = sorted(index.entries)
+        self.status = STALE
+        self.scanned_at = None
+        self.future = None
+        self._trash = None
+
+    @property
+    def trash(self):
+        if self._trash is None:
+            self._trash = Trash(self.path)
+        return self._trash
+
+
+class Workspace:
+    """
+    Все корневые папки проверяются параллельно, каждая через свой индекс.
+    Папка, не ответившая за timeout (например, сетевой диск), не задерживает
+    остальные: для неё отдаётся последний известный список, а проверка
+    продолжается в фоне и обновит кэш к следующему запросу.
+    На каждую папку одновременно идёт не больше одной проверки, потоки
+    проверок - фоновые и не мешают завершению приложения.
+    """
+    def __init__(self, indexes_dir, timeout=2.0):
+        self.indexes_dir = Path(indexes_dir)
+        self.timeout = timeout
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def index_file(self, path):
+        digest = hashlib.sha1(os.path.normcase(os.path.normpath(path)).encode("utf-8")).hexdigest()
+        return self.indexes_dir / f"{digest[:16]}.idx"
+
+    def set_roots(self, roots, indexes=None):
+        """
+        Новый набор корневых папок
+        roots: {метка: путь}; indexes: {метка: ProjectIndex} для уже открытых индексов
+        """
+        indexes = indexes or {}
+        self.indexes_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            states = {}
+            for label, path in roots.items():
+                state = self._states.get(label)
+                index = indexes.get(label)
+                if state is None or state.path != path or (index is not None and state.index is not index):
+                    if index is None:
+                        index = ProjectIndex(self.index_file(path), path)
+                    state = RootState(label, path, index)
+                states[label] = state
+            self._states = states
+
+    def state(self, label):
+        with self._lock:
+            return self._states.get(label)
+
+    def states(self):
+        with self._lock:
+            return list(self._states.values())
+
+    def _refresh(self, state, future):
+        try:
+            if not os.path.isdir(state.path):
+                raise FileNotFoundError(state.path)
+            names = state.index.names()
+            state.names = names
+            state.scanned_at = time.time()
+            future.set_result(names)
+        except BaseException as e:
+            future.set_exception(e)
+
+    def revalidate(self, state):
+        """Запуск проверки папки, если она ещё не идёт. Returns: Future"""
+        with self._lock:
+            if state.future is None or state.future.done():
+                state.future = Future()
+                threading.Thread(
+                    target=self._refresh, args=(state, state.future),
+                    name=f"root-scan:{state.label}", daemon=True
+                ).start()
+            return state.future
+
+    def scan(self, timeout=None):
+        """
+        Проверка всех папок с общим ограничением по времени
+        Returns: {метка: список проектов}; статус папки - в RootState.status
+        """
+        states = self.states()
+        futures = [self.revalidate(state) for state in states]
+        wait(futures, timeout=self.timeout if timeout is None else timeout)
+
+        result = {}
+        for state, future in zip(states, futures):
+            if not future.done():
+                state.status = STALE
+                result[state.label] = list(state.names)
+            elif future.exception() is not None:
+                state.status = UNAVAILABLE
+                result[state.label] = []
+            else:
+                state.status = OK
+                result[state.label] = future.result()
+        return result
+
+    def merged(self, timeout=None):
+        """Общий список проектов всех папок: [(имя, метка папки)] по имени"""
+        items = []
+        for label, names in self.scan(timeout).items():
+            items.extend((name, label) for name in names)
+        items.sort()
+        return items
+
+    def status(self):
+        """Состояние папок после последней проверки: {метка: ok | stale | unavailable}"""
+        return {state.label: state.status for state in self.states()}
+
+    @staticmethod
+    def conflicts(items):
+        """Имена, которые встречаются сразу в нескольких папках"""
+        seen, result = set(), set()
+        for name, _ in items:
+            if name in seen:
+                result.add(name)
+            seen.add(name)
+        return result
+
+    def trashes(self):
+        """Корзины дополнительных папок, которые сейчас доступны"""
+        return [state.trash for state in self.states()
+                if state.label != PRIMARY_ROOT and state.status == OK]
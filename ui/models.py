@@ -0,0 +1,253 @@
+"""
+Модели данных для представлений Qt
+"""
+from bisect import bisect_left
+from collections import Counter
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from core.sizes import format_size
+from core.gitstate import describe, unsaved_work
+
+
+class ProjectListModel(QAbstractTableModel):
+    """
+    Список проектов поверх отсортированного массива пар (имя, папка).
+    Строки отдаются представлению порциями через fetchMore,
+    а обновление применяется как разница (вставка/удаление строк).
+    """
+    FETCH_BATCH = 1000
+    HEADERS = ["Название проекта", "Папка", "Размер", "Git"]
+    NAME_COLUMN = 0
+    ROOT_COLUMN = 1
+    SIZE_COLUMN = 2
+    GIT_COLUMN = 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items = []
+        self._loaded = 0
+        self._sizes = {}
+        self._git = {}
+        self._archived = set()
+        # Сколько раз имя встречается в разных папках (конфликты имён)
+        self._name_counts = Counter()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        item = self._items[index.row()]
+        name, root = item
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.SIZE_COLUMN:
+                if item in self._archived:
+                    return "в архиве"
+                size = self._sizes.get(item)
+                return format_size(size[0]) if size else "…"
+            if column == self.GIT_COLUMN:
+                return describe(self._git.get(item))
+            return root if column == self.ROOT_COLUMN else name
+        if role == Qt.ItemDataRole.UserRole:
+            # Значение для сортировки
+            if column == self.SIZE_COLUMN:
+                size = self._sizes.get(item)
+                return size[0] if size else -1
+            if column == self.GIT_COLUMN:
+                return describe(self._git.get(item))
+            return root if column == self.ROOT_COLUMN else name
+        if role == Qt.ItemDataRole.ToolTipRole:
+            if column == self.SIZE_COLUMN:
+                size = self._sizes.get(item)
+                return f"Файлов: {size[1]}" if size else None
+            if column == self.GIT_COLUMN:
+                state = self._git.get(item)
+                if state is None:
+                    return None
+                return unsaved_work(state) or f"Отслеживает: {state['upstream'] or 'нет'}"
+            if self._name_counts[name] > 1:
+                return "Проект с таким именем есть в нескольких папках"
+        if role == Qt.ItemDataRole.ForegroundRole and column == self.NAME_COLUMN:
+            if self._name_counts[name] > 1:
+                return QColor("#c0392b")
+        if role == Qt.ItemDataRole.ForegroundRole and column == self.GIT_COLUMN:
+            if unsaved_work(self._git.get(item)):
+                return QColor("#d35400")
+        if role == Qt.ItemDataRole.TextAlignmentRole and column == self.SIZE_COLUMN:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._loaded < len(self._items)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.FETCH_BATCH, len(self._items) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def fetch_all(self):
+        """Загрузить все строки (нужно для фильтрации и обратной сортировки)"""
+        while self.canFetchMore():
+            self.fetchMore()
+
+    def name(self, row):
+        return self._items[row][0]
+
+    def root(self, row):
+        return self._items[row][1]
+
+    def is_archived(self, row):
+        return self._items[row] in self._archived
+
+    def archived_items(self):
+        return set(self._archived)
+
+    def set_archived(self, items):
+        """Отметка проектов (имя, папка), отправленных в архив"""
+        changed = self._archived.symmetric_difference(items)
+        self._archived = set(items)
+        for item in changed:
+            row = self.row_of(item)
+            if row >= 0:
+                index = self.index(row, self.SIZE_COLUMN)
+                self.dataChanged.emit(index, index)
+
+    def set_size(self, item, size, files):
+        """Обновление размера проекта (имя, папка) по мере подсчёта"""
+        self._sizes[item] = (size, files)
+        row = self.row_of(item)
+        if row >= 0:
+            index = self.index(row, self.SIZE_COLUMN)
+            self.dataChanged.emit(index, index)
+
+    def set_git(self, item, state):
+        """Обновление состояния git проекта (имя, папка)"""
+        self._git[item] = state
+        row = self.row_of(item)
+        if row >= 0:
+            index = self.index(row, self.GIT_COLUMN)
+            self.dataChanged.emit(index, index)
+
+    def git_state(self, item):
+        return self._git.get(item)
+
+    def row_of(self, item):
+        """Строка проекта (имя, папка) или -1"""
+        row = bisect_left(self._items, item)
+        if row < self._loaded and self._items[row] == item:
+            return row
+        return -1
+
+    def set_projects(self, items):
+        """Применение нового отсортированного списка (имя, папка) как разницы со старым"""
+        items = list(items)
+        if not self._items or not items:
+            self.beginResetModel()
+            self._items = items
+            self._loaded = min(self.FETCH_BATCH, len(items))
+            self._name_counts = Counter(name for name, _ in items)
+            self.endResetModel()
+            return
+
+        new_set = set(items)
+        old_set = set(self._items)
+        self._remove_rows([i for i, item in enumerate(self._items) if item not in new_set])
+        self._insert_rows([(i, item) for i, item in enumerate(items) if item not in old_set])
+
+    def apply_changes(self, added=(), removed=()):
+        """Точечное обновление: удаление и вставка отдельных пар (имя, папка)"""
+        positions = []
+        for item in removed:
+            row = bisect_left(self._items, item)
+            if row < len(self._items) and self._items[row] == item:
+                positions.append(row)
+        self._remove_rows(sorted(set(positions)))
+
+        inserts = []
+        for item in sorted(set(added)):
+            row = bisect_left(self._items, item)
+            if row < len(self._items) and self._items[row] == item:
+                continue
+            # Позиция в итоговом списке с учётом уже вставленных перед ней строк
+            inserts.append((row + len(inserts), item))
+        self._insert_rows(inserts)
+
+    @staticmethod
+    def _runs(positions):
+        """Группировка позиций в непрерывные диапазоны [start, end]"""
+        runs = []
+        for pos in positions:
+            if runs and runs[-1][1] == pos - 1:
+                runs[-1][1] = pos
+            else:
+                runs.append([pos, pos])
+        return runs
+
+    def _remove_rows(self, positions):
+        self._name_counts.subtract(self._items[pos][0] for pos in positions)
+        # С конца, чтобы индексы ещё не обработанных диапазонов не сдвигались
+        for start, end in reversed(self._runs(positions)):
+            if start < self._loaded:
+                visible_end = min(end, self._loaded - 1)
+                self.beginRemoveRows(QModelIndex(), start, visible_end)
+                del self._items[start:end + 1]
+                self._loaded -= visible_end - start + 1
+                self.endRemoveRows()
+            else:
+                del self._items[start:end + 1]
+
+    def _insert_rows(self, items):
+        # items - пары (позиция в итоговом списке, (имя, папка)) по возрастанию;
+        # к началу диапазона все предыдущие строки уже на месте
+        self._name_counts.update(item[0] for _, item in items)
+        by_position = dict(items)
+        for start, end in self._runs([pos for pos, _ in items]):
+            run = [by_position[pos] for pos in range(start, end + 1)]
+            fully_loaded = self._loaded == len(self._items)
+            if start < self._loaded or fully_loaded:
+                self.beginInsertRows(QModelIndex(), start, end)
+                self._items[start:start] = run
+                self._loaded += len(run)
+                self.endInsertRows()
+            else:
+                self._items[start:start] = run
+
+
+class ProjectFilterProxyModel(QSortFilterProxyModel):
+    """Сортировка и фильтрация списка проектов без пересоздания модели"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setFilterKeyColumn(ProjectListModel.NAME_COLUMN)
+        self.setSortRole(Qt.ItemDataRole.UserRole)
+
+    def set_filter_text(self, text):
+        if text:
+            self.sourceModel().fetch_all()
+        self.setFilterFixedString(text)
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if order == Qt.SortOrder.DescendingOrder or column != ProjectListModel.NAME_COLUMN:
+            self.sourceModel().fetch_all()
+        super().sort(column, order)
@@ -3,11 +3,25 @@
 """
 from PyQt6.QtWidgets import QSystemTrayIcon, QMenu, QApplication
 from PyQt6.QtGui import QIcon, QPixmap, QPainter, QAction, QCursor
-from PyQt6.QtCore import Qt, QPoint
-from ui.windows import CreateProjectWindow, DeleteProjectWindow, SettingsWindow
+from PyQt6.QtCore import Qt, QPoint, QTimer
+from core import trace
+from core.startup import profiler
+from core.tasks import TaskManager
+from core.watcher import ProjectWatcher
+import os
 import sys
+import importlib
 from pathlib import Path
 
+
+def load_windows():
+    """Модуль окон импортируется при первом открытии любого окна"""
+    if "ui.windows" not in sys.modules:
+        with profiler.phase("import.ui.windows"):
+            return importlib.import_module("ui.windows")
+    return sys.modules["ui.windows"]
+
+
 class TrayIcon(QSystemTrayIcon):
     def __init__(self, manager):
         self.manager = manager
@@ -35,7 +49,36 @@ class TrayIcon(QSystemTrayIcon):
         super().__init__(icon)
         self.setToolTip("Python Project Manager")
         
-        # Создаём меню вручную
+        self.tasks = TaskManager(manager)
+        # Исполнитель команд, пришедших от повторных запусков app.py (создаётся с первой командой)
+        self._runner = None
+        self.watcher = ProjectWatcher(manager, self.tasks)
+        # После операций менеджера индекс сверяется без ожидания событий ФС
+        # (на сетевых дисках уведомления могут не приходить)
+        self.tasks.job_started.connect(self.on_job_started)
+        # Поисковый индекс обновляется точечно по событиям наблюдателя
+        self.watcher.added.connect(self.on_projects_added)
+        self.watcher.removed.connect(self.on_projects_removed)
+        self.watcher.renamed.connect(self.on_projects_renamed)
+        self.tasks.submit("build_search_index", lambda job: self.manager.get_search_index())
+        
+        # Снимки по расписанию: срок проверяется раз в 10 минут
+        self.snapshot_job = None
+        self.snapshot_timer = QTimer(self)
+        self.snapshot_timer.timeout.connect(self.run_scheduled_snapshots)
+        self.snapshot_timer.start(10 * 60 * 1000)
+        
+        # Меню и окна создаются при первом обращении
+        self.menu = None
+        self.windows = {}
+        self.recent_actions = {}
+        self.git_job = None
+        
+        self.activated.connect(self.on_tray_activated)
+        self.show()
+    
+    def build_menu(self):
+        """Меню строится при первом открытии, а не до появления значка"""
         self.menu = QMenu()
         
         create_action = QAction("Создать проект", self.menu)
@@ -46,27 +89,49 @@ class TrayIcon(QSystemTrayIcon):
         open_action.triggered.connect(self.manager.open_projects_folder)
         self.menu.addAction(open_action)
         
+        quick_open_action = QAction("Быстрое открытие...", self.menu)
+        quick_open_action.triggered.connect(self.show_quick_open_window)
+        self.menu.addAction(quick_open_action)
+        
+        self.recent_menu = self.menu.addMenu("Недавние проекты")
+        self.recent_menu.aboutToShow.connect(self.update_recent_menu)
+        
+        code_search_action = QAction("Поиск по коду...", self.menu)
+        code_search_action.triggered.connect(self.show_code_search_window)
+        self.menu.addAction(code_search_action)
+        
         delete_action = QAction("Удалить проект", self.menu)
         delete_action.triggered.connect(self.show_delete_window)
         self.menu.addAction(delete_action)
         
         self.menu.addSeparator()
         
+        import_action = QAction("Импорт проектов...", self.menu)
+        import_action.triggered.connect(self.show_import_window)
+        self.menu.addAction(import_action)
+        
+        dedup_action = QAction("Дубликаты файлов...", self.menu)
+        dedup_action.triggered.connect(self.show_dedup_window)
+        self.menu.addAction(dedup_action)
+        
         settings_action = QAction("Настройки", self.menu)
         settings_action.triggered.connect(self.show_settings_window)
         self.menu.addAction(settings_action)
         
+        diagnostics_action = QAction("Диагностика", self.menu)
+        diagnostics_action.triggered.connect(self.show_diagnostics_window)
+        self.menu.addAction(diagnostics_action)
+        
         self.menu.addSeparator()
         
         quit_action = QAction("Выход", self.menu)
         quit_action.triggered.connect(self.quit_app)
         self.menu.addAction(quit_action)
-        
-        self.activated.connect(self.on_tray_activated)
-        self.show()
-    
+
     def on_tray_activated(self, reason):
         if reason == QSystemTrayIcon.ActivationReason.Context:
+            if self.menu is None:
+                self.build_menu()
             cursor_pos = QCursor.pos()  # текущая позиция курсора
             screen = QApplication.primaryScreen().availableGeometry()
             menu_height = self.menu.sizeHint().height()
@@ -76,17 +141,159 @@ class TrayIcon(QSystemTrayIcon):
             
             self.menu.popup(QPoint(x, y))
     
+    def update_recent_menu(self):
+        """Пересборка подменю недавних проектов перед показом"""
+        self.recent_menu.clear()
+        names = self.manager.recent_projects(10)
+        if not names:
+            empty_action = QAction("Нет недавних проектов", self.recent_menu)
+            empty_action.setEnabled(False)
+            self.recent_menu.addAction(empty_action)
+            return
+        self.recent_actions = {}
+        for name in names:
+            action = QAction(self.recent_label(name, self.manager.cached_git_state(name)), self.recent_menu)
+            action.triggered.connect(lambda checked=False, n=name: self.open_project(n))
+            self.recent_menu.addAction(action)
+            self.recent_actions[name] = action
+        # Подписи из кэша показываются сразу, опрос обновляет изменившиеся
+        if self.git_job is None or self.git_job.done:
+            self.git_job = self.tasks.scan_git()
+            self.git_job.partial.connect(self.on_git_scanned)
+
+    @property
+    def runner(self):
+        if self._runner is None:
+            from cli import BatchRunner
+            self._runner = BatchRunner(self.manager)
+        return self._runner
+
+    @staticmethod
+    def recent_label(name, state):
+        from core.gitstate import describe, unsaved_work
+        label = describe(state)
+        if unsaved_work(state):
+            label = "● " + label
+        return f"{name}    [{label}]" if label else name
+
+    def on_git_scanned(self, result):
+        (name, _), state = result
+        action = self.recent_actions.get(name)
+        if action is not None:
+            action.setText(self.recent_label(name, state))
+
+    def open_project(self, name):
+        project_path = os.path.join(self.manager.root_path, name)
+        if self.manager.is_archived(project_path):
+            self.tasks.open_project_folder(project_path)
+        else:
+            self.manager.open_project_folder(project_path)
+
+    def handle_command(self, op, reply):
+        """
+        Команда от повторного запуска app.py. Операции менеджера выполняются
+        в фоне на уже загруженном состоянии, ответ уходит по завершении
+        """
+        kind = op.get("op")
+        if kind == "show":
+            self.show_quick_open_window()
+            reply({"op": kind, "ok": True})
+            return
+        if kind == "open":
+            name = op.get("name", "")
+            project_path = os.path.join(self.manager.root_path, name)
+            if not name or not (os.path.isdir(project_path) or self.manager.is_archived(project_path)):
+                reply({"op": kind, "name": name, "ok": False, "message": f"Проект '{name}' не найден!"})
+                return
+            self.open_project(name)
+            reply({"op": kind, "name": name, "ok": True})
+            return
+        job = self.tasks.submit(f"ipc.{kind}", lambda job: self.runner.execute(op), exclusive=kind != "list")
+        job.finished.connect(reply)
+        job.finished.connect(self.watcher.schedule)
+        job.failed.connect(lambda error: reply({"op": kind, "ok": False, "message": error}))
+
+    def run_scheduled_snapshots(self):
+        if self.snapshot_job is not None and not self.snapshot_job.done:
+            return
+        if self.manager.snapshot_due():
+            self.snapshot_job = self.tasks.snapshot_projects()
+
+    def on_projects_added(self, names):
+        self.manager.apply_project_changes(added=names)
+
+    def on_projects_removed(self, names):
+        self.manager.apply_project_changes(removed=names)
+
+    def on_projects_renamed(self, pairs):
+        self.manager.apply_project_changes(
+            added=[new for _, new in pairs],
+            removed=[old for old, _ in pairs]
+        )
+
+    def on_job_started(self, job):
+        if job.name in ("create_project", "delete_project", "restore_project", "change_root_path",
+                        "archive_project", "restore_archived", "import_projects", "restore_snapshot",
+                        "batch_projects"):
+            job.finished.connect(self.watcher.schedule)
+        elif job.name == "provision_env":
+            job.finished.connect(self.notify_result)
+        elif job.name == "open_project_folder":
+            self.showMessage("PythonProjectMngr", "Проект восстанавливается из архива...",
+                             QSystemTrayIcon.MessageIcon.Information)
+            job.finished.connect(self.watcher.schedule)
+            job.finished.connect(self.notify_result)
+
+    def notify_result(self, result):
+        """Уведомление о завершении фоновой операции (окружение, восстановление)"""
+        success, message = result
+        icon = (QSystemTrayIcon.MessageIcon.Information if success
+                else QSystemTrayIcon.MessageIcon.Warning)
+        self.showMessage("PythonProjectMngr", message, icon)
+
+    def show_window(self, key, factory):
+        """
+        Окно создаётся при первом открытии и дальше переиспользуется:
+        повторный показ только обновляет его содержимое (reopen)
+        """
+        window = self.windows.get(key)
+        with trace.span(f"ui.{key}.open", cached=window is not None):
+            if window is None:
+                with profiler.phase(f"window.{key}.create"):
+                    window = self.windows[key] = factory(load_windows())
+            else:
+                window.reopen()
+            window.show()
+            window.raise_()
+            window.activateWindow()
+        profiler.mark(f"window.{key}.visible")
+        return window
+
     def show_create_window(self):
-        self.create_window = CreateProjectWindow(self.manager)
-        self.create_window.show()
+        self.show_window("create_window", lambda ui: ui.CreateProjectWindow(self.manager, self.tasks))
+    
+    def show_quick_open_window(self):
+        self.show_window("quick_open", lambda ui: ui.QuickOpenWindow(self.manager, self.tasks))
+    
+    def show_code_search_window(self):
+        self.show_window("code_search", lambda ui: ui.CodeSearchWindow(self.manager, self.tasks))
     
     def show_delete_window(self):
-        self.delete_window = DeleteProjectWindow(self.manager)
-        self.delete_window.show()
+        self.show_window("delete_window", lambda ui: ui.DeleteProjectWindow(self.manager, self.tasks, self.watcher))
+    
+    def show_import_window(self):
+        self.show_window("import_window", lambda ui: ui.ImportWindow(self.manager, self.tasks))
+    
+    def show_dedup_window(self):
+        self.show_window("dedup_window", lambda ui: ui.DedupWindow(self.manager, self.tasks))
     
     def show_settings_window(self):
-        self.settings_window = SettingsWindow(self.manager)
-        self.settings_window.show()
+        self.show_window("settings_window", lambda ui: ui.SettingsWindow(self.manager, self.tasks))
+    
+    def show_diagnostics_window(self):
+        self.show_window("diagnostics_window", lambda ui: ui.DiagnosticsWindow(self.manager))
     
     def quit_app(self):
+        self.snapshot_timer.stop()
+        self.tasks.shutdown()
         QApplication.quit()
\ No newline at end of file
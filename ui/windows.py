@@ -2,10 +2,19 @@
 Окна приложения
 """
 from PyQt6.QtWidgets import (QWidget, QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-                              QLineEdit, QPushButton, QTableWidget, QTableWidgetItem,
-                              QMessageBox, QFileDialog, QCheckBox)
-from PyQt6.QtCore import Qt
+                              QLineEdit, QPushButton, QTableView, QHeaderView,
+                              QFileDialog, QCheckBox, QProgressBar,
+                              QSpinBox, QComboBox, QListWidget, QListWidgetItem,
+                              QTableWidget, QTableWidgetItem, QInputDialog,
+                              QPlainTextEdit)
+from PyQt6.QtCore import Qt, QEvent, QTimer, QUrl
+from PyQt6.QtGui import QDesktopServices
 from core.utils import set_window_icon, add_footer_label, center_window
+from core.sizes import format_size
+from core import trace
+from core.workspace import PRIMARY_ROOT, OK, STALE, UNAVAILABLE
+from core.gitstate import unsaved_work
+from ui.models import ProjectListModel, ProjectFilterProxyModel
 import os
 
 
@@ -57,10 +66,40 @@ class SilentMessageBox(QDialog):
         super().exec()
         return self.clicked_button
 
+class ReportDialog(QDialog):
+    """Бесшумный отчёт с прокручиваемым списком строк; размер окна можно менять"""
+    def __init__(self, parent=None, title="", text="", details=()):
+        super().__init__(parent)
+
+        self.setWindowTitle(title)
+        self.setWindowModality(Qt.WindowModality.ApplicationModal)
+        self.resize(480, 320 if details else 120)
+        set_window_icon(self)
+
+        layout = QVBoxLayout()
+        label = QLabel(text)
+        label.setWordWrap(True)
+        layout.addWidget(label)
+
+        if details:
+            view = QPlainTextEdit("\n".join(details))
+            view.setReadOnly(True)
+            view.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+            layout.addWidget(view)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        ok_btn = QPushButton("OK")
+        ok_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(ok_btn)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
 class CreateProjectWindow(QWidget):
-    def __init__(self, manager):
+    def __init__(self, manager, tasks):
         super().__init__()
         self.manager = manager
+        self.tasks = tasks
         self.init_ui()
         set_window_icon(self)
         add_footer_label(self)
@@ -68,7 +107,7 @@ class CreateProjectWindow(QWidget):
     def init_ui(self):
         """Инициализация интерфейса"""
         self.setWindowTitle("Создать проект | PythonProjectMngr")
-        self.setFixedSize(410, 150)
+        self.setFixedSize(410, 230)
         center_window(self)
         
         layout = QVBoxLayout()
@@ -96,20 +135,68 @@ class CreateProjectWindow(QWidget):
         self.name_input.returnPressed.connect(self.create_project)
         layout.addWidget(self.name_input)
         
+        # Шаблон проекта
+        self.template_combo = QComboBox()
+        layout.addWidget(self.template_combo)
+        
+        # Окружение создаётся в фоне уже после закрытия окна
+        self.venv_checkbox = QCheckBox("Создать виртуальное окружение (.venv)")
+        layout.addWidget(self.venv_checkbox)
+        self.load_templates()
+        
         # Кнопка
-        btn = QPushButton("Создать")
-        btn.clicked.connect(self.create_project)
-        layout.addWidget(btn)
+        self.create_btn = QPushButton("Создать")
+        self.create_btn.clicked.connect(self.create_project)
+        layout.addWidget(self.create_btn)
         
         self.setLayout(layout)
         self.name_input.setFocus()
     
+    def load_templates(self):
+        """Шаблоны и значения по умолчанию из настроек"""
+        self.template_combo.clear()
+        for template_id, title in self.manager.get_templates():
+            self.template_combo.addItem(title, template_id)
+        default_index = self.template_combo.findData(self.manager.default_template)
+        if default_index >= 0:
+            self.template_combo.setCurrentIndex(default_index)
+        self.venv_checkbox.setChecked(self.manager.create_venv)
+    
+    def reopen(self):
+        """Повторный показ окна: пустое поле и свежий список шаблонов"""
+        self.name_input.clear()
+        self.load_templates()
+        self.name_input.setFocus()
+    
     def create_project(self):
         """Создание проекта"""
+        # Enter в поле ввода не должен запускать вторую операцию, пока идёт первая
+        if not self.create_btn.isEnabled():
+            return
         project_name = self.name_input.text()
-        success, message, project_path = self.manager.create_project(project_name)
+        template = self.template_combo.currentData()
+        self.create_btn.setEnabled(False)
+        job = self.tasks.create_project(project_name, template)
+        job.finished.connect(self.on_project_created)
+        job.failed.connect(self.on_job_failed)
+
+    def on_project_created(self, result):
+        """Обработка результата создания проекта"""
+        success, message, project_path = result
+        self.create_btn.setEnabled(True)
 
         if success:
+            # Запоминаем выбранные шаблон и окружение для следующего проекта
+            template = self.template_combo.currentData()
+            create_venv = self.venv_checkbox.isChecked()
+            if template != self.manager.default_template or create_venv != self.manager.create_venv:
+                self.manager.default_template = template or self.manager.default_template
+                self.manager.create_venv = create_venv
+                self.manager.save_config()
+
+            if create_venv and project_path:
+                self.tasks.provision_env(project_path)
+
             msg = SilentMessageBox(self, "Успех", message)
             msg.exec_with_result()
 
@@ -122,10 +209,18 @@ class CreateProjectWindow(QWidget):
             msg = SilentMessageBox(self, "Ошибка", message)
             msg.exec_with_result()
 
+    def on_job_failed(self, error):
+        """Ошибка фоновой операции"""
+        self.create_btn.setEnabled(True)
+        msg = SilentMessageBox(self, "Ошибка", error)
+        msg.exec_with_result()
+
 class DeleteProjectWindow(QWidget):
-    def __init__(self, manager):
+    def __init__(self, manager, tasks, watcher=None):
         super().__init__()
         self.manager = manager
+        self.tasks = tasks
+        self.watcher = watcher
         self.init_ui()
         set_window_icon(self)
         add_footer_label(self)
@@ -133,7 +228,7 @@ class DeleteProjectWindow(QWidget):
     def init_ui(self):
         """Инициализация интерфейса"""
         self.setWindowTitle("Удалить проект | PythonProjectMngr")
-        self.setGeometry(100, 100, 500, 400)
+        self.setGeometry(100, 100, 600, 400)
         center_window(self)
         
         layout = QVBoxLayout()
@@ -143,32 +238,78 @@ class DeleteProjectWindow(QWidget):
         label.setStyleSheet("font-weight: bold;")
         layout.addWidget(label)
         
-        # Таблица
-        self.table = QTableWidget()
-        self.table.setColumnCount(1)
-        self.table.setHorizontalHeaderLabels(["Название проекта"])
-        self.table.horizontalHeader().setStretchLastSection(True)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        # Фильтр по названию
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Фильтр по названию")
+        layout.addWidget(self.filter_input)
+        
+        # Таблица (модель/представление, строки подгружаются порциями)
+        self.model = ProjectListModel(self)
+        self.proxy = ProjectFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.filter_input.textChanged.connect(self.proxy.set_filter_text)
+        
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(
+            ProjectListModel.NAME_COLUMN, QHeaderView.ResizeMode.Stretch
+        )
+        self.table.horizontalHeader().setSectionResizeMode(
+            ProjectListModel.ROOT_COLUMN, QHeaderView.ResizeMode.ResizeToContents
+        )
+        self.table.horizontalHeader().setSectionResizeMode(
+            ProjectListModel.SIZE_COLUMN, QHeaderView.ResizeMode.ResizeToContents
+        )
+        self.table.horizontalHeader().setSectionResizeMode(
+            ProjectListModel.GIT_COLUMN, QHeaderView.ResizeMode.ResizeToContents
+        )
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        # Несколько проектов выделяются через Ctrl/Shift и обрабатываются одной операцией
+        self.table.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
         
         # Отключаем редактирование ячеек
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         
         # Подключаем двойной клик к удалению
-        self.table.cellDoubleClicked.connect(self.on_double_click)
+        self.table.doubleClicked.connect(self.on_double_click)
+        self.table.selectionModel().selectionChanged.connect(self.update_archive_button)
         
         layout.addWidget(self.table)
         
+        # Папки, которые не ответили вовремя или недоступны
+        self.roots_label = QLabel()
+        self.roots_label.setStyleSheet("color: #c0392b;")
+        self.roots_label.setWordWrap(True)
+        self.roots_label.setVisible(False)
+        layout.addWidget(self.roots_label)
+        
+        # Прогресс архивирования и восстановления
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+        
         # Кнопки
         btn_layout = QHBoxLayout()
         
-        delete_btn = QPushButton("Удалить")
-        delete_btn.clicked.connect(self.delete_project)
-        btn_layout.addWidget(delete_btn)
+        self.delete_btn = QPushButton("Удалить")
+        self.delete_btn.clicked.connect(self.delete_project)
+        btn_layout.addWidget(self.delete_btn)
         
-        refresh_btn = QPushButton("Обновить")
-        refresh_btn.clicked.connect(self.load_projects)
-        btn_layout.addWidget(refresh_btn)
+        self.archive_btn = QPushButton("В архив")
+        self.archive_btn.clicked.connect(self.archive_project)
+        btn_layout.addWidget(self.archive_btn)
+        
+        self.move_btn = QPushButton("Перенести...")
+        self.move_btn.clicked.connect(self.move_projects)
+        btn_layout.addWidget(self.move_btn)
+        
+        self.refresh_btn = QPushButton("Обновить")
+        # По кнопке размеры пересчитываются полностью: дописанный файл mtime каталога не меняет
+        self.refresh_btn.clicked.connect(lambda: self.load_projects(full=True))
+        btn_layout.addWidget(self.refresh_btn)
         
         close_btn = QPushButton("Закрыть")
         close_btn.clicked.connect(self.close)
@@ -177,51 +318,321 @@ class DeleteProjectWindow(QWidget):
         layout.addLayout(btn_layout)
         
         self.setLayout(layout)
+        self.size_jobs = {}
+        self.git_jobs = {}
+        self.load_projects()
+
+        # Изменения в корневой папке приходят точечно, без перечитывания списка
+        if self.watcher is not None:
+            self.watcher.added.connect(self.on_projects_added)
+            self.watcher.removed.connect(self.on_projects_removed)
+            self.watcher.renamed.connect(self.on_projects_renamed)
+
+    def reopen(self):
+        """Повторный показ окна: список сверяется заново"""
         self.load_projects()
 
-    def on_double_click(self, row, column):
+    # Наблюдатель следит только за основной папкой. Пока окно скрыто,
+    # изменения не применяются - при показе список всё равно сверяется
+
+    def on_projects_added(self, names):
+        if not self.isVisible():
+            return
+        self.model.apply_changes(added=[(name, PRIMARY_ROOT) for name in names])
+        self.scan_sizes([PRIMARY_ROOT])
+        self.scan_git([PRIMARY_ROOT])
+
+    def on_projects_removed(self, names):
+        if not self.isVisible():
+            return
+        self.model.apply_changes(removed=[(name, PRIMARY_ROOT) for name in names])
+
+    def on_projects_renamed(self, pairs):
+        if not self.isVisible():
+            return
+        self.model.apply_changes(
+            added=[(new, PRIMARY_ROOT) for _, new in pairs],
+            removed=[(old, PRIMARY_ROOT) for old, _ in pairs]
+        )
+
+    def on_double_click(self, index):
         """Обработка двойного клика по строке"""
         self.delete_project()
+
+    def selected_projects(self):
+        """Выделенные проекты: [(имя, папка)] в порядке строк"""
+        rows = sorted(self.proxy.mapToSource(index).row() for index in self.table.selectionModel().selectedRows())
+        return [(self.model.name(row), self.model.root(row)) for row in rows]
     
-    def load_projects(self):
-        """Загрузка списка проектов"""
-        projects = self.manager.get_projects()
-        self.table.setRowCount(len(projects))
-        
-        for i, project in enumerate(projects):
-            item = QTableWidgetItem(project)
-            self.table.setItem(i, 0, item)
+    def load_projects(self, full=False):
+        """Загрузка списка проектов всех папок в фоне (full - полный пересчёт размеров)"""
+        self.full_sizes = full
+        self.refresh_btn.setEnabled(False)
+        job = self.tasks.get_workspace()
+        job.finished.connect(self.on_projects_loaded)
+        job.failed.connect(self.on_job_failed)
+
+    def on_projects_loaded(self, projects):
+        """Обновление таблицы разницей с загруженным списком"""
+        self.refresh_btn.setEnabled(True)
+        with trace.span("ui.delete_window.set_projects", rows=len(projects)):
+            self.model.set_projects(projects)
+
+        status = self.manager.workspace.status()
+        notes = []
+        for label, state in status.items():
+            if state == STALE:
+                notes.append(f"«{label}» отвечает медленно, показан последний известный список")
+            elif state == UNAVAILABLE:
+                notes.append(f"«{label}» недоступна")
+        self.roots_label.setText("\n".join(notes))
+        self.roots_label.setVisible(bool(notes))
+        self.model.set_archived([
+            (name, label) for label, state in status.items() if state != UNAVAILABLE
+            for name in self.manager.archived_projects(label)
+        ])
+        self.update_archive_button()
+        available = [label for label, state in status.items() if state == OK]
+        self.scan_sizes(available, self.full_sizes)
+        self.scan_git(available)
+
+    def scan_sizes(self, roots, full=False):
+        """Фоновый подсчёт размеров, результаты приходят по одному проекту"""
+        for label in roots:
+            job = self.size_jobs.get(label)
+            if job is not None and not job.done:
+                if not full:
+                    continue
+                job.cancel()
+            job = self.tasks.scan_sizes(full=full, root=label)
+            job.partial.connect(self.on_size_scanned)
+            self.size_jobs[label] = job
+
+    def on_size_scanned(self, result):
+        item, size, files = result
+        self.model.set_size(item, size, files)
+
+    def scan_git(self, roots):
+        """Фоновый опрос git: из кэша сразу, заново - только изменившиеся репозитории"""
+        for label in roots:
+            job = self.git_jobs.get(label)
+            if job is not None and not job.done:
+                continue
+            job = self.tasks.scan_git(root=label)
+            job.partial.connect(self.on_git_scanned)
+            self.git_jobs[label] = job
+
+    def on_git_scanned(self, result):
+        item, state = result
+        self.model.set_git(item, state)
+
+    def closeEvent(self, event):
+        for job in [*self.size_jobs.values(), *self.git_jobs.values()]:
+            job.cancel()
+        super().closeEvent(event)
     
     def delete_project(self):
-        """Удаление выбранного проекта"""
-        selected_row = self.table.currentRow()
-        if selected_row < 0:
+        """Удаление выбранного проекта (или пакета выделенных)"""
+        # Двойной клик по строке не должен запускать удаление, пока идёт другая операция
+        if not self.delete_btn.isEnabled():
+            return
+        items = self.selected_projects()
+        if not items:
             msg = SilentMessageBox(self, "Предупреждение", "Выберите проект для удаления!")
             msg.exec_with_result()
             return
+        if len(items) > 1:
+            self.delete_batch(items)
+            return
         
-        project_name = self.table.item(selected_row, 0).text()
-        msg = SilentMessageBox(
-            self,
-            "Подтверждение",
-            f"Вы действительно хотите удалить проект '{project_name}'?",
-            buttons=("Да", "Нет")
-        )
+        selected = items[0]
+        # Перед подтверждением репозиторий проверяется заново, без кэша:
+        # правки без git add по mtime индекса не видны
+        self.delete_btn.setEnabled(False)
+        self.deleting = selected
+        job = self.tasks.git_state(*selected)
+        job.finished.connect(self.confirm_delete)
+        job.failed.connect(self.on_job_failed)
+
+    def confirm_delete(self, state):
+        """Подтверждение удаления с предупреждением о несохранённой в git работе"""
+        project_name, root = self.deleting
+        self.model.set_git(self.deleting, state)
+        where = "" if root == PRIMARY_ROOT else f" из папки «{root}»"
+        text = f"Вы действительно хотите удалить проект '{project_name}'{where}?"
+        warning = unsaved_work(state)
+        if warning:
+            text += f"\n\nВ репозитории: {warning}"
+        msg = SilentMessageBox(self, "Подтверждение", text, buttons=("Да", "Нет"))
         reply = msg.exec_with_result()
         
         if reply == "Да":
-            success, message = self.manager.delete_project(project_name)
-            if success:
-                self.load_projects()
-                result_msg = SilentMessageBox(self, "Успех", message)
+            job = self.tasks.delete_project(project_name, root)
+            job.finished.connect(self.on_project_deleted)
+            job.failed.connect(self.on_job_failed)
+        else:
+            self.delete_btn.setEnabled(True)
+
+    def delete_batch(self, items):
+        """Одно подтверждение и одна фоновая операция на все выделенные проекты"""
+        # Как и для одного проекта, репозитории перед подтверждением проверяются
+        # заново: состояние в таблице могло устареть
+        self.delete_btn.setEnabled(False)
+        self.deleting_batch = items
+        job = self.tasks.git_states_of(items)
+        job.finished.connect(self.confirm_delete_batch)
+        job.failed.connect(self.on_job_failed)
+
+    def confirm_delete_batch(self, states):
+        items = self.deleting_batch
+        for item, state in states.items():
+            self.model.set_git(item, state)
+        unsaved = [item for item in items if unsaved_work(states.get(item))]
+        text = f"Удалить выделенные проекты: {len(items)}?"
+        if unsaved:
+            text += f"\n\nС несохранённой в git работой: {len(unsaved)}"
+        msg = SilentMessageBox(self, "Подтверждение", text, buttons=("Да", "Нет"))
+        if msg.exec_with_result() == "Да":
+            self.run_batch("delete", items)
+        else:
+            self.delete_btn.setEnabled(True)
+
+    def selection_archived(self):
+        """Все выделенные проекты в архиве (тогда кнопка восстанавливает их)"""
+        items = self.selected_projects()
+        archived = self.model.archived_items()
+        return bool(items) and all(item in archived for item in items)
+
+    def update_archive_button(self, *args):
+        self.archive_btn.setText("Из архива" if self.selection_archived() else "В архив")
+
+    def archive_project(self):
+        """Отправка выделенных проектов в архив или восстановление из него"""
+        items = self.selected_projects()
+        if not items:
+            msg = SilentMessageBox(self, "Предупреждение", "Выберите проект!")
+            msg.exec_with_result()
+            return
+        archived = self.selection_archived()
+        if len(items) > 1:
+            # Уже архивные проекты при отправке в архив пропускаются
+            if not archived:
+                items = [item for item in items if item not in self.model.archived_items()]
+            self.run_batch("unarchive" if archived else "archive", items)
+            return
+        project_name, root = items[0]
+        if archived:
+            job = self.tasks.restore_archived(project_name, root)
+        else:
+            job = self.tasks.archive_project(project_name, root)
+        self.archive_btn.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        job.progress.connect(self.on_progress)
+        job.finished.connect(self.on_archive_done)
+        job.failed.connect(self.on_job_failed)
+
+    def move_projects(self):
+        """Перенос выделенных проектов в другую корневую папку"""
+        items = self.selected_projects()
+        if not items:
+            msg = SilentMessageBox(self, "Предупреждение", "Выберите проект!")
+            msg.exec_with_result()
+            return
+        sources = {root for _, root in items}
+        targets = [label for label in self.manager.root_paths() if label not in sources or len(sources) > 1]
+        if not targets:
+            msg = SilentMessageBox(self, "Предупреждение", "Добавьте другую папку проектов в настройках!")
+            msg.exec_with_result()
+            return
+        target, ok = QInputDialog.getItem(
+            self, "Перенос проектов", f"Куда перенести проекты ({len(items)}):", targets, 0, False
+        )
+        if ok:
+            self.run_batch("move", [item for item in items if item[1] != target], target)
+
+    def run_batch(self, action, items, target_root=None):
+        if not items:
+            return
+        self.batch_action = action
+        self.batch_target = target_root
+        for button in (self.delete_btn, self.archive_btn, self.move_btn, self.refresh_btn):
+            button.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        job = self.tasks.batch_projects(action, items, target_root)
+        job.progress.connect(self.on_progress)
+        job.finished.connect(self.on_batch_done)
+        job.failed.connect(self.on_job_failed)
+
+    def on_batch_done(self, result):
+        """Список обновляется один раз, разницей по успешно обработанным проектам"""
+        success, message, results = result
+        for button in (self.delete_btn, self.archive_btn, self.move_btn, self.refresh_btn):
+            button.setEnabled(True)
+        self.progress_bar.setVisible(False)
+        done = [(name, root) for name, root, ok, _ in results if ok]
+        with trace.span("ui.delete_window.apply_batch", rows=len(done)):
+            if self.batch_action == "delete":
+                self.model.apply_changes(removed=done)
+            elif self.batch_action == "move":
+                self.model.apply_changes(added=[(name, self.batch_target) for name, _ in done], removed=done)
+                self.scan_sizes([self.batch_target])
             else:
-                result_msg = SilentMessageBox(self, "Ошибка", message)
-            result_msg.exec_with_result()
+                archived = self.model.archived_items()
+                if self.batch_action == "archive":
+                    archived.update(done)
+                else:
+                    archived.difference_update(done)
+                self.model.set_archived(archived)
+        self.update_archive_button()
+        # В сообщении менеджера ошибок не больше десяти - в отчёт идут все
+        failed = [f"{name} ({root}): {text}" if root != PRIMARY_ROOT else f"{name}: {text}"
+                  for name, root, ok, text in results if not ok]
+        report = ReportDialog(self, "Успех" if success else "Ошибка", message.split("\n", 1)[0], failed)
+        report.exec()
+
+    def on_progress(self, done, total, text):
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+        self.progress_bar.setFormat(text)
+
+    def on_archive_done(self, result):
+        success, message = result
+        self.archive_btn.setEnabled(True)
+        self.progress_bar.setVisible(False)
+        self.load_projects()
+        result_msg = SilentMessageBox(self, "Успех" if success else "Ошибка", message)
+        result_msg.exec_with_result()
+
+    def on_project_deleted(self, result):
+        """Обработка результата удаления"""
+        success, message = result
+        self.delete_btn.setEnabled(True)
+        if success:
+            # Дополнительные папки наблюдатель не отслеживает
+            self.model.apply_changes(removed=[self.deleting])
+            result_msg = SilentMessageBox(self, "Успех", message)
+        else:
+            result_msg = SilentMessageBox(self, "Ошибка", message)
+        result_msg.exec_with_result()
+
+    def on_job_failed(self, error):
+        """Ошибка фоновой операции"""
+        self.delete_btn.setEnabled(True)
+        self.archive_btn.setEnabled(True)
+        self.move_btn.setEnabled(True)
+        self.refresh_btn.setEnabled(True)
+        self.progress_bar.setVisible(False)
+        msg = SilentMessageBox(self, "Ошибка", error)
+        msg.exec_with_result()
 
 class SettingsWindow(QWidget):
-    def __init__(self, manager):
+    def __init__(self, manager, tasks):
         super().__init__()
         self.manager = manager
+        self.tasks = tasks
+        self.job = None
         self.init_ui()
         set_window_icon(self)
         add_footer_label(self)
@@ -229,7 +640,7 @@ class SettingsWindow(QWidget):
     def init_ui(self):
         """Инициализация интерфейса"""
         self.setWindowTitle("Настройки | PythonProjectMngr")
-        self.setFixedSize(600, 220)
+        self.setFixedSize(600, 540)
         center_window(self)
         
         layout = QVBoxLayout()
@@ -242,7 +653,7 @@ class SettingsWindow(QWidget):
         # Поле пути и кнопка обзора
         path_layout = QHBoxLayout()
         
-        self.path_input = QLineEdit(self.manager.root_path)
+        self.path_input = QLineEdit()
         self.path_input.setReadOnly(True)
         path_layout.addWidget(self.path_input)
         
@@ -252,9 +663,13 @@ class SettingsWindow(QWidget):
         
         layout.addLayout(path_layout)
         
+        # Незавершённый перенос продолжается при сохранении
+        self.resume_label = QLabel("Перенос проектов был прерван. Нажмите «Сохранить», чтобы продолжить.")
+        self.resume_label.setStyleSheet("color: #c0392b;")
+        layout.addWidget(self.resume_label)
+        
         # Чекбокс для переноса проектов
         self.move_checkbox = QCheckBox("Перенести существующие проекты в новую папку")
-        self.move_checkbox.setChecked(True)
         layout.addWidget(self.move_checkbox)
         
         # Разделитель
@@ -267,24 +682,99 @@ class SettingsWindow(QWidget):
         
         # Чекбокс для открытия папки после создания
         self.open_after_create_checkbox = QCheckBox("Автоматически открывать папку после создания проекта")
-        self.open_after_create_checkbox.setChecked(self.manager.open_after_create)
         layout.addWidget(self.open_after_create_checkbox)
         
+        layout.addSpacing(10)
+        
+        # Корзина
+        trash_label = QLabel("Удаление проектов:")
+        trash_label.setStyleSheet("font-weight: bold;")
+        layout.addWidget(trash_label)
+        
+        trash_layout = QHBoxLayout()
+        self.use_trash_checkbox = QCheckBox("Перемещать в корзину, хранить дней:")
+        trash_layout.addWidget(self.use_trash_checkbox)
+        
+        self.retention_input = QSpinBox()
+        self.retention_input.setRange(0, 365)
+        trash_layout.addWidget(self.retention_input)
+        trash_layout.addStretch()
+        layout.addLayout(trash_layout)
+        
+        # Снимки проектов
+        self.safety_snapshots_checkbox = QCheckBox("Снимок проекта перед удалением без корзины и переносом папки")
+        layout.addWidget(self.safety_snapshots_checkbox)
+        
+        snapshot_layout = QHBoxLayout()
+        snapshot_layout.addWidget(QLabel("Снимки всех проектов каждые, ч (0 - выключено):"))
+        self.snapshot_interval_input = QSpinBox()
+        self.snapshot_interval_input.setRange(0, 24 * 30)
+        snapshot_layout.addWidget(self.snapshot_interval_input)
+        snapshot_layout.addStretch()
+        layout.addLayout(snapshot_layout)
+        
+        layout.addSpacing(10)
+        
+        # Дополнительные корневые папки (применяются сразу)
+        roots_label = QLabel("Дополнительные папки проектов:")
+        roots_label.setStyleSheet("font-weight: bold;")
+        layout.addWidget(roots_label)
+        
+        roots_layout = QHBoxLayout()
+        self.roots_list = QListWidget()
+        self.roots_list.setFixedHeight(80)
+        roots_layout.addWidget(self.roots_list)
+        
+        roots_btn_layout = QVBoxLayout()
+        add_root_btn = QPushButton("Добавить...")
+        add_root_btn.clicked.connect(self.add_root)
+        roots_btn_layout.addWidget(add_root_btn)
+        remove_root_btn = QPushButton("Убрать")
+        remove_root_btn.clicked.connect(self.remove_root)
+        roots_btn_layout.addWidget(remove_root_btn)
+        roots_btn_layout.addStretch()
+        roots_layout.addLayout(roots_btn_layout)
+        layout.addLayout(roots_layout)
+        
+        # Прогресс переноса проектов
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+        
         # Кнопки
         btn_layout = QHBoxLayout()
         
-        save_btn = QPushButton("Сохранить")
-        save_btn.clicked.connect(self.save_settings)
-        btn_layout.addWidget(save_btn)
+        self.save_btn = QPushButton("Сохранить")
+        self.save_btn.clicked.connect(self.save_settings)
+        btn_layout.addWidget(self.save_btn)
         
         cancel_btn = QPushButton("Отмена")
-        cancel_btn.clicked.connect(self.close)
+        cancel_btn.clicked.connect(self.cancel)
         btn_layout.addWidget(cancel_btn)
         
         layout.addLayout(btn_layout)
         layout.addStretch()
         
         self.setLayout(layout)
+        self.load_settings()
+    
+    def load_settings(self):
+        """Значения полей из текущих настроек"""
+        migration = self.manager.pending_migration()
+        self.path_input.setText(migration.new_path if migration is not None else self.manager.root_path)
+        self.resume_label.setVisible(migration is not None)
+        self.move_checkbox.setChecked(True)
+        self.open_after_create_checkbox.setChecked(self.manager.open_after_create)
+        self.use_trash_checkbox.setChecked(self.manager.use_trash)
+        self.retention_input.setValue(self.manager.trash_retention_days)
+        self.safety_snapshots_checkbox.setChecked(self.manager.safety_snapshots)
+        self.snapshot_interval_input.setValue(self.manager.snapshot_interval_hours)
+        self.load_roots()
+    
+    def reopen(self):
+        # Пока идёт перенос, поля не трогаем
+        if self.job is None:
+            self.load_settings()
     
     def browse_folder(self):
         """Выбор папки"""
@@ -297,6 +787,38 @@ class SettingsWindow(QWidget):
         if folder:
             self.path_input.setText(folder)
     
+    def load_roots(self):
+        self.roots_list.clear()
+        for name, path in self.manager.roots.items():
+            item = QListWidgetItem(f"{name} — {path}")
+            item.setData(Qt.ItemDataRole.UserRole, name)
+            self.roots_list.addItem(item)
+    
+    def add_root(self):
+        """Добавление дополнительной папки с проектами"""
+        folder = QFileDialog.getExistingDirectory(self, "Выберите папку", self.manager.root_path)
+        if not folder:
+            return
+        name, ok = QInputDialog.getText(
+            self, "Название папки", "Название папки в списке проектов:",
+            text=os.path.basename(os.path.normpath(folder))
+        )
+        if not ok:
+            return
+        success, message = self.manager.add_root(name, folder)
+        if not success:
+            msg = SilentMessageBox(self, "Ошибка", message)
+            msg.exec_with_result()
+        self.load_roots()
+    
+    def remove_root(self):
+        """Удаление папки из списка (файлы остаются на месте)"""
+        item = self.roots_list.currentItem()
+        if item is None:
+            return
+        self.manager.remove_root(item.data(Qt.ItemDataRole.UserRole))
+        self.load_roots()
+    
     def save_settings(self):
         """Сохранение настроек"""
         new_path = self.path_input.text()
@@ -305,21 +827,809 @@ class SettingsWindow(QWidget):
         # Проверяем, изменился ли путь
         path_changed = (new_path != self.manager.root_path)
 
-        # Проверяем, изменилась ли настройка открытия проекта
-        open_changed = (self.manager.open_after_create != self.open_after_create_checkbox.isChecked())
-
         # Сохраняем новую настройку открытия проекта
         self.manager.open_after_create = self.open_after_create_checkbox.isChecked()
+        self.manager.use_trash = self.use_trash_checkbox.isChecked()
+        self.manager.trash_retention_days = self.retention_input.value()
+        self.manager.safety_snapshots = self.safety_snapshots_checkbox.isChecked()
+        self.manager.snapshot_interval_hours = self.snapshot_interval_input.value()
 
         if path_changed:
-            # Меняем корневую папку, если она действительно изменилась
-            success, message = self.manager.change_root_path(new_path, move_projects)
+            # Меняем корневую папку в фоне, если она действительно изменилась
+            self.save_btn.setEnabled(False)
+            self.progress_bar.setValue(0)
+            self.progress_bar.setVisible(True)
+            self.job = self.tasks.change_root_path(new_path, move_projects)
+            self.job.progress.connect(self.on_progress)
+            self.job.finished.connect(self.on_settings_saved)
+            self.job.failed.connect(self.on_job_failed)
+        else:
+            # Если путь тот же, просто сохраняем настройки
+            self.manager.save_config()
+            self.on_settings_saved((True, "Настройки сохранены"))
+
+    def on_progress(self, done, total, text):
+        """Прогресс переноса проектов"""
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+        self.progress_bar.setFormat(f"{done}/{total} {text}")
+
+    def cancel(self):
+        """Отмена: прерывает перенос или закрывает окно"""
+        if self.job is not None and not self.job.done:
+            self.job.cancel()
         else:
-            # Если путь тот же, просто сообщаем о сохранении настроек
-            success, message = True, "Настройки сохранены"
+            self.close()
+
+    def on_job_failed(self, error):
+        """Ошибка фоновой операции"""
+        self.on_settings_saved((False, error))
+
+    def on_settings_saved(self, result):
+        """Обработка результата сохранения настроек"""
+        success, message = result
+        self.job = None
+        self.save_btn.setEnabled(True)
+        self.progress_bar.setVisible(False)
 
         msg = SilentMessageBox(self, "Успех" if success else "Ошибка", message)
         msg.exec_with_result()
 
         if success:
-            self.close()
\ No newline at end of file
+            self.close()
+
+class QuickOpenWindow(QWidget):
+    """Быстрое открытие проекта по части названия"""
+    MAX_RESULTS = 20
+
+    def __init__(self, manager, tasks):
+        super().__init__()
+        self.manager = manager
+        self.tasks = tasks
+        self.init_ui()
+        set_window_icon(self)
+        add_footer_label(self)
+
+    def init_ui(self):
+        """Инициализация интерфейса"""
+        self.setWindowTitle("Быстрое открытие | PythonProjectMngr")
+        self.setFixedSize(410, 360)
+        center_window(self)
+
+        layout = QVBoxLayout()
+
+        # Поле поиска
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Начните вводить название проекта")
+        self.search_input.setStyleSheet("""
+            QLineEdit {
+                padding: 5px;
+                font-size: 14px;
+            }
+        """)
+        self.search_input.setFixedHeight(30)
+        self.search_input.textChanged.connect(self.update_results)
+        self.search_input.returnPressed.connect(self.open_selected)
+        # Стрелки в поле поиска двигают выделение в списке
+        self.search_input.installEventFilter(self)
+        layout.addWidget(self.search_input)
+
+        # Результаты: пустой запрос показывает недавние проекты
+        self.results = QListWidget()
+        self.results.itemActivated.connect(self.open_item)
+        layout.addWidget(self.results)
+
+        self.setLayout(layout)
+        self.update_results("")
+        self.search_input.setFocus()
+
+    def reopen(self):
+        """Повторный показ окна: пустой запрос показывает недавние проекты"""
+        if self.search_input.text():
+            self.search_input.clear()
+        else:
+            self.update_results("")
+        self.search_input.setFocus()
+
+    def eventFilter(self, obj, event):
+        if obj is self.search_input and event.type() == QEvent.Type.KeyPress:
+            key = event.key()
+            if key in (Qt.Key.Key_Up, Qt.Key.Key_Down) and self.results.count():
+                step = -1 if key == Qt.Key.Key_Up else 1
+                row = min(max(self.results.currentRow() + step, 0), self.results.count() - 1)
+                self.results.setCurrentRow(row)
+                return True
+            if key == Qt.Key.Key_Escape:
+                self.close()
+                return True
+        return super().eventFilter(obj, event)
+
+    def update_results(self, text):
+        """Поиск на каждое нажатие клавиши"""
+        with trace.span("ui.quick_open.search"):
+            names = self.manager.search_projects(text, self.MAX_RESULTS)
+            self.results.clear()
+            self.results.addItems(names)
+            if names:
+                self.results.setCurrentRow(0)
+
+    def open_selected(self):
+        item = self.results.currentItem()
+        if item is not None:
+            self.open_item(item)
+
+    def open_item(self, item):
+        """Открытие папки выбранного проекта"""
+        project_path = os.path.join(self.manager.root_path, item.text())
+        if self.manager.is_archived(project_path):
+            # Распаковка может занять время - в фоне
+            self.tasks.open_project_folder(project_path)
+        else:
+            self.manager.open_project_folder(project_path)
+        self.close()
+
+
+class CodeSearchWindow(QWidget):
+    """Поиск текста в исходниках всех проектов"""
+    COLUMNS = ["Проект", "Файл", "Строка", "Текст"]
+    # Пауза после ввода, прежде чем запускать поиск
+    DEBOUNCE_MS = 250
+
+    def __init__(self, manager, tasks):
+        super().__init__()
+        self.manager = manager
+        self.tasks = tasks
+        self.search_job = None
+        self.index_job = None
+        self.init_ui()
+        set_window_icon(self)
+        add_footer_label(self)
+
+    def init_ui(self):
+        """Инициализация интерфейса"""
+        self.setWindowTitle("Поиск по коду | PythonProjectMngr")
+        self.setGeometry(100, 100, 800, 480)
+        center_window(self)
+
+        layout = QVBoxLayout()
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Текст для поиска во всех проектах")
+        self.search_input.setStyleSheet("""
+            QLineEdit {
+                padding: 5px;
+                font-size: 14px;
+            }
+        """)
+        self.search_input.setFixedHeight(30)
+        self.search_input.textChanged.connect(self.schedule_search)
+        self.search_input.returnPressed.connect(self.run_search)
+        layout.addWidget(self.search_input)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        self.table.cellDoubleClicked.connect(self.open_file)
+        layout.addWidget(self.table)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.status_label)
+
+        # Кнопки
+        btn_layout = QHBoxLayout()
+
+        self.reindex_btn = QPushButton("Переиндексировать")
+        self.reindex_btn.clicked.connect(self.update_index)
+        btn_layout.addWidget(self.reindex_btn)
+
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(close_btn)
+
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.run_search)
+
+        # Индекс догоняет изменения с прошлого открытия
+        self.update_index()
+        self.search_input.setFocus()
+
+    def reopen(self):
+        """Повторный показ окна: индекс догоняет изменения"""
+        self.update_index()
+        self.search_input.selectAll()
+        self.search_input.setFocus()
+
+    def update_index(self):
+        """Фоновое обновление индекса (только изменённые файлы)"""
+        if self.index_job is not None and not self.index_job.done:
+            return
+        self.reindex_btn.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.index_job = self.tasks.update_code_index()
+        self.index_job.progress.connect(self.on_progress)
+        self.index_job.finished.connect(self.on_index_updated)
+        self.index_job.failed.connect(self.on_index_failed)
+
+    def on_progress(self, done, total, text):
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+        self.progress_bar.setFormat(text)
+
+    def on_index_updated(self, result):
+        success, message = result
+        self.reindex_btn.setEnabled(True)
+        self.progress_bar.setVisible(False)
+        self.status_label.setText(message)
+        # Результаты по неполному индексу могли что-то пропустить
+        if success and self.search_input.text().strip():
+            self.run_search()
+
+    def on_index_failed(self, error):
+        self.reindex_btn.setEnabled(True)
+        self.progress_bar.setVisible(False)
+        self.status_label.setText(error)
+
+    def schedule_search(self, text):
+        self.search_timer.start()
+
+    def run_search(self):
+        """Поиск в фоне; предыдущий незавершённый поиск отменяется"""
+        self.search_timer.stop()
+        if self.search_job is not None:
+            self.search_job.cancel()
+        query = self.search_input.text()
+        if not query.strip():
+            self.search_job = None
+            self.table.setRowCount(0)
+            return
+        self.status_label.setText("Поиск...")
+        self.search_job = self.tasks.search_code(query)
+        self.search_job.finished.connect(self.on_results)
+        self.search_job.failed.connect(self.on_index_failed)
+
+    def on_results(self, results):
+        # Ответы устаревших запросов не показываются
+        if self.sender() is not self.search_job:
+            return
+        self.table.setRowCount(len(results))
+        for row, item in enumerate(results):
+            values = [item["project"], item["path"], item["line"], item["text"]]
+            for column, value in enumerate(values):
+                cell = QTableWidgetItem()
+                cell.setData(Qt.ItemDataRole.DisplayRole, value)
+                self.table.setItem(row, column, cell)
+        self.status_label.setText(f"Найдено строк: {len(results)}")
+
+    def open_file(self, row, column):
+        """Открытие файла в программе по умолчанию"""
+        project = self.table.item(row, 0).text()
+        path = self.table.item(row, 1).text()
+        QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.join(self.manager.root_path, project, path)))
+
+    def closeEvent(self, event):
+        self.search_timer.stop()
+        if self.search_job is not None:
+            self.search_job.cancel()
+        super().closeEvent(event)
+
+
+class DedupWindow(QWidget):
+    """Поиск одинаковых файлов в проектах и замена копий ссылками"""
+    COLUMNS = ["Размер", "Копий", "Файл"]
+    MODES = [("hardlink", "Жёсткие ссылки (только окружения и скомпилированные файлы)"),
+             ("reflink", "Reflink (копирование при записи)")]
+    # Сколько самых крупных групп показывается в таблице
+    MAX_ROWS = 500
+
+    def __init__(self, manager, tasks):
+        super().__init__()
+        self.manager = manager
+        self.tasks = tasks
+        self.job = None
+        self.report = None
+        self.init_ui()
+        set_window_icon(self)
+        add_footer_label(self)
+
+    def init_ui(self):
+        """Инициализация интерфейса"""
+        self.setWindowTitle("Дубликаты файлов | PythonProjectMngr")
+        self.setGeometry(100, 100, 700, 440)
+        center_window(self)
+
+        layout = QVBoxLayout()
+
+        mode_layout = QHBoxLayout()
+        mode_layout.addWidget(QLabel("Чем заменять копии:"))
+        self.mode_combo = QComboBox()
+        for mode, title in self.MODES:
+            self.mode_combo.addItem(title, mode)
+        self.mode_combo.setCurrentIndex(max(self.mode_combo.findData(self.manager.dedup_mode), 0))
+        self.mode_combo.currentIndexChanged.connect(self.change_mode)
+        mode_layout.addWidget(self.mode_combo, 1)
+        layout.addLayout(mode_layout)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel("Файлы только сравниваются - на диске ничего не меняется до замены")
+        self.status_label.setStyleSheet("color: gray;")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        # Кнопки
+        btn_layout = QHBoxLayout()
+
+        self.find_btn = QPushButton("Найти дубликаты")
+        self.find_btn.clicked.connect(self.find_duplicates)
+        btn_layout.addWidget(self.find_btn)
+
+        self.apply_btn = QPushButton("Заменить ссылками")
+        self.apply_btn.setEnabled(False)
+        self.apply_btn.clicked.connect(self.deduplicate)
+        btn_layout.addWidget(self.apply_btn)
+
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(close_btn)
+
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+    def reopen(self):
+        # Найденные группы остаются: перед заменой файлы всё равно сверяются
+        self.mode_combo.setCurrentIndex(max(self.mode_combo.findData(self.manager.dedup_mode), 0))
+
+    def change_mode(self, index):
+        self.manager.dedup_mode = self.mode_combo.currentData()
+        self.manager.save_config()
+        # Группы зависят от способа замены - нужен новый поиск
+        self.report = None
+        self.apply_btn.setEnabled(False)
+
+    def start(self, job):
+        self.job = job
+        self.find_btn.setEnabled(False)
+        self.apply_btn.setEnabled(False)
+        self.mode_combo.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        job.progress.connect(self.on_progress)
+        job.failed.connect(self.on_job_failed)
+
+    def finish(self):
+        self.find_btn.setEnabled(True)
+        self.mode_combo.setEnabled(True)
+        self.progress_bar.setVisible(False)
+
+    def find_duplicates(self):
+        """Поиск без изменений на диске"""
+        job = self.tasks.find_duplicates()
+        job.finished.connect(self.on_found)
+        self.start(job)
+
+    def on_progress(self, done, total, text):
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+        self.progress_bar.setFormat(text)
+
+    def on_found(self, result):
+        success, message, report = result
+        self.finish()
+        self.status_label.setText(message)
+        self.report = report if success else None
+        groups = report.groups[:self.MAX_ROWS] if self.report else []
+        root = self.manager.root_path
+        self.table.setRowCount(len(groups))
+        for row, group in enumerate(groups):
+            values = [format_size(group[0].size), len(group) - 1, os.path.relpath(group[0].path, root)]
+            for column, value in enumerate(values):
+                cell = QTableWidgetItem()
+                cell.setData(Qt.ItemDataRole.DisplayRole, value)
+                if column == 2:
+                    cell.setToolTip("\n".join(os.path.relpath(item.path, root) for item in group))
+                self.table.setItem(row, column, cell)
+        self.apply_btn.setEnabled(bool(groups))
+
+    def deduplicate(self):
+        if self.report is None:
+            return
+        if self.manager.dedup_mode == "hardlink":
+            text = ("Копии станут жёсткими ссылками на один файл: изменение любой из них "
+                    "изменит все. Продолжить?")
+        else:
+            text = "Копии будут заменены reflink-копиями. Продолжить?"
+        msg = SilentMessageBox(self, "Подтверждение", text, buttons=("Да", "Нет"))
+        if msg.exec_with_result() != "Да":
+            return
+        job = self.tasks.deduplicate(self.report)
+        job.finished.connect(self.on_deduplicated)
+        self.start(job)
+
+    def on_deduplicated(self, result):
+        success, message = result
+        self.finish()
+        self.report = None
+        self.table.setRowCount(0)
+        self.status_label.setText(message)
+        if not success:
+            msg = SilentMessageBox(self, "Ошибка", message)
+            msg.exec_with_result()
+
+    def on_job_failed(self, error):
+        self.finish()
+        msg = SilentMessageBox(self, "Ошибка", error)
+        msg.exec_with_result()
+
+    def closeEvent(self, event):
+        # Прерванная работа продолжится при следующем запуске по кэшу хэшей
+        if self.job is not None and not self.job.done:
+            self.job.cancel()
+        super().closeEvent(event)
+
+
+class ImportWindow(QWidget):
+    """Поиск существующих Python-проектов в дереве папок и импорт в корневую папку"""
+    COLUMNS = ["Проект", "Признаки", "Путь"]
+    MODES = [(False, "Ссылкой (папка остаётся на месте)"), (True, "Перенести в корневую папку")]
+
+    def __init__(self, manager, tasks):
+        super().__init__()
+        self.manager = manager
+        self.tasks = tasks
+        self.job = None
+        # Найденные проекты приходят потоком и добавляются в таблицу пачками
+        self.pending = []
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(200)
+        self.flush_timer.timeout.connect(self.flush_found)
+        self.init_ui()
+        set_window_icon(self)
+        add_footer_label(self)
+
+    def init_ui(self):
+        """Инициализация интерфейса"""
+        self.setWindowTitle("Импорт проектов | PythonProjectMngr")
+        self.setGeometry(100, 100, 700, 440)
+        center_window(self)
+
+        layout = QVBoxLayout()
+
+        path_layout = QHBoxLayout()
+        self.path_input = QLineEdit()
+        self.path_input.setPlaceholderText("Папка, в которой искать проекты")
+        path_layout.addWidget(self.path_input)
+        browse_btn = QPushButton("Обзор...")
+        browse_btn.clicked.connect(self.browse_folder)
+        path_layout.addWidget(browse_btn)
+        layout.addLayout(path_layout)
+
+        mode_layout = QHBoxLayout()
+        mode_layout.addWidget(QLabel("Как импортировать:"))
+        self.mode_combo = QComboBox()
+        for move, title in self.MODES:
+            self.mode_combo.addItem(title, move)
+        mode_layout.addWidget(self.mode_combo, 1)
+        layout.addLayout(mode_layout)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel("Проектом считается папка с pyproject.toml, setup.py, requirements.txt или app.py")
+        self.status_label.setStyleSheet("color: gray;")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        # Кнопки
+        btn_layout = QHBoxLayout()
+
+        self.find_btn = QPushButton("Найти проекты")
+        self.find_btn.clicked.connect(self.find_projects)
+        btn_layout.addWidget(self.find_btn)
+
+        self.stop_btn = QPushButton("Остановить")
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop)
+        btn_layout.addWidget(self.stop_btn)
+
+        self.import_btn = QPushButton("Импортировать отмеченные")
+        self.import_btn.setEnabled(False)
+        self.import_btn.clicked.connect(self.import_projects)
+        btn_layout.addWidget(self.import_btn)
+
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(close_btn)
+
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+    def reopen(self):
+        """Повторный показ окна: найденные проекты остаются до импорта"""
+
+    def browse_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Выберите папку", self.path_input.text())
+        if folder:
+            self.path_input.setText(folder)
+
+    def start(self, job):
+        self.job = job
+        self.find_btn.setEnabled(False)
+        self.import_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        job.progress.connect(self.on_progress)
+        job.failed.connect(self.on_job_failed)
+
+    def finish(self):
+        self.find_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.progress_bar.setVisible(False)
+        self.import_btn.setEnabled(self.table.rowCount() > 0)
+
+    def stop(self):
+        if self.job is not None:
+            self.job.cancel()
+
+    def find_projects(self):
+        tree = self.path_input.text().strip()
+        if not tree:
+            msg = SilentMessageBox(self, "Предупреждение", "Выберите папку!")
+            msg.exec_with_result()
+            return
+        self.table.setRowCount(0)
+        self.pending = []
+        job = self.tasks.find_importable(tree)
+        job.partial.connect(self.on_project_found)
+        job.finished.connect(self.on_found)
+        self.start(job)
+        # Объём обхода заранее неизвестен
+        self.progress_bar.setMaximum(0)
+        self.flush_timer.start()
+
+    def on_progress(self, done, total, text):
+        self.progress_bar.setMaximum(max(total, 0))
+        self.progress_bar.setValue(done)
+        self.status_label.setText(text)
+
+    def on_project_found(self, result):
+        self.pending.append(result)
+
+    def flush_found(self):
+        if not self.pending:
+            return
+        row = self.table.rowCount()
+        self.table.setRowCount(row + len(self.pending))
+        for path, markers in self.pending:
+            name = QTableWidgetItem(os.path.basename(path))
+            name.setFlags(name.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            name.setCheckState(Qt.CheckState.Checked)
+            name.setData(Qt.ItemDataRole.UserRole, path)
+            self.table.setItem(row, 0, name)
+            self.table.setItem(row, 1, QTableWidgetItem(", ".join(markers)))
+            self.table.setItem(row, 2, QTableWidgetItem(path))
+            row += 1
+        self.pending = []
+
+    def on_found(self, result):
+        success, message, paths = result
+        self.flush_timer.stop()
+        self.flush_found()
+        self.finish()
+        self.status_label.setText(message)
+
+    def checked_paths(self):
+        paths = []
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, 0)
+            if item.checkState() == Qt.CheckState.Checked:
+                paths.append(item.data(Qt.ItemDataRole.UserRole))
+        return paths
+
+    def import_projects(self):
+        paths = self.checked_paths()
+        if not paths:
+            return
+        move = self.mode_combo.currentData()
+        if move:
+            text = f"Перенести проектов: {len(paths)} в корневую папку? Из исходных мест они исчезнут."
+        else:
+            text = f"Добавить ссылки на проекты: {len(paths)} в корневую папку?"
+        msg = SilentMessageBox(self, "Подтверждение", text, buttons=("Да", "Нет"))
+        if msg.exec_with_result() != "Да":
+            return
+        job = self.tasks.import_projects(paths, move)
+        job.finished.connect(self.on_imported)
+        self.start(job)
+
+    def on_imported(self, result):
+        success, message = result
+        self.table.setRowCount(0)
+        self.finish()
+        self.status_label.setText(message)
+        if not success:
+            msg = SilentMessageBox(self, "Ошибка", message)
+            msg.exec_with_result()
+
+    def on_job_failed(self, error):
+        self.flush_timer.stop()
+        self.finish()
+        msg = SilentMessageBox(self, "Ошибка", error)
+        msg.exec_with_result()
+
+    def closeEvent(self, event):
+        # Поиск можно прервать; уже начатый импорт доводится до конца
+        if self.job is not None and not self.job.done and self.job.name == "find_importable":
+            self.job.cancel()
+        super().closeEvent(event)
+
+
+class DiagnosticsWindow(QWidget):
+    """Сводка трассировки операций и её экспорт"""
+    COLUMNS = ["Операция", "Вызовов", "Ошибок", "p50, мс", "p95, мс", "Макс., мс", "Файлов", "Объём"]
+
+    def __init__(self, manager):
+        super().__init__()
+        self.manager = manager
+        self.init_ui()
+        set_window_icon(self)
+        add_footer_label(self)
+
+    def init_ui(self):
+        """Инициализация интерфейса"""
+        self.setWindowTitle("Диагностика | PythonProjectMngr")
+        self.setGeometry(100, 100, 760, 420)
+        center_window(self)
+
+        layout = QVBoxLayout()
+
+        self.enabled_checkbox = QCheckBox("Записывать трассировку операций")
+        self.enabled_checkbox.setChecked(self.manager.tracing_enabled)
+        self.enabled_checkbox.toggled.connect(self.set_enabled)
+        layout.addWidget(self.enabled_checkbox)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.status_label)
+
+        # Кнопки
+        btn_layout = QHBoxLayout()
+
+        refresh_btn = QPushButton("Обновить")
+        refresh_btn.clicked.connect(self.refresh)
+        btn_layout.addWidget(refresh_btn)
+
+        clear_btn = QPushButton("Очистить")
+        clear_btn.clicked.connect(self.clear)
+        btn_layout.addWidget(clear_btn)
+
+        jsonl_btn = QPushButton("Экспорт JSONL...")
+        jsonl_btn.clicked.connect(self.export_jsonl)
+        btn_layout.addWidget(jsonl_btn)
+
+        chrome_btn = QPushButton("Экспорт Chrome Trace...")
+        chrome_btn.clicked.connect(self.export_chrome)
+        btn_layout.addWidget(chrome_btn)
+
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(close_btn)
+
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+        # Сводка обновляется, пока окно открыто
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(2000)
+        self.refresh()
+
+    def reopen(self):
+        self.enabled_checkbox.setChecked(self.manager.tracing_enabled)
+        self.timer.start(2000)
+        self.refresh()
+
+    def set_enabled(self, enabled):
+        self.manager.set_tracing(enabled)
+        self.refresh()
+
+    def refresh(self):
+        """Перестроение таблицы по текущему содержимому буфера"""
+        summary = trace.tracer.summary()
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(summary))
+        for row, (name, item) in enumerate(sorted(summary.items())):
+            values = [
+                name, item["count"], item["errors"],
+                round(item["p50_ms"], 2), round(item["p95_ms"], 2), round(item["max_ms"], 2),
+                item.get("files", ""), format_size(item["bytes"]) if "bytes" in item else "",
+            ]
+            for column, value in enumerate(values):
+                cell = QTableWidgetItem()
+                # Числа кладутся как данные, чтобы сортировка была числовой
+                cell.setData(Qt.ItemDataRole.DisplayRole, value)
+                if column > 0:
+                    cell.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, column, cell)
+        self.table.setSortingEnabled(True)
+        state = "включена" if trace.tracer.enabled else "выключена"
+        self.status_label.setText(
+            f"Трассировка {state} · записей в буфере: {len(trace.tracer.buffer)} из {trace.tracer.buffer.maxlen}"
+        )
+
+    def clear(self):
+        trace.tracer.clear()
+        self.refresh()
+
+    def export_jsonl(self):
+        self.export("trace.jsonl", "JSON Lines (*.jsonl)", trace.tracer.export_jsonl)
+
+    def export_chrome(self):
+        self.export("trace.json", "Chrome Trace (*.json)", trace.tracer.export_chrome)
+
+    def export(self, default_name, file_filter, writer):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Экспорт трассировки",
+            os.path.join(str(self.manager.app_folder), default_name), file_filter
+        )
+        if not path:
+            return
+        try:
+            count = writer(path)
+            msg = SilentMessageBox(self, "Успех", f"Записей выгружено: {count}")
+        except OSError as e:
+            msg = SilentMessageBox(self, "Ошибка", f"Не удалось выгрузить трассировку:\n{str(e)}")
+        msg.exec_with_result()
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        super().closeEvent(event)